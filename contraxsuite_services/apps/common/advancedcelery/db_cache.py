@@ -1,49 +1,224 @@
+import logging
+import os
 import threading
 import time
-from datetime import datetime
 
+from django.db import close_old_connections, transaction
 from lexnlp.extract.en import dict_entities
 from lexnlp.nlp.en.tokens import get_stems
 
 from apps.common.models import ObjectStorage
 from apps.extract.models import GeoEntity, GeoAlias, Court, Term
+from apps.task.utils.nlp.entity_matcher import EntityAliasMatcher
+from apps.task.utils.nlp.term_matcher import TermStemMatcher
 
 CACHE_KEY_GEO_CONFIG = 'geo_config'
+CACHE_KEY_GEO_MATCHER = 'geo_matcher'
 CACHE_KEY_COURT_CONFIG = 'court_config'
+CACHE_KEY_COURT_MATCHER = 'court_matcher'
 CACHE_KEY_TERM_STEMS = 'term_stems'
+CACHE_KEY_TERM_STEMS_MATCHER = 'term_stems_matcher'
+
+logger = logging.getLogger(__name__)
+
+
+def get_stemmed_term(term: str) -> str:
+    return ' %s ' % ' '.join(get_stems(term))
+
+
+def patch_term_stems(term_stems: dict, delta) -> dict:
+    """
+    Apply term delta to term stems dict: items of changed stems are replaced.
+    Applying the same delta twice gives the same result.
+    :param delta: (added, removed), lists of (stemmed term, term, pk)
+    """
+    added, removed = delta
+    # copy: readers may be iterating over the current dict
+    term_stems = dict(term_stems)
+    for stemmed_term, term, pk in removed:
+        item = term_stems.get(stemmed_term)
+        if not item:
+            continue
+        values = [i for i in item['values'] if list(i) != [term, pk]]
+        if values:
+            term_stems[stemmed_term] = dict(values=values, length=len(values))
+        else:
+            del term_stems[stemmed_term]
+    for stemmed_term, term, pk in added:
+        item = term_stems.get(stemmed_term)
+        values = item['values'] if item else []
+        if [term, pk] in [list(i) for i in values]:
+            continue
+        values = values + [[term, pk]]
+        term_stems[stemmed_term] = dict(values=values, length=len(values))
+    return term_stems
+
+
+def patch_term_matcher(term_matcher: TermStemMatcher, delta) -> TermStemMatcher:
+    """
+    Apply term delta to a copy of the matcher, see TermStemMatcher.patched():
+    readers may be walking the current trie. Applying the same delta twice
+    (e.g. retried after a failed refresh) gives the same result.
+    """
+    added, removed = delta
+    return term_matcher.patched(added, removed)
+
+
+def patch_entity_config(entity_config: list, delta) -> list:
+    """
+    Apply entity delta to a dict_entities config; returns a new list
+    as lexnlp may be iterating over the current one.
+    :param delta: (added or changed entity configs, removed or changed entity ids)
+    """
+    added, removed = delta
+    removed = set(removed)
+    return [entity for entity in entity_config
+            if dict_entities.get_entity_id(entity) not in removed] + list(added)
+
+
+def patch_entity_matcher(matcher: EntityAliasMatcher, delta) -> EntityAliasMatcher:
+    """
+    Apply entity delta to a copy of the matcher, see patch_term_matcher().
+    """
+    added, removed = delta
+    return matcher.patched(added, removed)
+
+
+def get_entity_config_delta(entity_config: list, cached_entity_config: list):
+    """
+    Compare dict_entities configs by entity id.
+    :return: (added or changed entity configs, removed or changed entity ids)
+    """
+    cached_entities = {dict_entities.get_entity_id(entity): entity
+                       for entity in cached_entity_config}
+    entity_ids = set()
+    added = []
+    removed = []
+    for entity in entity_config:
+        entity_id = dict_entities.get_entity_id(entity)
+        entity_ids.add(entity_id)
+        cached_entity = cached_entities.get(entity_id)
+        if cached_entity != entity:
+            added.append(entity)
+            if cached_entity is not None:
+                removed.append(entity_id)
+    removed += [entity_id for entity_id in cached_entities if entity_id not in entity_ids]
+    return added, removed
 
 
 class DbCache:
+    """
+    Values stored in ObjectStorage cached in process memory.
+    Reads are lock-free: readers take the current immutable snapshot dict,
+    the watcher thread (and first loads of new keys) build a new snapshot
+    under the lock and swap the reference.
+    A record not refreshed for CACHE_IN_MEMORY_STALE_SECONDS is refreshed by the reader
+    and the watcher is started again: it died or did not survive a fork of the process.
+    """
     CACHE_IN_MEMORY_REFRESH_SECONDS = 20
 
+    CACHE_IN_MEMORY_STALE_SECONDS = 3 * CACHE_IN_MEMORY_REFRESH_SECONDS
+
+    # deltas stored on top of a full value before it is written in full again
+    MAX_DELTAS = 50
+
+    # changes touching a larger share of cached items are written in full
+    MAX_DELTA_RATIO = 0.1
+
     INSTANCE = None
 
     lock = threading.RLock()
 
+    # guards replacing the lock in a forked process; held only to do that
+    fork_lock = threading.Lock()
+
+    # functions applying a delta to a cached value: f(value, delta) -> value
+    PATCHERS = {
+        CACHE_KEY_GEO_CONFIG: patch_entity_config,
+        CACHE_KEY_GEO_MATCHER: patch_entity_matcher,
+        CACHE_KEY_COURT_CONFIG: patch_entity_config,
+        CACHE_KEY_COURT_MATCHER: patch_entity_matcher,
+        CACHE_KEY_TERM_STEMS: patch_term_stems,
+        CACHE_KEY_TERM_STEMS_MATCHER: patch_term_matcher,
+    }
+
     def __init__(self) -> None:
         super().__init__()
+        # key -> (last update time, version, value); never modified, only replaced
         self.in_memory_cache = {}
-        self.watch_thread = threading.Thread(target=self._check_cache)
         self._stop_watcher = False
+        self.pid = None
+        self.watch_thread = None
+        self._start_watcher()
+
+    def _start_watcher(self):
+        self.pid = os.getpid()
+        self.watch_thread = threading.Thread(target=self._check_cache, daemon=True)
         self.watch_thread.start()
 
+    def _ensure_watcher(self):
+        """
+        Start the watcher again if it is dead or if the process was forked:
+        the child has neither the thread nor a usable lock if the thread held it.
+        """
+        if self.pid != os.getpid():
+            with DbCache.fork_lock:
+                if self.pid != os.getpid():
+                    DbCache.lock = threading.RLock()
+                    self._start_watcher()
+            return
+        with self.lock:
+            if not self.watch_thread.is_alive() and not self._stop_watcher:
+                self._start_watcher()
+
     def stop_watching(self):
         self._stop_watcher = True
 
     def _check_cache(self):
-        while self.watch_thread.is_alive() and not self._stop_watcher:
+        while not self._stop_watcher:
             time.sleep(self.CACHE_IN_MEMORY_REFRESH_SECONDS)
+            # the thread has its own DB connection, drop it if it is broken or expired
+            close_old_connections()
             self.lock.acquire()
             try:
-                for key in set(self.in_memory_cache.keys()):
-                    last_update_date, value = self.in_memory_cache[key]
-                    if (datetime.now() - last_update_date).seconds \
-                            > self.CACHE_IN_MEMORY_REFRESH_SECONDS:
-                        del self.in_memory_cache[key]
-
+                self._refresh_all()
             finally:
                 self.lock.release()
 
+    def _refresh_all(self):
+        """
+        Refresh all cached keys; a key failed to refresh keeps its current record
+        and is retried on next check, other keys are updated anyway.
+        """
+        # refresh is cheap if nothing changed: one version record read per key
+        in_memory_cache = dict(self.in_memory_cache)
+        for key, record in in_memory_cache.items():
+            try:
+                in_memory_cache[key] = self._refresh(key, record)
+            except Exception:
+                logger.exception('Cannot refresh DbCache key "{0}"'.format(key))
+        self.in_memory_cache = in_memory_cache
+
+    @staticmethod
+    def _refresh(key: str, record=None):
+        """
+        Bring in-memory record up to date: patch it with new deltas
+        if there are any or reload the full value.
+        """
+        if record is None:
+            version, value = DbCache.load_versioned(key)
+        else:
+            version, value = DbCache.load_versioned(key, record[2], record[1])
+        return time.time(), version, value
+
+    @staticmethod
+    def get_version_key(key: str) -> str:
+        return key + ':version'
+
+    @staticmethod
+    def get_delta_key(key: str, version: int) -> str:
+        return '{0}:delta:{1}'.format(key, version)
+
     @staticmethod
     def load_from_db(key: str):
         try:
@@ -51,33 +226,156 @@ class DbCache:
         except ObjectStorage.DoesNotExist:
             return None
 
+    @staticmethod
+    def load_deltas(key: str, from_version: int, to_version: int):
+        """
+        Load deltas following from_version up to to_version inclusive.
+        :return: list of deltas or None if some of them are missing
+        """
+        delta_keys = [DbCache.get_delta_key(key, version)
+                      for version in range(from_version + 1, to_version + 1)]
+        if not delta_keys:
+            return []
+        records = {i.key: i for i in ObjectStorage.objects.filter(key__in=delta_keys)}
+        if len(records) != len(delta_keys):
+            return None
+        return [records[delta_key].get_obj() for delta_key in delta_keys]
+
+    @staticmethod
+    def load_versioned(key: str, value=None, version: int = None):
+        """
+        Load value of given key. If value of a known version is given,
+        only deltas written after it are loaded and applied.
+        :return: (version, value); version is None if the value is not versioned
+        """
+        versions = DbCache.load_from_db(DbCache.get_version_key(key))
+        if versions is None:
+            # value written before versions were introduced
+            return None, DbCache.load_from_db(key)
+        base_version, last_version = versions
+
+        if version is not None and base_version <= version <= last_version:
+            deltas = DbCache.load_deltas(key, version, last_version)
+            if deltas is not None:
+                return last_version, DbCache.apply_deltas(key, value, deltas)
+
+        value = DbCache.load_from_db(key)
+        deltas = DbCache.load_deltas(key, base_version, last_version)
+        if deltas is None:
+            # rewritten in full meanwhile; reload on next refresh
+            return None, value
+        return last_version, DbCache.apply_deltas(key, value, deltas)
+
+    @staticmethod
+    def apply_deltas(key: str, value, deltas):
+        if value is None:
+            return None
+        patch = DbCache.PATCHERS[key]
+        for delta in deltas:
+            value = patch(value, delta)
+        return value
+
     @staticmethod
     def put_to_db(key: str, value):
-        ObjectStorage.update_or_create(key, value)
+        """
+        Write full value and start a new version, dropping stored deltas.
+        """
+        with transaction.atomic():
+            versions = DbCache.load_versions_for_update(key)
+            version = versions[1] + 1 if versions else 1
+            ObjectStorage.update_or_create(key, value)
+            ObjectStorage.update_or_create(DbCache.get_version_key(key), (version, version))
+            ObjectStorage.objects.filter(key__startswith=key + ':delta:').delete()
+
+    @staticmethod
+    def put_deltas_to_db(deltas: dict) -> bool:
+        """
+        Write deltas of several related keys at once.
+        :param deltas: {key: delta}
+        :return: False if nothing is written and full values should be written instead
+        """
+        with transaction.atomic():
+            key_versions = {key: DbCache.load_versions_for_update(key) for key in deltas}
+            for versions in key_versions.values():
+                if versions is None or versions[1] - versions[0] >= DbCache.MAX_DELTAS:
+                    return False
+            for key, delta in deltas.items():
+                base_version, last_version = key_versions[key]
+                ObjectStorage.update_or_create(DbCache.get_delta_key(key, last_version + 1),
+                                               delta)
+                ObjectStorage.update_or_create(DbCache.get_version_key(key),
+                                               (base_version, last_version + 1))
+        return True
+
+    @staticmethod
+    def load_versions_for_update(key: str):
+        record = ObjectStorage.objects.select_for_update() \
+            .filter(key=DbCache.get_version_key(key)).first()
+        return record.get_obj() if record else None
+
+    @staticmethod
+    def is_small_delta(changes_count: int, items_count: int) -> bool:
+        return changes_count <= DbCache.MAX_DELTA_RATIO * items_count
+
+    def _is_stale(self, record) -> bool:
+        return time.time() - record[0] > self.CACHE_IN_MEMORY_STALE_SECONDS
 
     def _get(self, key: str):
+        record = self.in_memory_cache.get(key)
+        if record is not None and not self._is_stale(record):
+            return record[2]
+
+        if record is not None:
+            self._ensure_watcher()
         self.lock.acquire()
         try:
             record = self.in_memory_cache.get(key)
-
-            if not record or (datetime.now() - record[0]).seconds \
-                    > DbCache.CACHE_IN_MEMORY_REFRESH_SECONDS:
-                record = (datetime.now(), self.load_from_db(key))
-                self.in_memory_cache[key] = record
-
-            return record[1]
+            if record is None:
+                record = self._refresh(key)
+            elif self._is_stale(record):
+                try:
+                    record = self._refresh(key, record)
+                except Exception:
+                    logger.exception('Cannot refresh DbCache key "{0}"'.format(key))
+                    # serve the current value, retry later
+                    record = (time.time(),) + record[1:]
+            else:
+                return record[2]
+            in_memory_cache = dict(self.in_memory_cache)
+            in_memory_cache[key] = record
+            self.in_memory_cache = in_memory_cache
+            return record[2]
         finally:
             self.lock.release()
 
     @staticmethod
     def get(key: str):
-        DbCache.lock.acquire()
-        try:
-            if DbCache.INSTANCE is None:
-                DbCache.INSTANCE = DbCache()
-            return DbCache.INSTANCE._get(key)
-        finally:
-            DbCache.lock.release()
+        instance = DbCache.INSTANCE
+        if instance is None:
+            DbCache.lock.acquire()
+            try:
+                if DbCache.INSTANCE is None:
+                    DbCache.INSTANCE = DbCache()
+                instance = DbCache.INSTANCE
+            finally:
+                DbCache.lock.release()
+        return instance._get(key)
+
+    @staticmethod
+    def put_entity_config(config_key: str, matcher_key: str, entity_config: list):
+        """
+        Store delta against the cached entity config if it is small, full config otherwise.
+        """
+        cached_entity_config = DbCache.load_versioned(config_key)[1]
+        if cached_entity_config is not None:
+            delta = get_entity_config_delta(entity_config, cached_entity_config)
+            if not delta[0] and not delta[1]:
+                return
+            if DbCache.is_small_delta(len(delta[0]) + len(delta[1]), len(entity_config)) \
+                    and DbCache.put_deltas_to_db({config_key: delta, matcher_key: delta}):
+                return
+        DbCache.put_to_db(config_key, entity_config)
+        DbCache.put_to_db(matcher_key, EntityAliasMatcher(entity_config))
 
     @staticmethod
     def cache_geo_config(*args, **kwargs) -> None:
@@ -96,12 +394,20 @@ class DbCache:
                                                     is_abbreviation=is_abbrev,
                                                     alias_id=alias_id)
         res = list(geo_config.values())
-        DbCache.put_to_db(CACHE_KEY_GEO_CONFIG, res)
+        DbCache.put_entity_config(CACHE_KEY_GEO_CONFIG, CACHE_KEY_GEO_MATCHER, res)
 
     @classmethod
     def get_geo_config(cls):
         return DbCache.get(CACHE_KEY_GEO_CONFIG)
 
+    @classmethod
+    def get_geo_matcher(cls) -> EntityAliasMatcher:
+        matcher = DbCache.get(CACHE_KEY_GEO_MATCHER)
+        if matcher is None:
+            # geo config was cached before the matcher was introduced
+            matcher = EntityAliasMatcher(DbCache.get_geo_config() or [])
+        return matcher
+
     @staticmethod
     def cache_court_config(*args, **kwargs):
         res = [dict_entities.entity_config(
@@ -110,17 +416,43 @@ class DbCache:
             priority=0,
             aliases=i.alias.split(';') if i.alias else []
         ) for i in Court.objects.all()]
-        DbCache.put_to_db(CACHE_KEY_COURT_CONFIG, res)
+        DbCache.put_entity_config(CACHE_KEY_COURT_CONFIG, CACHE_KEY_COURT_MATCHER, res)
 
     @classmethod
     def get_court_config(cls):
         return DbCache.get(CACHE_KEY_COURT_CONFIG)
 
+    @classmethod
+    def get_court_matcher(cls) -> EntityAliasMatcher:
+        matcher = DbCache.get(CACHE_KEY_COURT_MATCHER)
+        if matcher is None:
+            # court config was cached before the matcher was introduced
+            matcher = EntityAliasMatcher(DbCache.get_court_config() or [])
+        return matcher
+
     @staticmethod
     def cache_term_stems(*args, **kwargs):
+        terms = set(Term.objects.values_list('term', 'pk'))
+
+        # store added / removed terms only if the change is small
+        cached_term_stems = DbCache.load_versioned(CACHE_KEY_TERM_STEMS)[1]
+        if cached_term_stems is not None:
+            cached_terms = {(t, pk): stemmed_term
+                            for stemmed_term, item in cached_term_stems.items()
+                            for t, pk in item['values']}
+            added = [(get_stemmed_term(t), t, pk) for t, pk in terms - set(cached_terms)]
+            removed = [(cached_terms[(t, pk)], t, pk) for t, pk in set(cached_terms) - terms]
+            if not added and not removed:
+                return
+            delta = (added, removed)
+            if DbCache.is_small_delta(len(added) + len(removed), len(terms)) \
+                    and DbCache.put_deltas_to_db({CACHE_KEY_TERM_STEMS: delta,
+                                                  CACHE_KEY_TERM_STEMS_MATCHER: delta}):
+                return
+
         term_stems = {}
-        for t, pk in Term.objects.values_list('term', 'pk'):
-            stemmed_term = ' %s ' % ' '.join(get_stems(t))
+        for t, pk in terms:
+            stemmed_term = get_stemmed_term(t)
             stemmed_item = term_stems.get(stemmed_term, [])
             stemmed_item.append([t, pk])
             term_stems[stemmed_term] = stemmed_item
@@ -128,7 +460,16 @@ class DbCache:
             term_stems[item] = dict(values=term_stems[item],
                                     length=len(term_stems[item]))
         DbCache.put_to_db(CACHE_KEY_TERM_STEMS, term_stems)
+        DbCache.put_to_db(CACHE_KEY_TERM_STEMS_MATCHER, TermStemMatcher(term_stems))
 
     @classmethod
     def get_term_config(cls):
         return DbCache.get(CACHE_KEY_TERM_STEMS)
+
+    @classmethod
+    def get_term_matcher(cls) -> TermStemMatcher:
+        matcher = DbCache.get(CACHE_KEY_TERM_STEMS_MATCHER)
+        if matcher is None:
+            # term stems were cached before the matcher was introduced
+            matcher = TermStemMatcher(DbCache.get_term_config() or {})
+        return matcher
@@ -0,0 +1,130 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+import hashlib
+import pickle
+import threading
+from typing import Any, Dict, Tuple
+
+import settings
+from apps.common.advancedcelery.redis_cache import Cache
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+class PayloadRef:
+    """
+    Reference to a task argument offloaded to the Redis cache.
+    Replaces the argument in the broker message and is resolved by ExtendedTask on receipt.
+    """
+    __slots__ = ('key', 'size')
+
+    def __init__(self, key: str, size: int):
+        self.key = key
+        self.size = size
+
+    def __repr__(self):
+        return 'PayloadRef({0}, {1} bytes)'.format(self.key, self.size)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_payload_cache() -> Cache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = Cache()
+    return _cache
+
+
+class PayloadOffloader:
+    """
+    Replaces task arguments pickled to more than CELERY_PAYLOAD_OFFLOAD_BYTES
+    with references to the Redis cache.
+    Keys are content hashes, so an argument shared by many sub-tasks is stored once
+    and each worker process loads it once into the local tier of the cache.
+    Offloaded values expire after CELERY_PAYLOAD_TTL_SECONDS.
+    """
+
+    def __init__(self, threshold: int = None, cache: Cache = None):
+        self.threshold = settings.CELERY_PAYLOAD_OFFLOAD_BYTES \
+            if threshold is None else threshold
+        self.cache = cache
+        # id(value) -> (value, value or its reference); keeps values alive to keep ids unique
+        self.offloaded = {}
+        self.offloaded_count = 0
+        self.offloaded_bytes = 0
+
+    def offload_value(self, value: Any) -> Any:
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        value_id = id(value)
+        if value_id in self.offloaded:
+            return self.offloaded[value_id][1]
+        bb = pickle.dumps(value)
+        if len(bb) > self.threshold:
+            key = 'payload_' + hashlib.sha1(bb).hexdigest()
+            (self.cache or get_payload_cache()).put(key, value,
+                                                    ttl_seconds=settings.CELERY_PAYLOAD_TTL_SECONDS)
+            result = PayloadRef(key, len(bb))
+            self.offloaded_count += 1
+            self.offloaded_bytes += len(bb)
+        else:
+            result = value
+        self.offloaded[value_id] = (value, result)
+        return result
+
+    def offload_args(self, args) -> Tuple:
+        return tuple(self.offload_value(arg) for arg in args or ())
+
+    def offload_kwargs(self, kwargs: Dict) -> Dict:
+        return {name: self.offload_value(value) for name, value in (kwargs or {}).items()}
+
+
+def resolve_value(value: Any, cache: Cache = None) -> Any:
+    if not isinstance(value, PayloadRef):
+        return value
+    resolved = (cache or get_payload_cache()).get(value.key)
+    if resolved is None:
+        raise RuntimeError('Offloaded task argument is missing in the cache: {0}'.format(value))
+    return resolved
+
+
+def resolve_args(args, kwargs):
+    """
+    Replace references in task arguments with the offloaded values.
+    """
+    if not any(isinstance(value, PayloadRef)
+               for value in list(args or ()) + list((kwargs or {}).values())):
+        return args, kwargs
+    return tuple(resolve_value(arg) for arg in args), \
+        {name: resolve_value(value) for name, value in kwargs.items()}
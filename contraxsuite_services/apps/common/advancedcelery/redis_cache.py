@@ -23,6 +23,9 @@
     or shipping ContraxSuite within a closed source product.
 """
 import pickle
+import threading
+import time
+from collections import OrderedDict
 from typing import Set
 
 import redis
@@ -57,26 +60,95 @@ class Cache:
         to them. Body of the chord should be a task which will do TransferManager.cleanup(key).
         4. Sub-tasks started by chord use TransferManager.get(key) to get the big data.
 
+    Local cache is an LRU bounded by total size of pickled values and by entry TTL.
+    Each put() increments a version key next to the value in Redis; a local entry
+    is used only while its version matches, so a hit costs a small version read
+    instead of transferring and unpickling the value.
     """
 
-    def __init__(self):
-        self._local_cache = {}
-        self._redis = redis.Redis.from_url(url=settings.CELERY_CACHE_REDIS_URL)
+    def __init__(self, redis_client=None, max_bytes: int = None, ttl_seconds: int = None):
+        # full key -> (value, size in bytes, version, expiration time)
+        self._local_cache = OrderedDict()
+        self._local_bytes = 0
+        self._lock = threading.Lock()
+        self._redis = redis_client or redis.Redis.from_url(url=settings.CELERY_CACHE_REDIS_URL)
+        self.max_bytes = settings.CELERY_CACHE_LOCAL_MAX_BYTES \
+            if max_bytes is None else max_bytes
+        self.ttl_seconds = settings.CELERY_CACHE_LOCAL_TTL_SECONDS \
+            if ttl_seconds is None else ttl_seconds
+        self.stats = dict(hits=0, misses=0, evictions=0, invalidations=0)
 
     @staticmethod
     def _full_key(key: str):
         return '{0}_{1}'.format(settings.CELERY_CACHE_REDIS_KEY_PREFIX, key)
 
+    @staticmethod
+    def _version_key(full_key: str):
+        return full_key + ':version'
+
     def _load_value_from_storage(self, full_key: str):
-        bb = self._redis.get(full_key)
+        """
+        :return: (value, size of pickled value, version)
+        """
+        pipe = self._redis.pipeline()
+        pipe.get(full_key)
+        pipe.get(self._version_key(full_key))
+        bb, version = pipe.execute()
         # if not bb:
         #     print('Missing in redis: {0}'.format(full_key))
-        return pickle.loads(bb) if bb else None
+        return (pickle.loads(bb) if bb else None), len(bb or b''), version
 
-    def _put_value_to_storage(self, full_key: str, value):
+    def _put_value_to_storage(self, full_key: str, value, ttl_seconds: int = None):
         # print('Putting to redis: {0}'.format(full_key))
         bb = pickle.dumps(value) if value else None
-        self._redis.set(full_key, bb)
+        version_key = self._version_key(full_key)
+        pipe = self._redis.pipeline()
+        if bb is None:
+            pipe.delete(full_key)
+        else:
+            pipe.set(full_key, bb, ex=ttl_seconds)
+        pipe.incr(version_key)
+        if ttl_seconds:
+            pipe.expire(version_key, ttl_seconds)
+        pipe.execute()
+
+    def _drop_local(self, full_key: str):
+        entry = self._local_cache.pop(full_key, None)
+        if entry is not None:
+            self._local_bytes -= entry[1]
+
+    def _put_local(self, full_key: str, value, size: int, version):
+        self._drop_local(full_key)
+        if size > self.max_bytes:
+            return
+        self._local_cache[full_key] = (value, size, version, time.time() + self.ttl_seconds)
+        self._local_bytes += size
+        while self._local_bytes > self.max_bytes:
+            _, entry = self._local_cache.popitem(last=False)
+            self._local_bytes -= entry[1]
+            self.stats['evictions'] += 1
+
+    def _get_local(self, full_key: str):
+        """
+        :return: local entry if it is not expired and its version is current, None otherwise
+        """
+        with self._lock:
+            entry = self._local_cache.get(full_key)
+            if entry is None:
+                return None
+            if entry[3] < time.time():
+                self._drop_local(full_key)
+                self.stats['evictions'] += 1
+                return None
+        if self._redis.get(self._version_key(full_key)) != entry[2]:
+            with self._lock:
+                self._drop_local(full_key)
+                self.stats['invalidations'] += 1
+            return None
+        with self._lock:
+            if full_key in self._local_cache:
+                self._local_cache.move_to_end(full_key)
+        return entry
 
     def get(self, key):
         """
@@ -85,24 +157,33 @@ class Cache:
         :return:
         """
         full_key = Cache._full_key(key)
-        if full_key in self._local_cache:
+        entry = self._get_local(full_key)
+        if entry is not None:
             # print('using local cache')
-            return self._local_cache[full_key]
-        else:
-            # print('loading from redis')
-            value = self._load_value_from_storage(full_key)
-            self._local_cache[full_key] = value
-            return value
-
-    def put(self, key, value):
+            with self._lock:
+                self.stats['hits'] += 1
+            return entry[0]
+        # print('loading from redis')
+        value, size, version = self._load_value_from_storage(full_key)
+        with self._lock:
+            self.stats['misses'] += 1
+            if value is not None:
+                self._put_local(full_key, value, size, version)
+        return value
+
+    def put(self, key, value, ttl_seconds: int = None):
         """
         Put the value into Redis under the specified key.
+        Local copies of the previous value in all processes become invalid.
         :param key:
         :param value:
-        :param active_keys:
+        :param ttl_seconds: expire the value in Redis after this time
         :return:
         """
-        self._put_value_to_storage(self._full_key(key), value)
+        full_key = self._full_key(key)
+        self._put_value_to_storage(full_key, value, ttl_seconds)
+        with self._lock:
+            self._drop_local(full_key)
         return key
 
     def cleanup(self, key):
@@ -112,9 +193,13 @@ class Cache:
         :return:
         """
         full_key = Cache._full_key(key)
-        if full_key in self._local_cache.keys():
-            del self._local_cache[full_key]
-        try:
-            self._redis.delete([full_key])
-        except KeyError:
-            pass
+        with self._lock:
+            self._drop_local(full_key)
+        self._redis.delete(full_key, self._version_key(full_key))
+
+    def get_stats(self) -> dict:
+        """
+        :return: hit/miss/eviction/invalidation counters and local cache size
+        """
+        with self._lock:
+            return dict(self.stats, items=len(self._local_cache), bytes=self._local_bytes)
@@ -0,0 +1,119 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# Standard imports
+import pickle
+import random
+import time
+import tracemalloc
+
+# Django imports
+from django.core.management import BaseCommand
+
+# Project imports
+from apps.common.advancedcelery.db_cache import patch_term_matcher, patch_term_stems
+from apps.task.utils.nlp.term_matcher import TermStemMatcher
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+class Command(BaseCommand):
+    help = "Measure worker reload time and memory churn of DbCache term stems " \
+           "after adding terms: full value reload vs applying a delta"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--terms',
+                            dest='terms',
+                            type=int,
+                            default=500000,
+                            help='Number of terms in the dictionary')
+        parser.add_argument('--added',
+                            dest='added',
+                            type=int,
+                            default=100,
+                            help='Number of added terms')
+
+    @staticmethod
+    def get_terms(start, count, vocabulary):
+        terms = []
+        for pk in range(start, start + count):
+            stems = random.sample(vocabulary, random.randint(1, 3))
+            terms.append((' %s ' % ' '.join(stems), ' '.join(stems), pk))
+        return terms
+
+    @staticmethod
+    def get_term_stems(terms):
+        term_stems = {}
+        for stemmed_term, term, pk in terms:
+            term_stems.setdefault(stemmed_term, []).append([term, pk])
+        return {stemmed_term: dict(values=values, length=len(values))
+                for stemmed_term, values in term_stems.items()}
+
+    @staticmethod
+    def measure(func):
+        tracemalloc.start()
+        start = time.time()
+        func()
+        duration = time.time() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return duration, peak
+
+    def handle(self, *args, **options):
+        random.seed(0)
+        vocabulary = ['stem{0}'.format(i) for i in range(20000)]
+        terms = self.get_terms(0, options['terms'], vocabulary)
+        added = self.get_terms(options['terms'], options['added'], vocabulary)
+        delta = (added, [])
+
+        # what each worker has in memory and what is stored in ObjectStorage
+        term_stems = self.get_term_stems(terms)
+        term_matcher = TermStemMatcher(term_stems)
+        full_blobs = [pickle.dumps(self.get_term_stems(terms + added)),
+                      pickle.dumps(TermStemMatcher(self.get_term_stems(terms + added)))]
+        delta_blob = pickle.dumps(delta)
+
+        full_time, full_peak = self.measure(
+            lambda: [pickle.loads(blob) for blob in full_blobs])
+
+        def apply_delta():
+            loaded_delta = pickle.loads(delta_blob)
+            patch_term_stems(term_stems, loaded_delta)
+            patch_term_matcher(term_matcher, pickle.loads(delta_blob))
+
+        delta_time, delta_peak = self.measure(apply_delta)
+
+        self.stdout.write('Terms: {0}, added: {1}'.format(options['terms'], options['added']))
+        self.stdout.write('{:>8} {:>12} {:>10} {:>14}'.format(
+            'reload', 'stored, MB', 'time, s', 'peak alloc, MB'))
+        self.stdout.write('{:>8} {:>12.1f} {:>10.3f} {:>14.1f}'.format(
+            'full', sum(len(blob) for blob in full_blobs) / 2 ** 20, full_time,
+            full_peak / 2 ** 20))
+        self.stdout.write('{:>8} {:>12.3f} {:>10.3f} {:>14.3f}'.format(
+            'delta', 2 * len(delta_blob) / 2 ** 20, delta_time, delta_peak / 2 ** 20))
@@ -0,0 +1,91 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# Standard imports
+import threading
+import time
+
+# Django imports
+from django.core.management import BaseCommand
+
+# Project imports
+from apps.common.advancedcelery.db_cache import DbCache
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+class Command(BaseCommand):
+    help = "Measure DbCache.get_term_config() throughput with concurrent reader threads: " \
+           "lock-free snapshot reads vs reads holding DbCache.lock"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads',
+                            dest='threads',
+                            type=int,
+                            default=8,
+                            help='Number of reader threads')
+        parser.add_argument('--reads',
+                            dest='reads',
+                            type=int,
+                            default=100000,
+                            help='Number of reads per thread')
+
+    @staticmethod
+    def read_locked():
+        # how every read worked before: whole lookup under the class lock
+        with DbCache.lock:
+            return DbCache.get_term_config()
+
+    @staticmethod
+    def run_readers(read, threads, reads):
+        def reader():
+            for _ in range(reads):
+                read()
+
+        workers = [threading.Thread(target=reader) for _ in range(threads)]
+        start = time.time()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return threads * reads / (time.time() - start)
+
+    def handle(self, *args, **options):
+        # load the value before measuring
+        DbCache.get_term_config()
+        try:
+            self.stdout.write('{0} threads x {1} reads'.format(options['threads'],
+                                                               options['reads']))
+            self.stdout.write('{:>14} {:>14}'.format('locked/s', 'lock-free/s'))
+            self.stdout.write('{:>14.0f} {:>14.0f}'.format(
+                self.run_readers(self.read_locked, options['threads'], options['reads']),
+                self.run_readers(DbCache.get_term_config, options['threads'],
+                                 options['reads'])))
+        finally:
+            DbCache.INSTANCE.stop_watching()
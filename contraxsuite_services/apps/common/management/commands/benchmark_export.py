@@ -0,0 +1,154 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# Standard imports
+import multiprocessing
+import resource
+import time
+
+# Django imports
+from django.core.management import BaseCommand
+from django.db import connections, transaction
+
+# Project imports
+from apps.common.utils import download, download_stream
+from apps.document.models import Document, TextUnit
+from apps.extract.models import Term, TermUsage
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+BENCHMARK_NAME = 'export benchmark'
+
+# same columns as TermUsageListAPIView export
+EXPORT_FIELDS = ['term__term', 'count', 'pk', 'text_unit__pk',
+                 'text_unit__location_start', 'text_unit__location_end',
+                 'text_unit__document__pk', 'text_unit__document__name',
+                 'text_unit__document__description', 'text_unit__document__document_type']
+
+
+def get_queryset():
+    return TermUsage.objects.filter(text_unit__document__name=BENCHMARK_NAME)
+
+
+def create_term_usages(n_rows, n_terms=1000):
+    """
+    Create n_rows TermUsage objects for a benchmark document.
+    """
+    n_text_units = -(-n_rows // n_terms)
+    with transaction.atomic():
+        document = Document.objects.create(name=BENCHMARK_NAME, description=BENCHMARK_NAME)
+        TextUnit.objects.bulk_create([
+            TextUnit(document=document, unit_type='sentence', language='en',
+                     text='text unit %d' % i, location_start=i * 100, location_end=i * 100 + 99)
+            for i in range(n_text_units)])
+        Term.objects.bulk_create([Term(term='%s %d' % (BENCHMARK_NAME, i), source=BENCHMARK_NAME)
+                                  for i in range(n_terms)])
+    text_unit_ids = list(document.textunit_set.values_list('pk', flat=True))
+    term_ids = list(Term.objects.filter(source=BENCHMARK_NAME).values_list('pk', flat=True))
+    usages = []
+    for n in range(n_rows):
+        usages.append(TermUsage(text_unit_id=text_unit_ids[n // n_terms],
+                                term_id=term_ids[n % n_terms], count=n % 10 + 1))
+        if len(usages) == 10000:
+            TermUsage.objects.bulk_create(usages)
+            usages = []
+    TermUsage.objects.bulk_create(usages)
+
+
+def delete_term_usages():
+    get_queryset().delete()
+    TextUnit.objects.filter(document__name=BENCHMARK_NAME).delete()
+    Document.objects.filter(name=BENCHMARK_NAME).delete()
+    Term.objects.filter(source=BENCHMARK_NAME).delete()
+
+
+def run_export(mode, fmt, queue):
+    start = time.time()
+    if mode == 'stream':
+        response = download_stream(get_queryset().values(*EXPORT_FIELDS).iterator(), fmt,
+                                   columns=EXPORT_FIELDS)
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        response = download(list(get_queryset().values(*EXPORT_FIELDS)), fmt)
+        size = len(response.content)
+    wall_time = time.time() - start
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    queue.put((wall_time, peak_rss_mb, size))
+
+
+def measure(mode, fmt):
+    """
+    Export in a separate process so that its peak RSS is measured alone.
+    """
+    # the child process should open its own db connection
+    connections.close_all()
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=run_export, args=(mode, fmt, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+class Command(BaseCommand):
+    help = "Compare memory use of in-memory and streaming TermUsage export"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows',
+                            dest='rows',
+                            type=int,
+                            default=1000000,
+                            help='Number of TermUsage rows to export')
+        parser.add_argument('--formats',
+                            dest='formats',
+                            default='csv,xlsx',
+                            help='Comma separated export formats')
+        parser.add_argument('--keep',
+                            action='store_true',
+                            dest='keep',
+                            default=False,
+                            help='Keep created benchmark data')
+
+    def handle(self, *args, **options):
+        delete_term_usages()
+        self.stdout.write('Creating %d TermUsage rows...' % options['rows'])
+        create_term_usages(options['rows'])
+        try:
+            self.stdout.write('{:>6} {:>10} {:>10} {:>14} {:>12}'.format(
+                'format', 'mode', 'time, s', 'peak RSS, MB', 'size, MB'))
+            for fmt in options['formats'].split(','):
+                for mode in ('memory', 'stream'):
+                    wall_time, peak_rss_mb, size = measure(mode, fmt)
+                    self.stdout.write('{:>6} {:>10} {:>10.2f} {:>14.1f} {:>12.1f}'.format(
+                        fmt, mode, wall_time, peak_rss_mb, size / 1024 / 1024))
+        finally:
+            if not options['keep']:
+                delete_term_usages()
@@ -0,0 +1,77 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# Standard imports
+import time
+
+# Django imports
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Project imports
+from apps.document.models import Document
+from apps.document.stats import StatsEngine
+from apps.users.models import User
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+class Command(BaseCommand):
+    help = "Measure StatsAPIView latency: computing stats and reading them from cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username',
+                            dest='username',
+                            required=True,
+                            help='User to compute stats for (reviewers get their own scope)')
+        parser.add_argument('--repeat',
+                            dest='repeat',
+                            type=int,
+                            default=5,
+                            help='Number of measurements')
+
+    def measure(self, user):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.time()
+            StatsEngine.get_stats(user)
+            return (time.time() - start) * 1000, len(queries)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError('User "%s" does not exist' % options['username'])
+        self.stdout.write('Documents: %d, reviewer: %s' % (Document.objects.count(),
+                                                           user.is_reviewer))
+        self.stdout.write('{:>8} {:>12} {:>8}'.format('cache', 'latency, ms', 'queries'))
+        for _ in range(options['repeat']):
+            StatsEngine.invalidate()
+            self.stdout.write('{:>8} {:>12.1f} {:>8}'.format('cold', *self.measure(user)))
+            self.stdout.write('{:>8} {:>12.1f} {:>8}'.format('warm', *self.measure(user)))
@@ -30,6 +30,7 @@ import json
 import operator
 import os
 import re
+from collections import OrderedDict
 from functools import reduce
 
 # Third-party imports
@@ -61,7 +62,7 @@ from django.views.generic.list import MultipleObjectMixin
 
 # Project imports
 from apps.common.models import Action
-from apps.common.utils import cap_words, export_qs_to_file, download
+from apps.common.utils import cap_words, export_qs_to_file, download, download_stream
 
 __author__ = "ContraxSuite, LLC; LexPredict, LLC"
 __copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
@@ -649,12 +650,15 @@ class JqListAPIMixin(object):
         queryset = self.filter_queryset(queryset)
         # 2.1 export in xlsx if needed
         if request.GET.get('export_to') in ['csv', 'xlsx', 'pdf']:
+            source_name = self.get_export_file_name() or queryset.model.__name__.lower()
+            fmt = request.GET.get('export_to')
+            # 2.1.1 stream rows from a server-side cursor instead of loading all of them
+            if fmt in ['csv', 'xlsx'] and json.loads(request.GET.get('stream', 'false')) \
+                    and self.can_export_stream():
+                return self.export_stream(queryset, source_name=source_name, fmt=fmt)
             serializer = self.get_serializer(queryset, many=True)
             data = serializer.data
-            return self.export(data,
-                               source_name=self.get_export_file_name() or
-                                           queryset.model.__name__.lower(),
-                               fmt=request.GET.get('export_to'))
+            return self.export(data, source_name=source_name, fmt=fmt)
         # 3. count total records !before queryset paginated
         try:
             total_records = queryset.count()
@@ -690,6 +694,67 @@ class JqListAPIMixin(object):
     def process_export_data(self, data):
         return data
 
+    def can_export_stream(self):
+        """
+        Streamed rows don't pass through process_export_data(), so a view which
+        changes the exported DataFrame should implement process_export_row() too,
+        otherwise it is exported in the regular way.
+        """
+        view_class = type(self)
+        return view_class.process_export_data is JqListAPIMixin.process_export_data \
+            or view_class.process_export_row is not JqListAPIMixin.process_export_row
+
+    def get_export_stream_rows(self, queryset):
+        """
+        Return export columns (None - take them from the first row) and
+        an iterator of row dicts. queryset.iterator() uses a server-side cursor
+        on PostgreSQL, so rows are fetched in chunks rather than all at once.
+        Plain .values() rows are used when the serializer fields are model lookups,
+        they are passed through the serializer fields' to_representation() so
+        they look the same as serialized objects; otherwise each object
+        is serialized separately.
+        """
+        serializer = self.get_serializer()
+        fields = getattr(getattr(serializer, 'Meta', None), 'fields', None)
+        if isinstance(serializer, SimpleRelationSerializer) \
+                and isinstance(fields, (list, tuple)):
+            fields = list(OrderedDict.fromkeys(fields))
+            serializer_fields = serializer.fields
+            if all(self._is_plain_export_field(serializer_fields.get(i)) for i in fields):
+                try:
+                    rows = queryset.values(*fields).iterator()
+                except FieldError:
+                    pass
+                else:
+                    return fields, (self._represent_export_row(serializer_fields, row)
+                                    for row in rows)
+        return None, (self.get_serializer(obj).data for obj in queryset.iterator())
+
+    @staticmethod
+    def _is_plain_export_field(field):
+        # .values() gives a raw column value, which is not what
+        # related/method/nested serializer fields expect
+        return field is not None and not isinstance(
+            field, (serializers.RelatedField, serializers.ManyRelatedField,
+                    serializers.SerializerMethodField, serializers.BaseSerializer))
+
+    @staticmethod
+    def _represent_export_row(serializer_fields, row):
+        return OrderedDict(
+            (k, None if v is None else serializer_fields[k].to_representation(v))
+            for k, v in row.items())
+
+    def process_export_row(self, row):
+        """
+        Streamed export counterpart of process_export_data(), called for each row dict.
+        """
+        return row
+
+    def export_stream(self, queryset, source_name, fmt='csv'):
+        columns, rows = self.get_export_stream_rows(queryset)
+        rows = (self.process_export_row(row) for row in rows)
+        return download_stream(rows, fmt, file_name=source_name, columns=columns)
+
 
 class JqListAPIView(JqListAPIMixin, ListAPIView):
     """
@@ -0,0 +1,133 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# -*- coding: utf-8 -*-
+
+# Standard imports
+from unittest import skipIf
+
+# Third-party imports
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+# Django imports
+from django.test import SimpleTestCase, TestCase
+
+# Project imports
+from apps.common.advancedcelery.db_cache import DbCache, patch_term_matcher
+from apps.common.advancedcelery.redis_cache import Cache
+from apps.task.utils.nlp.term_matcher import TermStemMatcher
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+@skipIf(fakeredis is None, 'fakeredis is not installed')
+class RedisCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        self.redis.flushall()
+        self.cache = Cache(redis_client=self.redis, max_bytes=2500, ttl_seconds=600)
+
+    def test_hits_and_misses(self):
+        self.cache.put('a', 'value')
+        self.assertEqual(self.cache.get('a'), 'value')
+        self.assertEqual(self.cache.get('a'), 'value')
+        self.assertIsNone(self.cache.get('missing'))
+        stats = self.cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['items']), (1, 2, 1))
+
+    def test_lru_eviction_by_size(self):
+        for key in ('a', 'b', 'c'):
+            self.cache.put(key, 'x' * 1000)
+        self.cache.get('a')
+        self.cache.get('b')
+        self.cache.get('a')
+        # 'b' is the least recently used one
+        self.cache.get('c')
+        stats = self.cache.get_stats()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertLessEqual(stats['bytes'], 2500)
+        self.cache.get('a')
+        self.assertEqual(self.cache.get_stats()['hits'], 2)
+
+    def test_ttl(self):
+        cache = Cache(redis_client=self.redis, max_bytes=2500, ttl_seconds=-1)
+        cache.put('a', 'value')
+        cache.get('a')
+        self.assertEqual(cache.get('a'), 'value')
+        stats = cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (0, 2, 1))
+
+    def test_invalidation_by_other_process(self):
+        other_cache = Cache(redis_client=self.redis, max_bytes=2500, ttl_seconds=600)
+        self.cache.put('a', 'old')
+        self.assertEqual(self.cache.get('a'), 'old')
+        other_cache.put('a', 'new')
+        self.assertEqual(self.cache.get('a'), 'new')
+        self.assertEqual(self.cache.get_stats()['invalidations'], 1)
+
+        other_cache.cleanup('a')
+        self.assertIsNone(self.cache.get('a'))
+
+
+class DbCacheTest(TestCase):
+    KEY = 'test_db_cache_key'
+
+    def setUp(self):
+        self.cache = DbCache()
+        self.cache.stop_watching()
+
+    def make_stale(self):
+        record = self.cache.in_memory_cache[self.KEY]
+        self.cache.in_memory_cache = {
+            self.KEY: (record[0] - DbCache.CACHE_IN_MEMORY_STALE_SECONDS - 1,) + record[1:]}
+
+    def test_stale_record_is_refreshed_on_read(self):
+        DbCache.put_to_db(self.KEY, 1)
+        self.assertEqual(self.cache._get(self.KEY), 1)
+        DbCache.put_to_db(self.KEY, 2)
+        # not refreshed by the watcher yet
+        self.assertEqual(self.cache._get(self.KEY), 1)
+        self.make_stale()
+        self.assertEqual(self.cache._get(self.KEY), 2)
+
+    def test_patch_term_matcher_keeps_snapshot(self):
+        term_matcher = TermStemMatcher({' a b ': dict(values=[['a b', 1]], length=1),
+                                        ' c ': dict(values=[['c', 2]], length=1)})
+        text_stems = ['a', 'b', 'c']
+        usages = sorted(term_matcher.get_term_usages(text_stems, text_stems))
+
+        patched = patch_term_matcher(term_matcher, ([(' a b c ', 'a b c', 3)],
+                                                    [(' c ', 'c', 2)]))
+
+        self.assertEqual(sorted(term_matcher.get_term_usages(text_stems, text_stems)), usages)
+        self.assertEqual(sorted(patched.get_term_usages(text_stems, text_stems)),
+                         [['a b', 1, 1], ['a b c', 3, 1]])
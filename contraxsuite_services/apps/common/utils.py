@@ -25,18 +25,24 @@
 # -*- coding: utf-8 -*-
 
 # Standard imports
+import csv
 import datetime
+import decimal
 import importlib
 import io
+import itertools
 import os
 import random
 import re
+import tempfile
 import uuid
+from typing import Dict, Iterable, List
 
 # Third-party imports
 import django_excel as excel
 import pandas as pd
 import pdfkit as pdf
+import xlsxwriter
 from allauth.account.models import EmailAddress
 from jinja2 import Environment, FileSystemLoader, PackageLoader
 from weasyprint import HTML
@@ -45,7 +51,7 @@ from weasyprint import HTML
 from django.conf import settings
 from django.conf.urls import url
 from django.core.urlresolvers import reverse
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils.text import slugify
 from django.utils import numberformat
 
@@ -301,6 +307,110 @@ def download(data: [list, pd.DataFrame], fmt='csv', file_name='output'):
         return download_csv(data, file_name=file_name)
 
 
+def _peek_columns(rows: Iterable[Dict], columns: List = None):
+    """
+    Take column names from the first row if they are not given.
+    Return columns and rows (with the first row put back).
+    """
+    rows = iter(rows)
+    if columns is not None:
+        return list(columns), rows
+    first_row = next(rows, None)
+    if first_row is None:
+        return [], rows
+    return list(first_row.keys()), itertools.chain([first_row], rows)
+
+
+def iter_csv(rows: Iterable[Dict], columns: List, chunk_rows: int = None):
+    """
+    Render dict rows as csv text chunks of chunk_rows lines each.
+    """
+    chunk_rows = chunk_rows or settings.EXPORT_STREAM_CHUNK_ROWS
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for n, row in enumerate(rows, start=1):
+        writer.writerow([row.get(column) for column in columns])
+        if n % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _xlsx_cell_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (bool, int, float, decimal.Decimal)):
+        return value
+    # datetimes with tz, dicts, etc. are written as text like in download()
+    return str(value)
+
+
+def write_xlsx(rows: Iterable[Dict], columns: List, file_path: str, sheet_name='doc'):
+    """
+    Write dict rows to xlsx file row by row.
+    xlsxwriter's constant_memory mode flushes each row to disk,
+    so memory use does not depend on the number of rows.
+    """
+    workbook = xlsxwriter.Workbook(file_path, {'constant_memory': True})
+    try:
+        worksheet = workbook.add_worksheet(sheet_name)
+        worksheet.write_row(0, 0, columns)
+        for n, row in enumerate(rows, start=1):
+            worksheet.write_row(n, 0, [_xlsx_cell_value(row.get(column)) for column in columns])
+    finally:
+        workbook.close()
+
+
+def iter_file(file, chunk_size=64 * 1024):
+    with file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def download_csv_stream(rows: Iterable[Dict], file_name='output', columns: List = None):
+    columns, rows = _peek_columns(rows, columns)
+    response = StreamingHttpResponse(iter_csv(rows, columns), content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="{}.{}"'.format(file_name, 'csv')
+    return response
+
+
+def download_xls_stream(rows: Iterable[Dict], file_name='output', sheet_name='doc',
+                        columns: List = None):
+    # xlsx is a zip archive, so it can be sent only after it is completely written;
+    # it is built in a temp file instead of memory
+    columns, rows = _peek_columns(rows, columns)
+    file_descriptor, file_path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(file_descriptor)
+    try:
+        write_xlsx(rows, columns, file_path, sheet_name=sheet_name)
+        file = open(file_path, 'rb')
+    finally:
+        # the opened file stays readable after removing
+        os.remove(file_path)
+    file_size = os.fstat(file.fileno()).st_size
+    response = StreamingHttpResponse(
+        iter_file(file),
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    response['Content-Disposition'] = 'attachment; filename="{}.{}"'.format(file_name, 'xlsx')
+    response['Content-Length'] = file_size
+    return response
+
+
+def download_stream(rows: Iterable[Dict], fmt='csv', file_name='output', columns: List = None):
+    """
+    Export dict rows (e.g. queryset.values().iterator()) without building
+    a DataFrame / in-memory buffer.
+    """
+    if fmt == 'xlsx':
+        return download_xls_stream(rows, file_name=file_name, columns=columns)
+    return download_csv_stream(rows, file_name=file_name, columns=columns)
+
+
 def get_test_user():
     test_user, created = User.objects.update_or_create(
         username='test_user',
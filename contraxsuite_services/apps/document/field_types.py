@@ -930,9 +930,8 @@ class GeographyField(FieldType):
                 text_unit__text__contains=text).values('entity_id', 'entity__name')
 
         if not geo_entities:
-            from apps.task.tasks import CACHE_KEY_GEO_CONFIG
             from apps.common.advancedcelery.db_cache import DbCache
-            geo_config = DbCache.get(CACHE_KEY_GEO_CONFIG)
+            geo_config = DbCache.get_geo_matcher().get_candidates(text)
 
             text_languages = None
             if document:
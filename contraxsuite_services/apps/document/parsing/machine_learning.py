@@ -126,6 +126,19 @@ class SkLearnClassifierModel:
             res.add(target_name)
         return list(res)
 
+    def detect_category_names_for_sentences(self, sentences: List[str]) -> List[str]:
+        """
+        Predict category name of each sentence.
+        All sentences are vectorized and classified with one pipeline call
+        which is much faster than calling the model sentence by sentence.
+        :param sentences: list of sentences
+        :return: list of category names in the same order as sentences
+        """
+        if not sentences:
+            return []
+        return [self.target_names[target_index]
+                for target_index in self.sklearn_model.predict(sentences)]
+
     def detect_category_names_to_spans(self, text: str, field: str = None) \
             -> Dict[str, List[Tuple[int, int, str]]]:
         if self.sklearn_model is None:
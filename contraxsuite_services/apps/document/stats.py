@@ -0,0 +1,356 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# -*- coding: utf-8 -*-
+
+# Standard imports
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict
+
+# Django imports
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Exists, OuterRef, QuerySet, signals
+
+# Project imports
+from apps.analyze.models import (
+    DocumentCluster, TextUnitClassification, TextUnitClassifierSuggestion, TextUnitCluster)
+from apps.document.models import (
+    Document, DocumentNote, DocumentProperty, DocumentRelation, DocumentTag,
+    TextUnit, TextUnitNote, TextUnitProperty, TextUnitTag)
+from apps.extract.models import (
+    AmountUsage, CitationUsage, CopyrightUsage, Court, CourtUsage, CurrencyUsage,
+    DateDurationUsage, DateUsage, DefinitionUsage, DistanceUsage, GeoAlias, GeoAliasUsage,
+    GeoEntity, GeoEntityUsage, GeoRelation, Party, PartyUsage, PercentUsage, RatioUsage,
+    RegulationUsage, Term, TermUsage, TrademarkUsage, UrlUsage)
+from apps.project.models import Project, TaskQueue
+from apps.task.models import Task
+from apps.users.models import User
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+def count_querysets(querysets: Dict[str, QuerySet]) -> Dict[str, int]:
+    """
+    Count rows of several querysets in one database round trip:
+    SELECT (SELECT COUNT(*) FROM (<qs1>) s0) AS name1, (SELECT COUNT(*) ...) AS name2, ...
+    Distinct querysets are counted by distinct rows, the same way as qs.count() does it.
+    """
+    if not querysets:
+        return {}
+    selects = []
+    params = []
+    for n, (name, qs) in enumerate(querysets.items()):
+        qs_sql, qs_params = qs.order_by().values('pk').query.sql_with_params()
+        selects.append('(SELECT COUNT(*) FROM ({}) s{}) AS {}'.format(
+            qs_sql, n, connection.ops.quote_name(name)))
+        params.extend(qs_params)
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT ' + ', '.join(selects), params)
+        row = cursor.fetchone()
+    return dict(zip(querysets.keys(), row))
+
+
+def _progress(completed, total):
+    return 0 if not total else round(completed / total * 100, 2)
+
+
+def _progress_summary(progress_list):
+    """
+    Return (total count, completed count, completed weight, average progress)
+    for a list of (progress, documents count) values.
+    """
+    total_count = len(progress_list)
+    completed_count = sum(1 for progress, _ in progress_list if progress == 100)
+    return (total_count,
+            completed_count,
+            round(completed_count / total_count * 100, 1),
+            round(sum(progress for progress, _ in progress_list) / total_count, 1))
+
+
+class StatsEngine:
+    """
+    Computes the counters shown by StatsAPIView.
+
+    All row counters are fetched with one query, task queue / project progress and
+    admin task statuses - with several grouped queries instead of per object queries.
+    Results are cached in process memory per scope (all data or a reviewer's data)
+    for STATS_CACHE_TTL_SECONDS. Saving / deleting objects edited from the UI
+    invalidates the cache of the current process; changes made in other processes
+    (e.g. by Celery tasks or bulk_create) are visible after the TTL expires.
+    """
+
+    lock = threading.RLock()
+
+    # scope -> (computed timestamp, data)
+    cache = {}
+
+    @classmethod
+    def get_scope(cls, user):
+        return user.pk if user.is_reviewer else None
+
+    @classmethod
+    def get_stats(cls, user) -> Dict:
+        scope = cls.get_scope(user)
+        with cls.lock:
+            record = cls.cache.get(scope)
+        if record and time.time() - record[0] < settings.STATS_CACHE_TTL_SECONDS:
+            return record[1]
+        data = cls.compute(user)
+        with cls.lock:
+            cls.cache[scope] = (time.time(), data)
+        return data
+
+    @classmethod
+    def invalidate(cls, *args, **kwargs):
+        with cls.lock:
+            cls.cache.clear()
+
+    @classmethod
+    def compute(cls, user) -> Dict:
+        data = count_querysets(cls.get_count_querysets(user))
+        data.update(cls.get_project_stats(user))
+        data.update(cls.get_task_queue_stats(user))
+        data.update(cls.get_admin_task_stats())
+        return data
+
+    @staticmethod
+    def get_count_querysets(user) -> Dict[str, QuerySet]:
+        querysets = OrderedDict([
+            ('document_count', Document.objects.all()),
+            ('document_property_count', DocumentProperty.objects.all()),
+            ('document_tag_count', DocumentTag.objects.all()),
+            ('document_note_count', DocumentNote.objects.all()),
+            ('document_relation_count', DocumentRelation.objects.all()),
+            ('document_cluster_count', DocumentCluster.objects.all()),
+            ('text_unit_count', TextUnit.objects.all()),
+            ('text_unit_tag_count', TextUnitTag.objects.all()),
+            ('text_unit_property_count', TextUnitProperty.objects.all()),
+            ('text_unit_classification_count', TextUnitClassification.objects.all()),
+            ('text_unit_classification_suggestion_count',
+             TextUnitClassifierSuggestion.objects.all()),
+            ('text_unit_classification_suggestion_type_count',
+             TextUnitClassifierSuggestion.objects.distinct('class_name')),
+            ('text_unit_note_count', TextUnitNote.objects.all()),
+            ('text_unit_cluster_count', TextUnitCluster.objects.all()),
+            ('amount_usage_count', AmountUsage.objects.all()),
+            ('citation_usage_count', CitationUsage.objects.all()),
+            ('copyright_usage_count', CopyrightUsage.objects.all()),
+            ('court_count', Court.objects.all()),
+            ('court_usage_count', CourtUsage.objects.all()),
+            ('currency_usage_count', CurrencyUsage.objects.all()),
+            ('date_duration_usage_count', DateDurationUsage.objects.all()),
+            ('date_usage_count', DateUsage.objects.all()),
+            ('definition_usage_count', DefinitionUsage.objects.all()),
+            ('distance_usage_count', DistanceUsage.objects.all()),
+            ('geo_alias_count', GeoAlias.objects.all()),
+            ('geo_alias_usage_count', GeoAliasUsage.objects.all()),
+            ('geo_entity_count', GeoEntity.objects.all()),
+            ('geo_entity_usage_count', GeoEntityUsage.objects.all()),
+            ('geo_relation_count', GeoRelation.objects.all()),
+            ('party_count', Party.objects.all()),
+            ('party_usage_count', PartyUsage.objects.all()),
+            ('percent_usage_count', PercentUsage.objects.all()),
+            ('ratio_usage_count', RatioUsage.objects.all()),
+            ('regulation_usage_count', RegulationUsage.objects.all()),
+            ('trademark_usage_count', TrademarkUsage.objects.all()),
+            ('url_usage_count', UrlUsage.objects.all()),
+            ('term_count', Term.objects.all()),
+            ('term_usage_count', TermUsage.objects.all()),
+            ('project_documents_unique_count',
+             Document.objects.filter(taskqueue__project__isnull=False).distinct()),
+            ('task_queue_documents_unique_count',
+             Document.objects.filter(taskqueue__isnull=False).distinct()),
+            ('task_queue_reviewers_unique_count',
+             User.objects.filter(taskqueue__isnull=False).distinct()),
+        ])
+
+        if user.is_reviewer:
+            document_filter_opts = dict(document__taskqueue__reviewers=user)
+            tu_filter_opts = dict(text_unit__document__taskqueue__reviewers=user)
+            filters = {
+                'document_count': dict(taskqueue__reviewers=user),
+                'document_property_count': document_filter_opts,
+                'document_tag_count': document_filter_opts,
+                'document_note_count': document_filter_opts,
+                'document_relation_count': dict(
+                    document_a__taskqueue__reviewers=user,
+                    document_b__taskqueue__reviewers=user),
+                'document_cluster_count': dict(documents__taskqueue__reviewers=user),
+                'text_unit_count': document_filter_opts,
+                'text_unit_cluster_count': dict(
+                    text_units__document__taskqueue__reviewers=user),
+                'term_count': dict(termusage__text_unit__document__taskqueue__reviewers=user),
+                'geo_alias_count': dict(
+                    geoaliasusage__text_unit__document__taskqueue__reviewers=user),
+                'geo_entity_count': dict(
+                    geoentityusage__text_unit__document__taskqueue__reviewers=user),
+                'geo_relation_count': dict(
+                    entity_a__geoentityusage__text_unit__document__taskqueue__reviewers=user,
+                    entity_b__geoentityusage__text_unit__document__taskqueue__reviewers=user),
+                'party_count': dict(
+                    partyusage__text_unit__document__taskqueue__reviewers=user),
+            }
+            for name in ('text_unit_tag_count', 'text_unit_property_count',
+                         'text_unit_classification_count',
+                         'text_unit_classification_suggestion_count',
+                         'text_unit_note_count', 'term_usage_count',
+                         'amount_usage_count', 'citation_usage_count',
+                         'copyright_usage_count', 'court_usage_count',
+                         'currency_usage_count', 'date_duration_usage_count',
+                         'date_usage_count', 'definition_usage_count',
+                         'distance_usage_count', 'geo_alias_usage_count',
+                         'geo_entity_usage_count', 'party_usage_count',
+                         'percent_usage_count', 'ratio_usage_count',
+                         'regulation_usage_count', 'trademark_usage_count',
+                         'url_usage_count'):
+                filters[name] = tu_filter_opts
+            for name, filter_opts in filters.items():
+                querysets[name] = querysets[name].filter(**filter_opts).distinct()
+            querysets['text_unit_classification_suggestion_type_count'] = \
+                TextUnitClassifierSuggestion.objects.filter(**tu_filter_opts).distinct('class_name')
+
+        return querysets
+
+    @staticmethod
+    def get_task_queue_document_counts():
+        """
+        Return dicts {task queue id: count} of:
+            - documents
+            - completed documents
+            - completed documents which are still in the task queue
+        """
+        documents_through = TaskQueue.documents.through
+        completed_through = TaskQueue.completed_documents.through
+
+        def counts(qs):
+            return dict(qs.order_by().values('taskqueue')
+                        .annotate(c=Count('document', distinct=True))
+                        .values_list('taskqueue', 'c'))
+
+        documents = counts(documents_through.objects.all())
+        completed = counts(completed_through.objects.all())
+        completed_in_queue = counts(
+            completed_through.objects.annotate(in_queue=Exists(documents_through.objects.filter(
+                taskqueue=OuterRef('taskqueue'), document=OuterRef('document'))))
+            .filter(in_queue=True))
+        return documents, completed, completed_in_queue
+
+    @classmethod
+    def get_task_queue_stats(cls, user) -> Dict:
+        """
+        Same as TaskQueue.progress() for each task queue visible for user, summarized.
+        """
+        task_queues = TaskQueue.objects.all()
+        # the same task queues as TaskQueueViewSet lists for user
+        if user.is_reviewer:
+            task_queues = task_queues.filter(reviewers=user)
+        task_queue_ids = list(task_queues.values_list('pk', flat=True))
+        if not task_queue_ids:
+            return dict(task_queue_total_count=0,
+                        task_queue_completed_count=0,
+                        task_queue_completed_weight=0,
+                        task_queue_progress_avg=0,
+                        task_queue_documents_total_count=0,
+                        task_queue_documents_unique_count=0,
+                        task_queue_reviewers_unique_count=0)
+        documents, _, completed_in_queue = cls.get_task_queue_document_counts()
+        progress_list = [(_progress(completed_in_queue.get(pk, 0), documents.get(pk, 0)),
+                          documents.get(pk, 0))
+                         for pk in task_queue_ids]
+        total_count, completed_count, completed_weight, progress_avg = \
+            _progress_summary(progress_list)
+        return dict(task_queue_total_count=total_count,
+                    task_queue_completed_count=completed_count,
+                    task_queue_completed_weight=completed_weight,
+                    task_queue_progress_avg=progress_avg,
+                    task_queue_documents_total_count=sum(i for _, i in progress_list))
+
+    @classmethod
+    def get_project_stats(cls, user) -> Dict:
+        """
+        Same as Project.progress() for each project visible for user, summarized.
+        """
+        projects = Project.objects.all()
+        # the same projects as ProjectViewSet lists for user, see ProjectPermissionViewMixin
+        if user.is_reviewer:
+            projects = projects.filter(reviewers=user)
+        project_ids = list(projects.values_list('pk', flat=True))
+        if not project_ids:
+            return dict(project_total_count=0,
+                        project_completed_count=0,
+                        project_completed_weight=0,
+                        project_progress_avg=0,
+                        project_documents_total_count=0,
+                        project_documents_unique_count=0)
+        documents, completed, _ = cls.get_task_queue_document_counts()
+        project_task_queues = defaultdict(list)
+        for project_id, task_queue_id in Project.task_queues.through.objects \
+                .filter(project__in=project_ids).values_list('project', 'taskqueue'):
+            project_task_queues[project_id].append(task_queue_id)
+        progress_list = []
+        for pk in project_ids:
+            total_docs = sum(documents.get(i, 0) for i in project_task_queues[pk])
+            completed_docs = sum(completed.get(i, 0) for i in project_task_queues[pk])
+            progress_list.append((_progress(completed_docs, total_docs), total_docs))
+        total_count, completed_count, completed_weight, progress_avg = \
+            _progress_summary(progress_list)
+        return dict(project_total_count=total_count,
+                    project_completed_count=completed_count,
+                    project_completed_weight=completed_weight,
+                    project_progress_avg=progress_avg,
+                    project_documents_total_count=sum(i for _, i in progress_list))
+
+    @staticmethod
+    def get_admin_task_stats() -> Dict:
+        by_status = dict(Task.objects.order_by().values('status')
+                         .annotate(c=Count('pk')).values_list('status', 'c'))
+        return dict(admin_task_total_count=sum(by_status.values()),
+                    admin_task_by_status_count=by_status or 0)
+
+
+# objects which are usually created / changed from UI
+STATS_INVALIDATING_MODELS = (
+    Document, DocumentNote, DocumentTag, DocumentRelation, DocumentProperty,
+    TextUnitNote, TextUnitTag, TextUnitProperty, TextUnitClassification,
+    Project, TaskQueue)
+
+for model in STATS_INVALIDATING_MODELS:
+    signals.post_save.connect(StatsEngine.invalidate, sender=model,
+                              dispatch_uid='stats_post_save_%s' % model.__name__)
+    signals.post_delete.connect(StatsEngine.invalidate, sender=model,
+                                dispatch_uid='stats_post_delete_%s' % model.__name__)
+
+for through_model in (TaskQueue.documents.through, TaskQueue.completed_documents.through,
+                      TaskQueue.reviewers.through, Project.task_queues.through,
+                      Project.reviewers.through):
+    signals.m2m_changed.connect(StatsEngine.invalidate, sender=through_model,
+                                dispatch_uid='stats_m2m_changed_%s' % through_model.__name__)
@@ -251,6 +251,13 @@ class DetectFieldValues(BaseTask):
         target_name = sklearn_model.target_names[target_index]
         return parse_category(target_name)
 
+    @classmethod
+    def predict_values(cls, sklearn_model: SkLearnClassifierModel, text_units: List[TextUnit]) \
+            -> List[Tuple[Union[str, None], Union[str, None], Union[str, None]]]:
+        target_names = sklearn_model.detect_category_names_for_sentences(
+            [text_unit.text for text_unit in text_units])
+        return [parse_category(target_name) for target_name in target_names]
+
     @classmethod
     def extract_value(cls, field_type_adapter: FieldType, document: Document, field: DocumentField, hint_name: str,
                       text_unit: TextUnit) -> Tuple[Any, Optional[str]]:
@@ -259,17 +266,6 @@ class DetectFieldValues(BaseTask):
             return field_type_adapter.get_or_extract_value(document, field, None, hint_name, text_unit.text)
         return None, None
 
-    @classmethod
-    def predict_and_extract_value(cls, sklearn_model: SkLearnClassifierModel,
-                                  field_type_adapter: FieldType,
-                                  document: Document,
-                                  field: DocumentField,
-                                  text_unit: TextUnit) -> Tuple[Any, Any]:
-        field_uid, value, hint_name = cls.predict_value(sklearn_model, text_unit)
-        if field_uid is not None:
-            return cls.extract_value(field_type_adapter, document, field, hint_name, text_unit)
-        return None, None
-
     @staticmethod
     def detect_field_values_with_model(classifier_model,
                                        document: Document,
@@ -280,12 +276,15 @@ class DetectFieldValues(BaseTask):
         field_type_adapter = FIELD_TYPES_REGISTRY[field.type]
 
         detected_values = list()  # type: List[DetectedFieldValue]
-        for text_unit in sentence_text_units:
-            value, hint_name = DetectFieldValues.predict_and_extract_value(sklearn_model=sklearn_model,
-                                                                           field_type_adapter=field_type_adapter,
-                                                                           document=document,
-                                                                           field=field,
-                                                                           text_unit=text_unit)
+        predicted = DetectFieldValues.predict_values(sklearn_model, sentence_text_units)
+        for text_unit, (field_uid, _value, hint_name) in zip(sentence_text_units, predicted):
+            if field_uid is None:
+                continue
+            value, hint_name = DetectFieldValues.extract_value(field_type_adapter=field_type_adapter,
+                                                               document=document,
+                                                               field=field,
+                                                               hint_name=hint_name,
+                                                               text_unit=text_unit)
             if value is None:
                 continue
             detected_values.append(DetectedFieldValue(text_unit, value, hint_name))
@@ -749,14 +748,14 @@ class TrainDocumentField(BaseTask):
         task.log_info(
             'Testing field detector model for document #{0}, field {1}...'.format(test_document_id, field.code))
 
-        for text_unit in TextUnit.objects.filter(document_id=test_document_id, unit_type="sentence"):
+        text_units = list(TextUnit.objects.filter(document_id=test_document_id, unit_type="sentence"))
+        predicted = DetectFieldValues.predict_values(sklearn_model, text_units)
+        for text_unit, (field_uid, value, hint_name) in zip(text_units, predicted):
             value_found = not (field_type_adapter.multi_value or field.is_choice_field()) \
                           and len(text_unit_with_value_ids) > 0
             if not value_found:
                 sentences_number += 1
 
-            field_uid, value, hint_name = DetectFieldValues.predict_value(sklearn_model=sklearn_model,
-                                                                          text_unit=text_unit)
             if field_uid is not None:
                 if field_type_adapter.value_extracting:
                     value, hint_name = DetectFieldValues.extract_value(field_type_adapter=field_type_adapter,
@@ -23,6 +23,15 @@
     or shipping ContraxSuite within a closed source product.
 """
 # -*- coding: utf-8 -*-
+
+# Django imports
+from django.test import TestCase
+
+# Project imports
+from apps.document.stats import StatsEngine
+from apps.project.models import Project
+from apps.users.models import Role, User
+
 __author__ = "ContraxSuite, LLC; LexPredict, LLC"
 __copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
 __license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
@@ -31,5 +40,22 @@ __maintainer__ = "LexPredict, LLC"
 __email__ = "support@contraxsuite.com"
 
 
-# from django.test import TestCase
 # TODO: Public english unit tests
+
+
+class StatsEngineTest(TestCase):
+    def setUp(self):
+        manager_role = Role.objects.create(name='Manager', code='manager', order=1,
+                                           is_manager=True)
+        reviewer_role = Role.objects.create(name='Reviewer', code='reviewer', order=2)
+        self.manager = User.objects.create(username='stats_manager', role=manager_role)
+        self.reviewer = User.objects.create(username='stats_reviewer', role=reviewer_role)
+        Project.objects.create(name='Reviewed').reviewers.add(self.reviewer)
+        Project.objects.create(name='Other')
+        StatsEngine.invalidate()
+
+    def test_project_counts_follow_project_list_visibility(self):
+        # StatsAPIView used to summarize ProjectViewSet.list(), which shows reviewers
+        # only the projects they review
+        self.assertEqual(StatsEngine.get_project_stats(self.manager)['project_total_count'], 2)
+        self.assertEqual(StatsEngine.get_project_stats(self.reviewer)['project_total_count'], 1)
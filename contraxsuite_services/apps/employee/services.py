@@ -28,6 +28,8 @@ import os
 import pickle
 import regex as re
 import string
+import threading
+from functools import lru_cache
 
 # from lexnlp.extract.en.money import get_money
 from lexnlp.extract.en.definitions import get_definitions
@@ -64,6 +66,13 @@ benefits_negative_words = ["termin"]
 severance_positive_words = ["sever"]
 severance_negative_words = []
 
+W2V_MODEL_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                               'data/w2v_cbow_employment_size200_window10'))
+
+# process-wide W2V model, see get_w2v_model()
+_w2v_model = None
+_w2v_model_lock = threading.Lock()
+
 
 def clean(text):
     return text.lower().strip(string.punctuation).replace(" ", "").replace(",", "")
@@ -258,6 +267,31 @@ def get_effective_date(text, return_source=False):
         return effective_date
 
 
+def get_w2v_model():
+    """
+    Load Employment Agreement W2V model once per process.
+    Large arrays saved separately from the model are memory-mapped read-only,
+    so forked Celery workers share their pages instead of copying them.
+    """
+    global _w2v_model
+    if _w2v_model is None:
+        with _w2v_model_lock:
+            if _w2v_model is None:
+                _w2v_model = gensim.models.word2vec.Word2Vec.load(W2V_MODEL_PATH, mmap='r')
+    return _w2v_model
+
+
+@lru_cache(maxsize=256)
+def get_w2v_most_similar(positives: tuple, negatives: tuple) -> dict:
+    """
+    Get {word: similarity} of W2V terms most similar to given ones.
+    Results are memoized per process - the model never changes at runtime.
+    Do not modify the returned dict.
+    """
+    return dict(get_w2v_model().wv.most_similar(positive=list(positives),
+                                                negative=list(negatives)))
+
+
 def get_similar_to_terms_employee(text, positives, negatives):
     """
     Use Employment Agreement W2V to get terms similar
@@ -266,7 +300,6 @@ def get_similar_to_terms_employee(text, positives, negatives):
     stems = get_stems(text)
     positive_found = False
     negative_found = False
-    dir_path = os.path.dirname(os.path.realpath(__file__))
 
     for p in positives:
         if p in stems:
@@ -278,12 +311,7 @@ def get_similar_to_terms_employee(text, positives, negatives):
     if positive_found and not negative_found:
         return 1
 
-    w2v_model = gensim.models.word2vec.Word2Vec.load(
-        os.path.normpath(os.path.join(dir_path, "data/w2v_cbow_employment_size200_window10")))
-    trained_similar_words = w2v_model.wv.most_similar(positive=positives,
-                                                      negative=negatives)
-
-    trained_similar_words = dict(trained_similar_words)
+    trained_similar_words = get_w2v_most_similar(tuple(positives), tuple(negatives))
 
     sum_similarity = 0
     num_similars = 0
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from apps.common.advancedcelery.db_cache import DbCache
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('extract', '0038_cache_locate_configs'),
+    ]
+
+    operations = [
+        migrations.RunPython(DbCache.cache_term_stems),
+    ]
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from apps.common.advancedcelery.db_cache import DbCache
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('extract', '0039_cache_term_stems_matcher'),
+    ]
+
+    operations = [
+        migrations.RunPython(DbCache.cache_court_config),
+        migrations.RunPython(DbCache.cache_geo_config),
+    ]
@@ -658,7 +658,7 @@ class UploadSessionSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = UploadSession
-        fields = ['uid', 'project', 'created_by']
+        fields = ['uid', 'project', 'created_by', 'skip_sentiment']
 
 
 class UploadSessionDetailSerializer(serializers.ModelSerializer):
@@ -670,7 +670,7 @@ class UploadSessionDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = UploadSession
         fields = ['uid', 'project', 'created_by', 'created_date',
-                  'document_type', 'progress']
+                  'document_type', 'skip_sentiment', 'progress']
 
     def get_progress(self, obj):
         return obj.document_tasks_progress(details=True)
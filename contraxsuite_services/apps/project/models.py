@@ -410,6 +410,9 @@ class UploadSession(models.Model):
     notified_upload_started = models.BooleanField(default=False, db_index=True)
     notified_upload_completed = models.BooleanField(default=False, db_index=True)
 
+    # do not score sentiment of the session documents, see ScoreSentiment task
+    skip_sentiment = models.BooleanField(default=False)
+
     class Meta(object):
         ordering = ['project_id', 'created_date']
 
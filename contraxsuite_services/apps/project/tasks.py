@@ -260,7 +260,7 @@ class ReassignProjectClusterDocuments(BaseTask):
             'new_project_id': new_project_id,
             'cluster_ids': cluster_ids,
         }
-        task_model.save()
+        task_model.save(update_fields=['metadata'])
 
         reassigning = {
             'date': now().isoformat(),
@@ -328,7 +328,7 @@ class CleanProject(BaseTask):
             'task_name': 'clean-project',
             '_project_id': project_id  # added "_" to avoid detecting task as project task
         }
-        task_model.save()
+        task_model.save(update_fields=['metadata'])
 
 
 @app.task(name='advanced_celery.track_session_completed', bind=True)
@@ -145,6 +145,8 @@ class LoadDocumentsAPIView(APIView, LoadDocumentsView):
         - source_path: str
         - source_type: str
         - document_type: str
+        - detect_tables: bool
+        - skip_sentiment: bool
         - delete: bool
     """
     http_method_names = ["get", "post"]
@@ -228,6 +230,9 @@ class NewClassifierClassifyAPIView(APIView, CreateClassifierClassifyView):
 class UpdateElasticsearchIndexAPIView(APIView, UpdateElasticsearchIndexView):
     """
     "Update ElasticSearch Index" admin task\n
+    POST params:
+        - incremental: bool
+        - chunk_size: int
     """
     http_method_names = ["get", "post"]
 
@@ -257,6 +262,7 @@ class SimilarityAPIView(APIView, SimilarityView):
         - search_similar_text_units: bool
         - similarity_threshold: int
         - use_idf: bool
+        - engine: str ("exact" or "lsh")
         - delete: bool
     """
     http_method_names = ["get", "post"]
@@ -204,10 +204,12 @@ class TaskManager(models.Manager):
     @transaction_retry(max_retries=2)
     def update_progress(self,
                         task_id,
-                        progress: int):
-        task = self.get(id=task_id)
+                        progress: int,
+                        is_sub_task: bool = None):
+        if is_sub_task is None:
+            is_sub_task = self.get(id=task_id).is_sub_task()
 
-        if task.is_sub_task():
+        if is_sub_task:
             self.filter(id=task_id).update(own_progress=progress, progress=progress)
         else:
             self.filter(id=task_id).update(own_progress=progress)
@@ -215,10 +217,12 @@ class TaskManager(models.Manager):
     @transaction_retry(max_retries=2)
     def increase_progress(self,
                           task_id,
-                          progress_increase: int):
-        task = self.get(id=task_id)
+                          progress_increase: int,
+                          is_sub_task: bool = None):
+        if is_sub_task is None:
+            is_sub_task = self.get(id=task_id).is_sub_task()
 
-        if task.is_sub_task():  # this is a sub-task
+        if is_sub_task:  # this is a sub-task
             self.filter(id=task_id).update(
                 own_progress=F('own_progress') + progress_increase,
                 progress=F('progress') + progress_increase)
@@ -71,6 +71,8 @@ class LoadDocumentsForm(forms.Form):
         required=False)
     document_type = forms.ModelChoiceField(queryset=DocumentType.objects.all(), required=False)
     detect_contract = checkbox_field("Detect if a document is contract", initial=True)
+    detect_tables = checkbox_field("Detect tables in PDF documents")
+    skip_sentiment = checkbox_field("Do not score sentiment of Documents and Text Units")
     delete = checkbox_field("Delete existing Documents")
     run_standard_locators = checkbox_field("Run Standard Locators", initial=False)
 
@@ -540,6 +542,12 @@ class SimilarityForm(forms.Form):
         help_text=_("Min. Similarity Value 50-100%")
     )
     use_idf = checkbox_field("Use TF-IDF to normalize data")
+    engine = forms.ChoiceField(
+        choices=[('exact', 'Exact - compare all pairs'),
+                 ('lsh', 'LSH - compare candidate pairs only (faster, approximate)')],
+        required=False,
+        initial='exact',
+        help_text=_("LSH finds most similar pairs without comparing every pair."))
     delete = checkbox_field("Delete existing Similarity objects.", initial=True)
 
 
@@ -563,6 +571,13 @@ class PartySimilarityForm(forms.Form):
 class UpdateElasticSearchForm(forms.Form):
     header = 'The update index command will freshen all of the content ' \
              'in Elasticsearch index. Use it after loading new documents.'
+    incremental = checkbox_field(
+        "Index only Text Units added since the last index update")
+    chunk_size = forms.IntegerField(
+        min_value=1,
+        initial=settings.ELASTICSEARCH_INDEX_CHUNK_SIZE,
+        required=False,
+        help_text='Number of Text Units sent to Elasticsearch in one bulk request.')
 
 
 class TotalCleanupForm(forms.Form):
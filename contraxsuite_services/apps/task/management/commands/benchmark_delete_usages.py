@@ -0,0 +1,118 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# -*- coding: utf-8 -*-
+
+# Standard imports
+import time
+
+# Django imports
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+
+# Project imports
+from apps.document.models import Document, TextUnit
+from apps.extract.models import Term, TermUsage
+from apps.task.utils.usage_writer import delete_usages, truncate_usages
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+class Command(BaseCommand):
+    help = "Measure deletion of TermUsage rows of re-located documents: QuerySet.delete() " \
+           "vs set-based DELETE ... USING vs TRUNCATE. Changes are rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents',
+                            dest='documents',
+                            type=int,
+                            default=100,
+                            help='Number of documents')
+        parser.add_argument('--units-per-document',
+                            dest='units_per_document',
+                            type=int,
+                            default=1000,
+                            help='Number of text units in each document')
+        parser.add_argument('--usages-per-unit',
+                            dest='usages_per_unit',
+                            type=int,
+                            default=10,
+                            help='Number of term usages in each text unit')
+
+    def create_usages(self, documents, units_per_document, usages_per_unit):
+        document_ids = [Document.objects.create(name='benchmark_{0}.txt'.format(i)).pk
+                        for i in range(documents)]
+        TextUnit.objects.bulk_create(
+            [TextUnit(document_id=document_id, text='benchmark', unit_type='paragraph')
+             for document_id in document_ids for _ in range(units_per_document)],
+            batch_size=10000)
+        term = Term.objects.create(term='benchmark')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO {0} (text_unit_id, term_id, count) '
+                'SELECT tu.id, %s, 1 FROM {1} tu, generate_series(1, %s) '
+                'WHERE tu.document_id = ANY(%s)'.format(TermUsage._meta.db_table,
+                                                        TextUnit._meta.db_table),
+                [term.pk, usages_per_unit, document_ids])
+            cursor.execute('ANALYZE {0}'.format(TermUsage._meta.db_table))
+        return document_ids
+
+    @staticmethod
+    def measure(func):
+        sid = transaction.savepoint()
+        start = time.time()
+        deleted = func()
+        elapsed = time.time() - start
+        transaction.savepoint_rollback(sid)
+        return deleted, elapsed
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            document_ids = self.create_usages(options['documents'],
+                                              options['units_per_document'],
+                                              options['usages_per_unit'])
+            total = TermUsage.objects.count()
+            self.stdout.write('{0} TermUsage rows, {1} in the benchmark documents'.format(
+                total, len(document_ids) * options['units_per_document'] *
+                options['usages_per_unit']))
+
+            results = [
+                ('QuerySet.delete()', self.measure(
+                    lambda: TermUsage.objects.filter(
+                        text_unit__document_id__in=document_ids).delete()[0])),
+                ('DELETE ... USING', self.measure(
+                    lambda: delete_usages(TermUsage, document_ids))),
+                ('DELETE all', self.measure(lambda: delete_usages(TermUsage))),
+                ('TRUNCATE', self.measure(lambda: truncate_usages([TermUsage]) or total)),
+            ]
+            transaction.set_rollback(True)
+
+        self.stdout.write('{:>18} {:>10} {:>10}'.format('', 'deleted', 'time, s'))
+        for name, (deleted, elapsed) in results:
+            self.stdout.write('{:>18} {:>10} {:>10.2f}'.format(name, deleted, elapsed))
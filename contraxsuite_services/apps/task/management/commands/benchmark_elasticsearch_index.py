@@ -0,0 +1,183 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# Standard imports
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+# Third-party imports
+from elasticsearch import Elasticsearch
+from elasticsearch.helpers import streaming_bulk
+
+# Django imports
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+# Project imports
+from apps.document.models import TextUnit
+from apps.task.tasks import UpdateElasticsearchIndex
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+BENCHMARK_INDEX = 'benchmark'
+
+
+class StubElasticsearchHandler(BaseHTTPRequestHandler):
+    """
+    Accepts index / bulk requests like Elasticsearch does and answers
+    after a fixed latency (emulates network round trip and ES work per request).
+    Documents are not stored.
+    """
+    protocol_version = 'HTTP/1.1'
+    latency = 0
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, data, status=200):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length).decode('utf-8') if length else ''
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        self.reply({})
+
+    def do_PUT(self):
+        self.read_body()
+        time.sleep(self.latency)
+        path = self.path.split('?')[0].strip('/').split('/')
+        if len(path) < 3:
+            # index creation
+            self.reply({'acknowledged': True})
+            return
+        self.reply({'_index': path[0], '_type': path[1], '_id': path[2], '_version': 1,
+                    'result': 'created'}, status=201)
+
+    def do_POST(self):
+        body = self.read_body()
+        time.sleep(self.latency)
+        if not self.path.split('?')[0].endswith('/_bulk'):
+            self.reply({})
+            return
+        items = []
+        # action lines are followed by source lines
+        for line in body.splitlines()[::2]:
+            if not line:
+                continue
+            action, meta = next(iter(json.loads(line).items()))
+            meta = dict(meta, status=201, result='created', _version=1)
+            items.append({action: meta})
+        self.reply({'took': 1, 'errors': False, 'items': items})
+
+
+class StubElasticsearchServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class Command(BaseCommand):
+    help = "Measure Elasticsearch indexing throughput (text units/sec) against a local " \
+           "stub ES HTTP server: one index request per text unit vs streaming_bulk " \
+           "as in Update Elasticsearch Index task"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--units',
+                            dest='units',
+                            type=int,
+                            default=10000,
+                            help='Number of text units; stored ones are reused if there are fewer')
+        parser.add_argument('--chunk-size',
+                            dest='chunk_size',
+                            type=int,
+                            default=settings.ELASTICSEARCH_INDEX_CHUNK_SIZE,
+                            help='Text units in one bulk request')
+        parser.add_argument('--latency-ms',
+                            dest='latency_ms',
+                            type=float,
+                            default=1,
+                            help='Stub server latency per request, ms')
+
+    @staticmethod
+    def index_by_one(es, rows):
+        for pk, text, document_id, unit_type, language, text_hash in rows:
+            es.index(index=BENCHMARK_INDEX, doc_type='text_unit', id=pk, body={
+                'pk': pk,
+                'text': text,
+                'document': document_id,
+                'unit_type': unit_type,
+                'language': language,
+                'text_hash': text_hash
+            })
+
+    @staticmethod
+    def index_bulk(es, rows, chunk_size):
+        actions = UpdateElasticsearchIndex.elastic_index_actions(BENCHMARK_INDEX, rows)
+        for _ok, _result in streaming_bulk(es, actions, chunk_size=chunk_size):
+            pass
+
+    def handle(self, *args, **options):
+        stored_rows = list(TextUnit.objects.order_by('pk').values_list(
+            'pk', 'text', 'document_id', 'unit_type', 'language', 'text_hash')[:options['units']])
+        if not stored_rows:
+            raise CommandError('There are no text units')
+        rows = [stored_rows[n % len(stored_rows)] for n in range(options['units'])]
+
+        StubElasticsearchHandler.latency = options['latency_ms'] / 1000
+        server = StubElasticsearchServer(('127.0.0.1', 0), StubElasticsearchHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            es = Elasticsearch(hosts=[{'host': '127.0.0.1', 'port': server.server_address[1]}])
+            self.stdout.write('Text units: {0}, chunk size: {1}, stub latency: {2}ms'.format(
+                len(rows), options['chunk_size'], options['latency_ms']))
+            for name, index in (('es.index per unit', lambda: self.index_by_one(es, rows)),
+                                ('streaming_bulk', lambda: self.index_bulk(
+                                    es, rows, options['chunk_size']))):
+                start = time.time()
+                index()
+                spent = time.time() - start
+                self.stdout.write('{0:<20} {1:>8.1f}s {2:>10.1f} units/s'.format(
+                    name, spent, len(rows) / spent if spent else 0))
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,102 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# Standard imports
+import os
+import time
+
+# Django imports
+from django.core.management import BaseCommand, CommandError
+
+# Project imports
+from apps.task.tasks import LoadDocuments
+from apps.task.utils.extraction import ExtractionError, ExtractionTimeout, get_extraction_pool
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+class Command(BaseCommand):
+    help = "Measure text / table extraction time for PDF and DOCX files in a local folder: " \
+           "each extractor separately, fallback and race modes"
+
+    EXTENSIONS = ('.pdf', '.docx')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path',
+                            help='Folder with PDF / DOCX files')
+
+    def run(self, extractors, race=False):
+        start = time.time()
+        text, parser_name = get_extraction_pool().first_result(extractors, race=race)
+        return time.time() - start, parser_name, len(text or '')
+
+    def run_single(self, name, func, args):
+        start = time.time()
+        try:
+            result = get_extraction_pool().start(name, func, args).result()
+            status = 'ok' if result else 'empty'
+        except ExtractionTimeout:
+            status = 'timeout'
+        except ExtractionError:
+            status = 'error'
+        return time.time() - start, status
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isdir(path):
+            raise CommandError('Folder "%s" does not exist' % path)
+        file_paths = sorted(os.path.join(root, fn)
+                            for root, _, file_names in os.walk(path)
+                            for fn in file_names
+                            if os.path.splitext(fn)[1].lower() in self.EXTENSIONS)
+        self.stdout.write('{:<40} {:>10} {:>12} {:>12} {:>12} {:>12}'.format(
+            'file', 'extractor', 'time, s', 'status', 'chars', 'parser'))
+        totals = {}
+        for file_path in file_paths:
+            ext = os.path.splitext(file_path)[1].lower()
+            extractors = [('tika', LoadDocuments.parse_with_tika, (file_path,)),
+                          ('textract', LoadDocuments.parse_with_textract, (file_path, ext))]
+            singles = list(extractors)
+            if ext == '.pdf':
+                singles.append(('tables', LoadDocuments.parse_tables, (file_path,)))
+            file_name = os.path.basename(file_path)[-40:]
+            for name, func, func_args in singles:
+                seconds, status = self.run_single(name, func, func_args)
+                totals[name] = totals.get(name, 0) + seconds
+                self.stdout.write('{:<40} {:>10} {:>12.2f} {:>12}'.format(
+                    file_name, name, seconds, status))
+            for mode, race in (('fallback', False), ('race', True)):
+                seconds, parser_name, chars = self.run(extractors, race=race)
+                totals[mode] = totals.get(mode, 0) + seconds
+                self.stdout.write('{:<40} {:>10} {:>12.2f} {:>12} {:>12} {:>12}'.format(
+                    file_name, mode, seconds, 'ok' if parser_name else 'failed',
+                    chars, parser_name or ''))
+        self.stdout.write('Total for %d files:' % len(file_paths))
+        for name, seconds in totals.items():
+            self.stdout.write('{:>10} {:>12.2f}'.format(name, seconds))
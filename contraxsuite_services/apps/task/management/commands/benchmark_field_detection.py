@@ -0,0 +1,102 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# Standard imports
+import time
+
+# Django imports
+from django.core.management import BaseCommand, CommandError
+
+# Project imports
+from apps.document.models import ClassifierModel, TextUnit
+from apps.document.tasks import DetectFieldValues
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+class Command(BaseCommand):
+    help = "Measure field detection model speed (sentences/sec) on stored sentences: " \
+           "predict() call per sentence vs one batched call per document"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sentences',
+                            dest='sentences',
+                            type=int,
+                            default=10000,
+                            help='Number of sentences')
+        parser.add_argument('--model',
+                            dest='model',
+                            type=int,
+                            help='ClassifierModel id, all trained models by default')
+
+    def handle(self, *args, **options):
+        classifier_models = ClassifierModel.objects.filter(trained_model__isnull=False)
+        if options['model']:
+            classifier_models = classifier_models.filter(pk=options['model'])
+        if not classifier_models.exists():
+            raise CommandError('There are no trained field detection models')
+
+        for classifier_model in classifier_models:
+            sklearn_model = classifier_model.get_trained_model_obj()
+            if sklearn_model is None:
+                continue
+            text_units = list(TextUnit.objects
+                              .filter(unit_type='sentence',
+                                      document__document_type=classifier_model.document_type)
+                              .order_by('document_id', 'pk')
+                              .only('pk', 'document_id', 'text')[:options['sentences']])
+            if not text_units:
+                continue
+            # DetectFieldValues classifies sentences of one document per call
+            documents = []
+            for text_unit in text_units:
+                if not documents or documents[-1][0].document_id != text_unit.document_id:
+                    documents.append([])
+                documents[-1].append(text_unit)
+
+            start = time.time()
+            per_sentence = [DetectFieldValues.predict_value(sklearn_model, text_unit)
+                            for text_unit in text_units]
+            per_sentence_time = time.time() - start
+
+            start = time.time()
+            batched = [predicted for document_text_units in documents
+                       for predicted in DetectFieldValues.predict_values(sklearn_model,
+                                                                         document_text_units)]
+            batched_time = time.time() - start
+
+            self.stdout.write('Model #{0} ({1}): {2} sentences, {3} documents'.format(
+                classifier_model.pk, classifier_model.document_field, len(text_units),
+                len(documents)))
+            self.stdout.write('{:>14} {:>14}'.format('per sentence/s', 'batched/s'))
+            self.stdout.write('{:>14.1f} {:>14.1f}'.format(
+                len(text_units) / per_sentence_time if per_sentence_time else 0,
+                len(text_units) / batched_time if batched_time else 0))
+            self.stdout.write('Sentences with different results: {0}'.format(
+                sum(1 for a, b in zip(per_sentence, batched) if a != b)))
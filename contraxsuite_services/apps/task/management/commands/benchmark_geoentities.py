@@ -0,0 +1,99 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# Standard imports
+import time
+
+# Third-party imports
+from lexnlp.extract.en import courts, geoentities
+
+# Django imports
+from django.core.management import BaseCommand
+
+# Project imports
+from apps.common.advancedcelery.db_cache import DbCache
+from apps.document.models import TextUnit
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+class Command(BaseCommand):
+    help = "Measure geo entity and court locating speed (units/sec) on stored text units: " \
+           "full DbCache config vs candidates of the precompiled alias matcher"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--units',
+                            dest='units',
+                            type=int,
+                            default=1000,
+                            help='Number of text units')
+        parser.add_argument('--unit-type',
+                            dest='unit_type',
+                            default='sentence',
+                            help='Text unit type: sentence or paragraph')
+
+    @staticmethod
+    def get_geoentities(text, language, geo_config):
+        return sorted(str(i) for i in geoentities.get_geoentities(
+            text, geo_config, text_languages=[language], priority=True))
+
+    @staticmethod
+    def get_courts(text, language, court_config):
+        return sorted(str(i) for i in courts.get_courts(
+            text, court_config_list=court_config, text_languages=[language]))
+
+    def measure(self, name, text_units, locate, config, matcher):
+        results = []
+        for get_config in (lambda text: config, matcher.get_candidates):
+            start = time.time()
+            found = [locate(text, language, get_config(text)) for text, language in text_units]
+            results.append((found, time.time() - start))
+
+        (full_found, full_time), (found, matcher_time) = results
+        self.stdout.write('{0}: {1} entities, {2} aliases'.format(
+            name, len(matcher.entities), matcher.aliases_count))
+        self.stdout.write('{:>12} {:>12}'.format('full/s', 'matcher/s'))
+        self.stdout.write('{:>12.1f} {:>12.1f}'.format(
+            len(text_units) / full_time if full_time else 0,
+            len(text_units) / matcher_time if matcher_time else 0))
+        self.stdout.write('Units with different results: {0}'.format(
+            sum(1 for a, b in zip(full_found, found) if a != b)))
+
+    def handle(self, *args, **options):
+        text_units = list(TextUnit.objects
+                          .filter(unit_type=options['unit_type'])
+                          .order_by('pk')
+                          .values_list('text', 'language')[:options['units']])
+        self.stdout.write('Text units: {0}'.format(len(text_units)))
+
+        # load configs and matchers outside of the measured loops
+        self.measure('Geo entities', text_units, self.get_geoentities,
+                     DbCache.get_geo_config() or [], DbCache.get_geo_matcher())
+        self.measure('Courts', text_units, self.get_courts,
+                     DbCache.get_court_config() or [], DbCache.get_court_matcher())
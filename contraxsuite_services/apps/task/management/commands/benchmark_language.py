@@ -0,0 +1,93 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# Standard imports
+import time
+
+# Third-party imports
+from lexnlp.nlp.en.segments.sentences import get_sentence_span_list
+
+# Django imports
+from django.core.management import BaseCommand
+
+# Project imports
+from apps.task.utils.nlp.lang import DocumentLanguageDetector, get_language
+from apps.task.utils.text.segment import segment_paragraphs
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+class Command(BaseCommand):
+    help = "Measure text unit language detection time for a document of given size: " \
+           "per unit detection vs DocumentLanguageDetector"
+
+    def add_arguments(self, parser):
+        parser.add_argument('file_path',
+                            help='Plain text file, repeated / cut to the requested size')
+        parser.add_argument('--pages',
+                            dest='pages',
+                            type=int,
+                            default=100,
+                            help='Document size in pages')
+        parser.add_argument('--chars-per-page',
+                            dest='chars_per_page',
+                            type=int,
+                            default=3000,
+                            help='Page size in characters')
+
+    def handle(self, *args, **options):
+        with open(options['file_path'], encoding='utf-8') as f:
+            sample = f.read()
+        size = options['pages'] * options['chars_per_page']
+        text = (sample * (size // len(sample) + 1))[:size]
+
+        paragraphs = list(segment_paragraphs(text))
+        sentences = [text[start:end] for start, end in get_sentence_span_list(text)]
+        units = paragraphs + sentences
+        self.stdout.write('Document: {0} pages, {1} paragraphs, {2} sentences'.format(
+            options['pages'], len(paragraphs), len(sentences)))
+
+        start = time.time()
+        document_language = get_language(text)
+        per_unit_languages = [get_language(unit) for unit in units]
+        per_unit_time = time.time() - start
+
+        start = time.time()
+        detector = DocumentLanguageDetector(text, get_language(text))
+        engine_languages = detector.get_languages(units)
+        engine_time = time.time() - start
+
+        agreement = sum(1 for a, b in zip(per_unit_languages, engine_languages) if a == b)
+        self.stdout.write('Document language: %s' % document_language)
+        self.stdout.write('{:>10} {:>10}'.format('per unit, s', 'engine, s'))
+        self.stdout.write('{:>10.2f} {:>10.2f}'.format(per_unit_time, engine_time))
+        self.stdout.write('Re-detected units: {0} of {1}'.format(detector.redetected_count,
+                                                                 len(units)))
+        self.stdout.write('Same language as per unit detection: {0:.1%}'.format(
+            agreement / len(units) if units else 1))
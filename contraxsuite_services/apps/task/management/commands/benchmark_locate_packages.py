@@ -0,0 +1,124 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# -*- coding: utf-8 -*-
+
+# Standard imports
+import heapq
+
+# Django imports
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db.models.functions import Length
+
+# Project imports
+from apps.document.models import Document, TextUnit
+from apps.task.tasks import Locate
+from apps.task.utils.locate_packer import LocatePacker
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+class Command(BaseCommand):
+    help = "Compare Locate sub-tasks of fixed size packages (TEXT_UNITS_TO_PARSE_PACKAGE_SIZE) " \
+           "and adaptive packages (LocatePacker) for the loaded documents: Task rows, " \
+           "broker messages and wall time estimated from the recorded sub-task timings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--locate',
+                            dest='locate',
+                            default='amount,citation,date,party,term',
+                            help='Comma separated locators')
+        parser.add_argument('--documents',
+                            dest='documents',
+                            type=int,
+                            default=10000,
+                            help='Number of documents')
+        parser.add_argument('--workers',
+                            dest='workers',
+                            type=int,
+                            default=8,
+                            help='Number of Celery worker processes')
+        parser.add_argument('--task-overhead',
+                            dest='task_overhead',
+                            type=float,
+                            default=0.1,
+                            help='Seconds spent per sub-task besides locating: broker round trip, '
+                                 'Task row updates, loading text units')
+        parser.add_argument('--chars-per-second',
+                            dest='chars_per_second',
+                            type=float,
+                            default=None,
+                            help='Locating speed, learned from previous runs if not set')
+
+    @staticmethod
+    def estimate_wall_time(packages, lengths, chars_per_second, task_overhead, workers):
+        """
+        Simulate workers taking packages from the queue in order.
+        """
+        workers_free_at = [0.0] * workers
+        for package in packages:
+            duration = task_overhead + sum(lengths[i] for i in package) / chars_per_second
+            heapq.heappush(workers_free_at, heapq.heappop(workers_free_at) + duration)
+        return max(workers_free_at)
+
+    def handle(self, *args, **options):
+        locate = options['locate'].split(',')
+        document_ids = list(Document.objects.order_by('pk')
+                            .values_list('pk', flat=True)[:options['documents']])
+        text_units = list(TextUnit.objects
+                          .filter(document_id__in=document_ids)
+                          .annotate(text_length=Length('text'))
+                          .values_list('pk', 'text_length'))
+        lengths = dict(text_units)
+
+        adaptive = LocatePacker(Locate.parse_text_units.name, locate,
+                                chars_per_second=options['chars_per_second'])
+        fixed = LocatePacker(Locate.parse_text_units.name, locate, target_seconds=0,
+                             chars_per_second=adaptive.chars_per_second)
+
+        self.stdout.write('{0} documents, {1} text units, {2} characters'.format(
+            len(document_ids), len(text_units), sum(lengths.values())))
+        self.stdout.write('Locate [{0}]: {1:.0f} characters per second ({2}), '
+                          'target package: {3} characters'.format(
+                              adaptive.locate_key, adaptive.chars_per_second,
+                              'set' if options['chars_per_second'] else 'learned or default',
+                              adaptive.target_chars))
+        self.stdout.write('{:>10} {:>10} {:>10} {:>12} {:>12}'.format(
+            '', 'packages', 'Task rows', 'messages', 'wall time, s'))
+        for name, packer in (('fixed', fixed), ('adaptive', adaptive)):
+            packages = packer.pack(text_units)
+            wall_time = self.estimate_wall_time(packages, lengths, packer.chars_per_second,
+                                                options['task_overhead'], options['workers'])
+            # + main Locate task and "Cache Generic Document Data" task run after sub-tasks
+            self.stdout.write('{:>10} {:>10} {:>10} {:>12} {:>12.1f}'.format(
+                name, len(packages), len(packages) + 2, len(packages) + 2, wall_time))
+        self.stdout.write('Fixed package size: {0} text units, max adaptive package size: '
+                          '{1} text units'.format(settings.TEXT_UNITS_TO_PARSE_PACKAGE_SIZE,
+                                                  adaptive.max_text_units))
@@ -0,0 +1,111 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# -*- coding: utf-8 -*-
+
+# Standard imports
+import cProfile
+import pstats
+from collections import OrderedDict
+
+# Django imports
+from django.core.management import BaseCommand
+
+# Project imports
+from apps.document.models import TextUnit
+from apps.task import tasks
+from apps.task.utils.nlp.text_analysis import TextUnitAnalysis
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+class Command(BaseCommand):
+    help = "Profile Locate locators over loaded text units and show time split by locator: " \
+           "a text analysis (tokens, stems etc.) per locator vs one shared by all locators"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--locate',
+                            dest='locate',
+                            default='term,geoentity,court,date,amount,party',
+                            help='Comma separated locators')
+        parser.add_argument('--units',
+                            dest='units',
+                            type=int,
+                            default=1000,
+                            help='Number of text units')
+        parser.add_argument('--print-stats',
+                            dest='print_stats',
+                            type=int,
+                            default=0,
+                            help='Print N functions taking most time in the shared analysis run')
+
+    @staticmethod
+    def profile(text_units, locate, shared) -> pstats.Stats:
+        profile = cProfile.Profile()
+        profile.enable()
+        for text_unit_id, text, text_unit_lang in text_units:
+            shared_analysis = TextUnitAnalysis(text, text_unit_lang) if shared else None
+            for locator in locate:
+                analysis = shared_analysis or TextUnitAnalysis(text, text_unit_lang)
+                getattr(tasks, 'parse_' + locator)(text, text_unit_id, text_unit_lang, analysis)
+        profile.disable()
+        return pstats.Stats(profile)
+
+    @staticmethod
+    def get_locator_times(stats: pstats.Stats, locate) -> OrderedDict:
+        """
+        Cumulative time of each parse_<locator> function.
+        """
+        times = OrderedDict((locator, 0.0) for locator in locate)
+        for (_, _, func_name), (_, _, _, cumulative_time, _) in stats.stats.items():
+            locator = func_name[len('parse_'):]
+            if func_name.startswith('parse_') and locator in times:
+                times[locator] += cumulative_time
+        return times
+
+    def handle(self, *args, **options):
+        locate = options['locate'].split(',')
+        text_units = list(TextUnit.objects.order_by('pk')
+                          .values_list('pk', 'text', 'language')[:options['units']])
+        # warm up DbCache configs and lexnlp models
+        self.profile(text_units[:1], locate, shared=True)
+
+        before = self.get_locator_times(self.profile(text_units, locate, shared=False), locate)
+        stats = self.profile(text_units, locate, shared=True)
+        after = self.get_locator_times(stats, locate)
+
+        self.stdout.write('{0} text units'.format(len(text_units)))
+        self.stdout.write('{:>12} {:>14} {:>14}'.format('locator', 'per locator, s', 'shared, s'))
+        for locator in locate:
+            self.stdout.write('{:>12} {:>14.2f} {:>14.2f}'.format(
+                locator, before[locator], after[locator]))
+        self.stdout.write('{:>12} {:>14.2f} {:>14.2f}'.format(
+            'total', sum(before.values()), sum(after.values())))
+        if options['print_stats']:
+            stats.sort_stats('tottime').print_stats(options['print_stats'])
@@ -0,0 +1,74 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# Standard imports
+import time
+
+# Django imports
+from django.core.management import BaseCommand
+
+# Project imports
+from apps.task.utils.text.segment import segment_paragraphs, segment_paragraphs_by_lines
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+class Command(BaseCommand):
+    help = "Measure paragraph segmentation throughput: " \
+           "line by line state machine vs regex split"
+
+    def add_arguments(self, parser):
+        parser.add_argument('file_path',
+                            help='Plain text file, repeated / cut to the requested size')
+        parser.add_argument('--megabytes',
+                            dest='megabytes',
+                            type=int,
+                            default=10,
+                            help='Text size in megabytes')
+
+    def handle(self, *args, **options):
+        with open(options['file_path'], encoding='utf-8') as f:
+            sample = f.read()
+        size = options['megabytes'] * 1024 * 1024
+        text = (sample * (size // len(sample) + 1))[:size]
+
+        results = []
+        for segment in (segment_paragraphs_by_lines, segment_paragraphs):
+            start = time.time()
+            paragraphs = segment(text)
+            results.append((paragraphs, time.time() - start))
+
+        (line_paragraphs, line_time), (paragraphs, regex_time) = results
+        self.stdout.write('Text: {0} MB, {1} paragraphs'.format(options['megabytes'],
+                                                                len(paragraphs)))
+        self.stdout.write('{:>10} {:>10}'.format('lines MB/s', 'regex MB/s'))
+        self.stdout.write('{:>10.1f} {:>10.1f}'.format(
+            options['megabytes'] / line_time if line_time else 0,
+            options['megabytes'] / regex_time if regex_time else 0))
+        self.stdout.write('Same output: {0}'.format(line_paragraphs == paragraphs))
@@ -0,0 +1,113 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# Standard imports
+import random
+import time
+
+# Django imports
+from django.core.management import BaseCommand
+from django.db import transaction
+
+# Project imports
+from apps.extract.models import Party
+from apps.task.utils.party_resolver import PartyResolver
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+class Command(BaseCommand):
+    help = "Measure Party resolution of a party-heavy corpus: get_or_create per party " \
+           "vs PartyResolver per package of text units. Changes are rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--units',
+                            dest='units',
+                            type=int,
+                            default=10000,
+                            help='Number of text units')
+        parser.add_argument('--parties-per-unit',
+                            dest='parties_per_unit',
+                            type=int,
+                            default=5,
+                            help='Number of parties found in each text unit')
+        parser.add_argument('--distinct-parties',
+                            dest='distinct_parties',
+                            type=int,
+                            default=20000,
+                            help='Number of distinct party names in the corpus')
+        parser.add_argument('--package-size',
+                            dest='package_size',
+                            type=int,
+                            default=10,
+                            help='Text units per Locate sub-task')
+
+    @staticmethod
+    def get_or_create(packages):
+        for package in packages:
+            for parties in package:
+                for name, type_abbr in parties:
+                    Party.objects.get_or_create(name=name, type_abbr=type_abbr,
+                                                defaults=dict(type='company'))
+
+    @staticmethod
+    def resolve(packages):
+        resolver = PartyResolver()
+        for package in packages:
+            resolver.resolve({key: dict(type='company')
+                              for parties in package for key in parties})
+        return resolver
+
+    @staticmethod
+    def measure(func, packages):
+        start = time.time()
+        with transaction.atomic():
+            result = func(packages)
+            transaction.set_rollback(True)
+        return time.time() - start, result
+
+    def handle(self, *args, **options):
+        random.seed(0)
+        names = ['PARTY {0} HOLDINGS'.format(i) for i in range(options['distinct_parties'])]
+        units = [[(random.choice(names), random.choice(('INC', 'LLC', 'CORP')))
+                  for _ in range(options['parties_per_unit'])]
+                 for _ in range(options['units'])]
+        packages = [units[i:i + options['package_size']]
+                    for i in range(0, len(units), options['package_size'])]
+
+        old_time, _ = self.measure(self.get_or_create, packages)
+        new_time, resolver = self.measure(self.resolve, packages)
+
+        self.stdout.write('{0} text units, {1} parties found, {2} packages'.format(
+            len(units), sum(len(i) for i in units), len(packages)))
+        self.stdout.write('{:>16} {:>10}'.format('', 'time, s'))
+        self.stdout.write('{:>16} {:>10.2f}'.format('get_or_create', old_time))
+        self.stdout.write('{:>16} {:>10.2f}'.format('PartyResolver', new_time))
+        self.stdout.write('Resolver LRU hits: {0}, misses: {1}'.format(resolver.hits,
+                                                                       resolver.misses))
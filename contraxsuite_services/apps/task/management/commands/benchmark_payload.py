@@ -0,0 +1,99 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# Standard imports
+import pickle
+import time
+
+# Django imports
+from django.conf import settings
+from django.core.management import BaseCommand
+
+# Project imports
+from apps.common.advancedcelery.payload import PayloadOffloader
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+class Command(BaseCommand):
+    help = "Measure broker message size and enqueue (serialization) time of Locate " \
+           "sub-tasks: arguments inline vs offloaded to the Redis cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--units',
+                            dest='units',
+                            type=int,
+                            default=100000,
+                            help='Number of text units')
+        parser.add_argument('--shared-bytes',
+                            dest='shared_bytes',
+                            type=int,
+                            default=0,
+                            help='Size of an extra argument shared by all sub-tasks')
+
+    @staticmethod
+    def get_locate_args(units, shared_bytes):
+        # same arguments as Locate.process() builds for Locate.parse_text_units
+        locate = {'term': {'delete': True}, 'geoentity': {'priority': True}, 'date': {}}
+        shared = 'x' * shared_bytes if shared_bytes else None
+        package_size = settings.TEXT_UNITS_TO_PARSE_PACKAGE_SIZE
+        args_list = []
+        for start in range(0, units, package_size):
+            args = (list(range(start, min(start + package_size, units))), 1, locate)
+            args_list.append(args + (shared,) if shared else args)
+        return args_list
+
+    @staticmethod
+    def enqueue(args_list, offloader=None):
+        """
+        :return: total message size, time
+        """
+        size = 0
+        start = time.time()
+        for args in args_list:
+            if offloader:
+                args = offloader.offload_args(args)
+            size += len(pickle.dumps((args, {}, {})))
+        return size, time.time() - start
+
+    def handle(self, *args, **options):
+        args_list = self.get_locate_args(options['units'], options['shared_bytes'])
+        self.stdout.write('{0} text units, {1} sub-tasks'.format(options['units'],
+                                                                  len(args_list)))
+        inline_size, inline_time = self.enqueue(args_list)
+        offloader = PayloadOffloader()
+        offloaded_size, offloaded_time = self.enqueue(args_list, offloader)
+
+        self.stdout.write('{:>10} {:>14} {:>14}'.format('', 'messages, MB', 'enqueue, ms'))
+        self.stdout.write('{:>10} {:>14.2f} {:>14.1f}'.format(
+            'inline', inline_size / 2 ** 20, inline_time * 1000))
+        self.stdout.write('{:>10} {:>14.2f} {:>14.1f}'.format(
+            'offloaded', offloaded_size / 2 ** 20, offloaded_time * 1000))
+        self.stdout.write('Offloaded values: {0}, {1} bytes'.format(
+            offloader.offloaded_count, offloader.offloaded_bytes))
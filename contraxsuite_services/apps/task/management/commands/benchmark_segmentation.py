@@ -0,0 +1,86 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# Standard imports
+import time
+
+# Django imports
+from django.core.management import BaseCommand
+
+# Project imports
+from apps.task.utils.text.segment import get_sentence_tokenizer, segment_paragraphs, \
+    segment_sentences
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+class Command(BaseCommand):
+    help = "Measure sentence segmentation speed (sentences/sec) of paragraphs " \
+           "of a document: adaptive (trained per call) vs pretrained tokenizer"
+
+    def add_arguments(self, parser):
+        parser.add_argument('file_path',
+                            help='Plain text file, repeated / cut to the requested size')
+        parser.add_argument('--pages',
+                            dest='pages',
+                            type=int,
+                            default=100,
+                            help='Document size in pages')
+        parser.add_argument('--chars-per-page',
+                            dest='chars_per_page',
+                            type=int,
+                            default=3000,
+                            help='Page size in characters')
+
+    def handle(self, *args, **options):
+        with open(options['file_path'], encoding='utf-8') as f:
+            sample = f.read()
+        size = options['pages'] * options['chars_per_page']
+        text = (sample * (size // len(sample) + 1))[:size]
+        paragraphs = segment_paragraphs(text)
+        self.stdout.write('Document: {0} pages, {1} paragraphs'.format(
+            options['pages'], len(paragraphs)))
+
+        # load the cached tokenizer outside of the measured loop
+        get_sentence_tokenizer()
+
+        results = []
+        for adaptive in (True, False):
+            start = time.time()
+            sentences = [sentence for paragraph in paragraphs
+                         for sentence in segment_sentences(paragraph, adaptive=adaptive)]
+            results.append((sentences, time.time() - start))
+
+        (adaptive_sentences, adaptive_time), (sentences, pretrained_time) = results
+        self.stdout.write('{:>12} {:>12}'.format('adaptive/s', 'pretrained/s'))
+        self.stdout.write('{:>12.0f} {:>12.0f}'.format(
+            len(adaptive_sentences) / adaptive_time if adaptive_time else 0,
+            len(sentences) / pretrained_time if pretrained_time else 0))
+        self.stdout.write('Sentences: {0} adaptive, {1} pretrained'.format(
+            len(adaptive_sentences), len(sentences)))
@@ -0,0 +1,91 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# Standard imports
+import os
+import time
+
+# Third-party imports
+from lexnlp.nlp.en.segments.sentences import get_sentence_span_list
+
+# Django imports
+from django.core.management import BaseCommand, CommandError
+
+# Project imports
+from apps.task.tasks import ScoreSentiment
+from apps.task.utils.text.segment import segment_paragraphs
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+class Command(BaseCommand):
+    help = "Measure document ingestion time spent on sentiment scoring " \
+           "(i.e. saved by deferred / skipped sentiment) for a corpus of plain text files"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path',
+                            help='Folder with plain text files')
+        parser.add_argument('--documents',
+                            dest='documents',
+                            type=int,
+                            default=1000,
+                            help='Number of documents; files are reused if there are fewer')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isdir(path):
+            raise CommandError('Folder "%s" does not exist' % path)
+        file_paths = sorted(os.path.join(root, fn)
+                            for root, _, file_names in os.walk(path) for fn in file_names)
+        if not file_paths:
+            raise CommandError('Folder "%s" is empty' % path)
+
+        segmentation_time = sentiment_time = 0
+        units_count = 0
+        for n in range(options['documents']):
+            with open(file_paths[n % len(file_paths)], encoding='utf-8', errors='ignore') as f:
+                text = f.read()
+
+            start = time.time()
+            units = list(segment_paragraphs(text)) + \
+                [text[span[0]:span[1]] for span in get_sentence_span_list(text)]
+            segmentation_time += time.time() - start
+
+            start = time.time()
+            ScoreSentiment.get_document_properties(None, text, None)
+            ScoreSentiment.get_text_unit_properties(enumerate(units))
+            sentiment_time += time.time() - start
+            units_count += len(units)
+
+        self.stdout.write('Documents: {0}, text units: {1}'.format(options['documents'],
+                                                                   units_count))
+        self.stdout.write('Segmentation: {0:.1f}s'.format(segmentation_time))
+        self.stdout.write('Sentiment (saved by deferring / skipping): {0:.1f}s, '
+                          '{1:.1f}ms per document'.format(
+                              sentiment_time, sentiment_time * 1000 / options['documents']))
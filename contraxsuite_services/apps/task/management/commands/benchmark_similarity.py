@@ -0,0 +1,132 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# Standard imports
+import multiprocessing
+import resource
+import time
+
+# Third-party imports
+import numpy as np
+from django.core.management import BaseCommand
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Project imports
+from apps.task.utils.nlp.similarity_lsh import CosineLSH, exact_similar_pairs
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+def make_corpus(n_documents, vocabulary_size=5000, document_length=300,
+                group_size=5, change_rate=0.2, seed=0):
+    """
+    Build a synthetic corpus of groups of near-duplicate documents:
+    each group member is a copy of the group's base text
+    with change_rate of its words replaced at random.
+    """
+    random_state = np.random.RandomState(seed)
+    vocabulary = np.array(['w%d' % i for i in range(vocabulary_size)])
+    # Zipf-like word frequencies, as in natural texts
+    frequencies = 1 / np.arange(1, vocabulary_size + 1)
+    frequencies /= frequencies.sum()
+    texts = []
+    base = None
+    for i in range(n_documents):
+        if i % group_size == 0:
+            base = random_state.choice(vocabulary_size, document_length, p=frequencies)
+        words = base.copy()
+        changed = random_state.rand(document_length) < change_rate
+        words[changed] = random_state.choice(vocabulary_size, changed.sum(), p=frequencies)
+        texts.append(' '.join(vocabulary[words]))
+    return texts
+
+
+def run_engine(n_documents, engine, threshold, n_features, queue):
+    texts = make_corpus(n_documents)
+    X = TfidfVectorizer(max_df=0.5, max_features=n_features, min_df=2).fit_transform(texts)
+    del texts
+    start = time.time()
+    if engine == 'lsh':
+        pairs = CosineLSH(random_state=0).similar_pairs(X, threshold)
+    else:
+        pairs = exact_similar_pairs(X, threshold)
+    found = {(i, j) for i, j, _ in pairs}
+    wall_time = time.time() - start
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    queue.put((wall_time, peak_rss_mb, found))
+
+
+def measure(n_documents, engine, threshold, n_features):
+    """
+    Run an engine in a separate process so that its peak RSS is measured alone.
+    """
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=run_engine, args=(n_documents, engine, threshold, n_features, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+class Command(BaseCommand):
+    help = "Compare exact and LSH document similarity search: " \
+           "wall time, peak RSS and recall of LSH versus exact cosine"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes',
+                            dest='sizes',
+                            default='1000,10000,50000',
+                            help='Comma separated numbers of documents')
+        parser.add_argument('--threshold',
+                            dest='threshold',
+                            type=int,
+                            default=75,
+                            help='Min. similarity, 50-100')
+        parser.add_argument('--n-features',
+                            dest='n_features',
+                            type=int,
+                            default=100,
+                            help='TF-IDF max features')
+
+    def handle(self, *args, **options):
+        threshold = options['threshold'] / 100
+        n_features = options['n_features']
+        self.stdout.write('{:>8} {:>6} {:>10} {:>14} {:>10} {:>8}'.format(
+            'docs', 'engine', 'time, s', 'peak RSS, MB', 'pairs', 'recall'))
+        for n_documents in [int(i) for i in options['sizes'].split(',')]:
+            exact_pairs = None
+            for engine in ('exact', 'lsh'):
+                wall_time, peak_rss_mb, pairs = measure(n_documents, engine, threshold, n_features)
+                if engine == 'exact':
+                    exact_pairs = pairs
+                recall = len(pairs & exact_pairs) / len(exact_pairs) if exact_pairs else 1
+                self.stdout.write('{:>8} {:>6} {:>10.2f} {:>14.1f} {:>10} {:>8.4f}'.format(
+                    n_documents, engine, wall_time, peak_rss_mb, len(pairs), recall))
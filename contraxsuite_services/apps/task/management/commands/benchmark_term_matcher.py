@@ -0,0 +1,165 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# Standard imports
+import random
+import string
+import time
+
+# Third-party imports
+from lexnlp.nlp.en.tokens import get_stems, get_token_list
+
+# Django imports
+from django.core.management import BaseCommand
+
+# Project imports
+from apps.document.models import TextUnit
+from apps.task.utils.nlp.term_matcher import TermStemMatcher
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+def get_term_usages_by_substrings(term_stems, text_stems, text_tokens):
+    """
+    Former parse_term() matching: substring search of each known term
+    in the space-joined text stems.
+    """
+    text_stems = ' %s ' % ' '.join(text_stems)
+    term_usages = []
+    for stemmed_term, data in term_stems.items():
+        if stemmed_term not in text_stems:
+            continue
+        if data['length'] == 1:
+            count = text_stems.count(stemmed_term)
+            if count:
+                term_data = list(data['values'][0])
+                term_data.append(count)
+                term_usages.append(term_data)
+        else:
+            for term_data in data['values']:
+                term_data = list(term_data)
+                count = text_tokens.count(term_data[0])
+                if count:
+                    term_data.append(count)
+                    term_usages.append(term_data)
+    return term_usages
+
+
+class Command(BaseCommand):
+    help = "Measure term locating speed (units/sec) on stored text units for synthetic " \
+           "term dictionaries of several sizes: TermStemMatcher vs substring search " \
+           "of each term"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--units',
+                            dest='units',
+                            type=int,
+                            default=100,
+                            help='Number of text units')
+        parser.add_argument('--unit-type',
+                            dest='unit_type',
+                            default='sentence',
+                            help='Text unit type: sentence or paragraph')
+        parser.add_argument('--terms',
+                            dest='terms',
+                            default='10000,100000,1000000',
+                            help='Comma separated term dictionary sizes')
+        parser.add_argument('--hit-ratio',
+                            dest='hit_ratio',
+                            type=float,
+                            default=0.01,
+                            help='Share of terms built from stems of the text units, '
+                                 'other terms are random words')
+        parser.add_argument('--skip-old',
+                            dest='skip_old',
+                            action='store_true',
+                            help='Measure TermStemMatcher only, substring search is slow '
+                                 'for large dictionaries')
+
+    @staticmethod
+    def get_term_stems(terms_count, vocabulary, hit_ratio):
+        """
+        Build a term config like DbCache.cache_term_stems() does:
+        {' stemmed term ': {'values': [[term, pk], ...], 'length': int}}
+        """
+        rnd = random.Random(terms_count)
+        term_stems = {}
+        for pk in range(terms_count):
+            length = rnd.randint(1, 3)
+            if vocabulary and rnd.random() < hit_ratio:
+                stems = [rnd.choice(vocabulary) for _ in range(length)]
+            else:
+                stems = [''.join(rnd.choice(string.ascii_lowercase) for _ in range(8))
+                         for _ in range(length)]
+            term = ' '.join(stems)
+            item = term_stems.setdefault(' %s ' % term, dict(values=[], length=0))
+            item['values'].append([term, pk])
+            item['length'] += 1
+        return term_stems
+
+    @staticmethod
+    def measure(get_term_usages, text_units):
+        start = time.time()
+        found = [sorted(get_term_usages(text_stems, text_tokens))
+                 for text_stems, text_tokens in text_units]
+        spent = time.time() - start
+        return found, len(text_units) / spent if spent else 0
+
+    def handle(self, *args, **options):
+        texts = TextUnit.objects \
+            .filter(unit_type=options['unit_type']) \
+            .order_by('pk') \
+            .values_list('text', flat=True)[:options['units']]
+        # stems / tokens are computed the same way for both implementations, not measured
+        text_units = [(get_stems(text, lowercase=True), get_token_list(text, lowercase=True))
+                      for text in texts]
+        vocabulary = sorted({stem for text_stems, _ in text_units for stem in text_stems})
+        self.stdout.write('Text units: {0}, distinct stems: {1}'.format(
+            len(text_units), len(vocabulary)))
+
+        self.stdout.write('{:>10} {:>10} {:>12} {:>12} {:>10}'.format(
+            'terms', 'build s', 'matcher/s', 'substring/s', 'different'))
+        for terms_count in [int(i) for i in options['terms'].split(',')]:
+            term_stems = self.get_term_stems(terms_count, vocabulary, options['hit_ratio'])
+            start = time.time()
+            term_matcher = TermStemMatcher(term_stems)
+            build_time = time.time() - start
+
+            found, matcher_speed = self.measure(term_matcher.get_term_usages, text_units)
+            if options['skip_old']:
+                old_speed, different = '-', '-'
+            else:
+                old_found, old_speed = self.measure(
+                    lambda text_stems, text_tokens: get_term_usages_by_substrings(
+                        term_stems, text_stems, text_tokens), text_units)
+                old_speed = '{:.1f}'.format(old_speed)
+                # adjacent repeats of a term are counted fully by TermStemMatcher only
+                different = sum(1 for a, b in zip(found, old_found) if a != b)
+            self.stdout.write('{:>10} {:>10.2f} {:>12.1f} {:>12} {:>10}'.format(
+                terms_count, build_time, matcher_speed, old_speed, different))
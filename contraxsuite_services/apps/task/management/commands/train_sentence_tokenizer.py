@@ -0,0 +1,59 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# Django imports
+from django.core.management import BaseCommand
+
+# Project imports
+from apps.document.models import Document
+from apps.task.utils.text.segment import store_sentence_tokenizer, train_sentence_tokenizer
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+class Command(BaseCommand):
+    help = "Train Punkt sentence tokenizer on the document corpus and store it " \
+           "in ObjectStorage; restart workers to pick it up"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents',
+                            dest='documents',
+                            type=int,
+                            default=1000,
+                            help='Max number of documents to train on')
+
+    def handle(self, *args, **options):
+        texts = Document.objects \
+            .exclude(full_text__isnull=True) \
+            .order_by('pk') \
+            .values_list('full_text', flat=True)[:options['documents']]
+        sent_tokenizer = train_sentence_tokenizer(texts.iterator())
+        store_sentence_tokenizer(sent_tokenizer)
+        self.stdout.write('Stored sentence tokenizer trained on {0} documents'.format(
+            texts.count()))
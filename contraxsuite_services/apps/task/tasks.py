@@ -28,14 +28,14 @@
 import datetime
 import hashlib
 import json
-import math
 import mimetypes
 import os
 import pickle
 import string
 import sys
+import time
 import traceback
-from traceback import format_exc
+from collections import Counter
 from typing import List, Dict, Tuple, Any, Callable
 
 # Additional libraries
@@ -57,11 +57,13 @@ from celery.utils.log import get_task_logger
 from constance import config
 from django.conf import settings
 from django.db import transaction
-from django.db.models import Count, Q, Case, Value, When, IntegerField
-from django.db.utils import IntegrityError, DataError
+from django.db.models import Count, Q, Case, Value, When, IntegerField, Max
+from django.db.models.functions import Length
+from django.db.utils import IntegrityError
 from django.utils.timezone import now
 from elasticsearch import Elasticsearch
 from elasticsearch.exceptions import RequestError
+from elasticsearch.helpers import streaming_bulk
 from lexnlp.extract.en import (
     amounts, citations, copyright, courts, dates, distances, definitions,
     durations, geoentities, money, percents, ratios, regulations, trademarks, urls,
@@ -70,14 +72,12 @@ from lexnlp.extract.en.contracts.detector import is_contract
 from lexnlp.extract.en.entities.nltk_maxent import get_companies
 from lexnlp.nlp.en.segments.sentences import get_sentence_span_list, pre_process_document
 from lexnlp.nlp.en.segments.titles import get_titles
-from lexnlp.nlp.en.tokens import get_stems, get_token_list
 from psycopg2 import InterfaceError, OperationalError
 # Scikit-learn imports
 from sklearn.cluster import Birch, DBSCAN, KMeans, MiniBatchKMeans
 from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
 from sklearn.feature_extraction.text import TfidfVectorizer, TfidfTransformer
 from sklearn.linear_model import LogisticRegressionCV
-from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.semi_supervised import LabelSpreading
 from sklearn.svm import SVC
@@ -92,7 +92,9 @@ from apps.analyze.models import (
     TextUnitClassification, TextUnitClassifier, TextUnitClassifierSuggestion)
 from apps.celery import app
 from apps.common.advancedcelery.db_cache import DbCache
+from apps.common.advancedcelery.payload import PayloadOffloader, resolve_args
 from apps.common.advancedcelery.fileaccess import prepare_file_access_handler
+from apps.common.models import AppVar
 from apps.common.utils import fast_uuid
 from apps.deployment.app_data import load_geo_entities, load_terms, load_courts
 from apps.document.models import (
@@ -108,10 +110,17 @@ from apps.extract.models import (
 from apps.project.models import Project, UploadSession
 from apps.task.celery_backend.task_utils import revoke_task
 from apps.task.models import Task, TaskConfig
-from apps.task.utils.nlp.lang import get_language
+from apps.task.utils.extraction import ExtractionError, ExtractionTimeout, get_extraction_pool
+from apps.task.utils.locate_packer import LocatePacker
+from apps.task.utils.nlp.lang import DocumentLanguageDetector, get_language
+from apps.task.utils.nlp.text_analysis import TextUnitAnalysis
+from apps.task.utils.nlp.similarity_lsh import CosineLSH, exact_similar_pairs
 from apps.task.utils.ocr.textract import textract2text
-from apps.task.utils.task_utils import TaskUtils, pre_serialize
+from apps.task.utils.party_resolver import get_party_resolver
+from apps.task.utils.task_utils import StageTimer, TaskUtils, pre_serialize
 from apps.task.utils.text.segment import segment_paragraphs
+from apps.task.utils.usage_writer import UsageWriter, delete_usages, fits_fields, \
+    truncate_usages
 
 __author__ = "ContraxSuite, LLC; LexPredict, LLC"
 __copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
@@ -149,6 +158,90 @@ def _get_or_create_task_config(celery_task) -> TaskConfig:
     }, name=celery_task.name)[0]
 
 
+class TaskExecutionBuffer:
+    """
+    Per-execution cache of the Task row and buffer of its progress updates.
+    push() and update_progress() calls are coalesced and written to DB
+    at most once per flush interval and when the task execution finishes.
+    Counts DB statements issued for the task bookkeeping.
+    """
+
+    def __init__(self, task_id: str, flush_interval_ms: int = None):
+        self.task_id = task_id
+        if flush_interval_ms is None:
+            flush_interval_ms = settings.TASK_PROGRESS_FLUSH_INTERVAL_MS
+        self.flush_interval = flush_interval_ms / 1000
+        self.last_flush_time = time.monotonic()
+        self.push_steps = None
+        self.pending_pushes = 0
+        self.progress = None
+        self.db_statements = 0
+        self._task = None
+
+    @property
+    def task(self) -> Task:
+        if self._task is None:
+            self._task = Task.objects.select_related('user').get(id=self.task_id)
+            self.db_statements += 1
+        return self._task
+
+    def set_log_extra(self, v: Dict):
+        Task.objects.set_log_extra(self.task_id, v)
+        self.db_statements += 1
+        if self._task is not None:
+            self._task.log_extra = v
+
+    def set_failure_processed(self, v: bool):
+        Task.objects.set_failure_processed(self.task_id, v)
+        self.db_statements += 1
+        if self._task is not None:
+            self._task.failure_processed = v
+
+    def set_push_steps(self, value: int):
+        # pending pushes were made against previous number of steps
+        self.flush()
+        Task.objects.set_push_steps(self.task_id, value)
+        self.db_statements += 1
+        self.push_steps = value
+
+    def push(self):
+        self.pending_pushes += 1
+        self.flush_if_needed()
+
+    def update_progress(self, value: int):
+        self.progress = value
+        self.pending_pushes = 0
+        self.flush_if_needed()
+
+    def get_progress(self):
+        self.flush()
+        self.db_statements += 1
+        return Task.objects.get(id=self.task_id).progress
+
+    def flush_if_needed(self):
+        if time.monotonic() - self.last_flush_time >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self.last_flush_time = time.monotonic()
+        if self.progress is None and not self.pending_pushes:
+            return
+        push_steps = self.push_steps or self.task.push_steps or 1
+        # same integer step as Task.objects.push() adds in SQL
+        progress_increase = self.pending_pushes * (100 // push_steps)
+        is_sub_task = bool(self.task.is_sub_task())
+        if self.progress is not None:
+            Task.objects.update_progress(self.task_id, self.progress + progress_increase,
+                                         is_sub_task=is_sub_task)
+            self.db_statements += 1
+        elif progress_increase:
+            Task.objects.increase_progress(self.task_id, progress_increase,
+                                           is_sub_task=is_sub_task)
+            self.db_statements += 1
+        self.progress = None
+        self.pending_pushes = 0
+
+
 class ExtendedTask(app.Task):
     """
     Extended Task class, allows to log exceptions
@@ -160,14 +253,30 @@ class ExtendedTask(app.Task):
 
     WARNING:    Beware storing anything in the self fields of instances of this class.
                 Looks like they are reused and it is safer to store anything in self.request
+                or keyed by self.request.id (see execution_buffer).
     """
 
-    # We can't cache task field, because it should be always actual but we can cache some static values
-    _cached_data = None
+    @property
+    def execution_buffer(self) -> TaskExecutionBuffer:
+        task_id = self.request.id
+        buffers = getattr(self, '_execution_buffers', None)
+        if buffers is None:
+            buffers = self._execution_buffers = {}
+        buffer = buffers.get(task_id)
+        if buffer is None:
+            buffer = TaskExecutionBuffer(task_id)
+            if task_id is not None:
+                buffers[task_id] = buffer
+        return buffer
+
+    def release_execution_buffer(self, task_id):
+        buffer = (getattr(self, '_execution_buffers', None) or {}).pop(task_id, None)
+        if buffer is not None:
+            buffer.flush()
 
     @property
     def task(self) -> Task:
-        return Task.objects.get(id=self.request.id)
+        return self.execution_buffer.task
 
     @property
     def task_name(self) -> str:
@@ -179,7 +288,14 @@ class ExtendedTask(app.Task):
 
     @log_extra.setter
     def log_extra(self, v: Dict):
-        Task.objects.set_log_extra(self.request.id, v)
+        self.execution_buffer.set_log_extra(v)
+
+    @property
+    def db_statements(self) -> int:
+        """
+        Number of DB statements issued by this execution for logging and progress tracking.
+        """
+        return self.execution_buffer.db_statements
 
     def log_info(self, message, **kwargs):
         self.task.write_log(message, level='info', **kwargs)
@@ -193,28 +309,21 @@ class ExtendedTask(app.Task):
     def log_warn(self, message, **kwargs):
         self.task.write_log(message, level='warn', **kwargs)
 
-    def init_cache(self):
-        if not self._cached_data:
-            this_task = self.task
-            self._cached_data = dict()
-            self._cached_data['main_task_id'] = this_task.main_task_id
-
     @property
     def main_task_id(self):
-        self.init_cache()
-        return self._cached_data.get('main_task_id')
+        return self.task.main_task_id
 
     def set_push_steps(self, value: int):
-        Task.objects.set_push_steps(self.request.id, value)
+        self.execution_buffer.set_push_steps(value)
 
     def push(self):
-        Task.objects.push(self.request.id)
+        self.execution_buffer.push()
 
     def get_progress(self):
-        return Task.objects.get(id=self.request.id).progress
+        return self.execution_buffer.get_progress()
 
     def update_progress(self, value: float):
-        Task.objects.update_progress(self.request.id, int(value))
+        self.execution_buffer.update_progress(int(value))
 
     def _render_task_failed(self, args, kwargs, exc, exception_trace) -> str:
         if isinstance(exc, SoftTimeLimitExceeded):
@@ -280,9 +389,10 @@ class ExtendedTask(app.Task):
         """
         sub_tasks = []
         task_config = _get_or_create_task_config(sub_task_function)
+        offloader = PayloadOffloader()
         for index, args in enumerate(args_list):
             sub_task_signature = sub_task_function.subtask(
-                args=args,
+                args=offloader.offload_args(args),
                 source_data=source_data[index] if source_data is not None else self.task.source_data,
                 soft_time_limit=task_config.soft_time_limit,
                 root_id=self.main_task_id,
@@ -290,12 +400,16 @@ class ExtendedTask(app.Task):
                 title=sub_tasks_group_title)
             sub_tasks.append(sub_task_signature)
 
+        if offloader.offloaded_count:
+            self.log_info('{0}: {1} arguments ({2} bytes) passed through the cache'.format(
+                sub_tasks_group_title, offloader.offloaded_count, offloader.offloaded_bytes))
         self.chord(sub_tasks)
 
     def __call__(self, *args: Any, **kwargs: Any) -> Any:
         TaskUtils.prepare_task_execution()
         Task.objects.increase_run_count(self.request.id)
         try:
+            args, kwargs = resolve_args(args, kwargs)
             return super().__call__(*args, **kwargs)
         except Exception as exc:
             if isinstance(exc, Retry):
@@ -305,13 +419,18 @@ class ExtendedTask(app.Task):
                     '{0}\nGoing to retry in {1} seconds...'.format(task_failed_msg, exc.when))
             else:
                 self.log_error(self._render_task_failed(args, kwargs, exc, traceback.format_exc()))
-            Task.objects.set_failure_processed(self.request.id, True)
+            self.execution_buffer.set_failure_processed(True)
             raise exc
+        finally:
+            self.execution_buffer.flush()
 
     def on_failure(self, exc, task_id, args, kwargs, exc_traceback):
         if not self.task.failure_processed:
             self.log_error(self._render_task_failed(args, kwargs, exc, exc_traceback))
 
+    def after_return(self, status, retval, task_id, args, kwargs, einfo):
+        self.release_execution_buffer(task_id)
+
 
 @shared_task(base=ExtendedTask, bind=True, name='advanced_celery.end_chord')
 def end_chord(task: ExtendedTask, *args, **kwargs):
@@ -346,7 +465,7 @@ def call_task_func(task_func: Callable, task_args: Tuple,
 
     task.write_log('Celery task id: {}\n'.format(celery_task_id))
     task_config = _get_or_create_task_config(task_func)
-    task_func.apply_async(args=task_args,
+    task_func.apply_async(args=PayloadOffloader().offload_args(task_args),
                           task_id=celery_task_id,
                           soft_time_limit=task_config.soft_time_limit)
     return task.pk
@@ -392,7 +511,7 @@ def call_task(task_name, **options):
     async = options.pop('async', True)
     task_config = _get_or_create_task_config(task_class)
     if async:
-        task_class().apply_async(kwargs=options,
+        task_class().apply_async(kwargs=PayloadOffloader().offload_kwargs(options),
                                  task_id=celery_task_id,
                                  soft_time_limit=task_config.soft_time_limit)
     else:
@@ -475,39 +594,75 @@ class LoadDocuments(BaseTask):
             task.log_extra = {'log_document_name': uri}
             return LoadDocuments.create_document_local(task, fn, uri, kwargs)
 
+    @staticmethod
+    def save_text_units(text_units, get_properties=None):
+        """
+        Insert text units and, optionally, their properties in a single pass.
+        On PostgreSQL bulk_create() fetches primary keys with INSERT ... RETURNING,
+        so properties are built from the created objects without re-reading text units.
+        :param text_units: list of unsaved TextUnit objects
+        :param get_properties: callable(iterable of (pk, text)) -> list of TextUnitProperty
+        :return: number of created text unit properties
+        """
+        TextUnit.objects.bulk_create(text_units)
+        if get_properties is None:
+            return 0
+        text_unit_properties = get_properties(
+            (text_unit.pk, text_unit.text) for text_unit in text_units)
+        TextUnitProperty.objects.bulk_create(text_unit_properties)
+        return len(text_unit_properties)
+
     @staticmethod
     def save_extra_document_data(*args, **kwargs):
         pass
 
     @staticmethod
-    def try_parsing_with_tika(task: ExtendedTask, file_path, ext, original_file_name):
-        task.log_info('Trying TIKA for file: ' + original_file_name)
+    def parse_with_tika(file_path):
+        data = parser.from_file(file_path, settings.TIKA_SERVER_ENDPOINT) \
+            if settings.TIKA_SERVER_ENDPOINT else parser.from_file(file_path)
+        parsed = data['content']
+        # too small text means TIKA failed to parse the file
+        return parsed if parsed and len(parsed) >= 100 else None
+
+    @staticmethod
+    def parse_with_textract(file_path, ext):
+        return textract2text(file_path, ext=ext)
+
+    @staticmethod
+    def parse_tables(file_path):
+        document_tables = tabula.read_pdf(
+            file_path,
+            multiple_tables=True,
+            pages='all')
+        return [
+            [list(j) for j in list(i.fillna('').to_records(index=False)) if not i.empty]
+            for i in document_tables if not i.empty]
+
+    @staticmethod
+    def extract_text(task: ExtendedTask, file_path, ext, original_file_name):
+        """
+        Extract text with TIKA / Textract in the extraction pool processes.
+        Extractors are tried one by one (or raced, see DOCUMENT_EXTRACTION_RACE),
+        each one is terminated if it does not finish in its timeout.
+        :return: (text, parser name)
+        """
+        extractors = []
         if settings.TIKA_DISABLE:
             task.log_info('TIKA is disabled in config')
-            return None, None
-        try:
-            data = parser.from_file(file_path, settings.TIKA_SERVER_ENDPOINT) \
-                if settings.TIKA_SERVER_ENDPOINT else parser.from_file(file_path)
-            parsed = data['content']
-            if parsed and len(parsed) >= 100:
-                return parsed, 'tika'
-            else:
-                task.log_error('TIKA returned too small test for file: ' + original_file_name)
-                return None, None
-        except:
-            task.log_error('Caught exception while trying to parse file with Tika:{0}\n{1}'
-                           .format(original_file_name, format_exc()))
-            return None, None
+        else:
+            extractors.append(('tika', LoadDocuments.parse_with_tika, (file_path,)))
+        extractors.append(('textract', LoadDocuments.parse_with_textract, (file_path, ext)))
+        if ext in settings.TEXTRACT_FIRST_FOR_EXTENSIONS:
+            extractors.reverse()
 
-    @staticmethod
-    def try_parsing_with_textract(task: ExtendedTask, file_path, ext, original_file_name):
-        task.log_info('Trying Textract for file: ' + original_file_name)
-        try:
-            return textract2text(file_path, ext=ext), 'textract'
-        except:
-            task.log_info('Caught exception while trying to parse file with Textract: {0}\n{1}'
-                          .format(original_file_name, format_exc()))
-            return None, None
+        task.log_info('Trying {0} for file: {1}'.format(
+            ', '.join(name.upper() for name, _, _ in extractors), original_file_name))
+        return get_extraction_pool().first_result(
+            extractors,
+            race=settings.DOCUMENT_EXTRACTION_RACE,
+            log_error=lambda msg: task.log_error(
+                'Caught exception while trying to parse file: {0}\n{1}'
+                .format(original_file_name, msg)))
 
     @staticmethod
     def get_title(text):
@@ -528,9 +683,9 @@ class LoadDocuments(BaseTask):
             task.log_info('SKIP (EXISTS): ' + file_name)
             return
 
-        text = None  # type: str
         metadata = {}
         new_ui = kwargs.get('propagate_exception')
+        timer = StageTimer()
 
         _fn, ext = os.path.splitext(file_name)
         if not ext:
@@ -539,22 +694,12 @@ class LoadDocuments(BaseTask):
 
         ext = ext or ''
 
-        if ext in settings.TEXTRACT_FIRST_FOR_EXTENSIONS:
-            text, parser_name = LoadDocuments.try_parsing_with_textract(task, file_path, ext,
-                                                                        file_name)
-            if not text:
-                text, parser_name = LoadDocuments.try_parsing_with_tika(task, file_path, ext,
-                                                                        file_name)
-        else:
-            text, parser_name = LoadDocuments.try_parsing_with_tika(task, file_path, ext,
-                                                                    file_name)
-            if not text:
-                text, parser_name = LoadDocuments.try_parsing_with_textract(task, file_path,
-                                                                            ext, file_name)
-        if text is not None:
-            text = pre_process_document(text)
-            # TODO: migrate it in lexnlp if it works good
-            text = re.sub(r'<[\s/]*(?:[A-Za-z]+|[Hh]\d)[\s/]*>', '', text)
+        with timer.stage('parse'):
+            text, parser_name = LoadDocuments.extract_text(task, file_path, ext, file_name)
+            if text is not None:
+                text = pre_process_document(text)
+                # TODO: migrate it in lexnlp if it works good
+                text = re.sub(r'<[\s/]*(?:[A-Za-z]+|[Hh]\d)[\s/]*>', '', text)
 
         if not text:
             if new_ui:
@@ -564,6 +709,18 @@ class LoadDocuments(BaseTask):
 
         metadata['parsed_by'] = parser_name
 
+        # tables are extracted only on demand and only after the text: a document never holds
+        # an extraction pool slot while waiting for another one, otherwise concurrent
+        # documents (or a pool of 1 process) could wait for each other forever
+        if ext == '.pdf' and kwargs.get('detect_tables', settings.DOCUMENT_DETECT_TABLES):
+            with timer.stage('tables'):
+                try:
+                    metadata['tables'] = get_extraction_pool().start(
+                        'tables', LoadDocuments.parse_tables, (file_path,)).result()
+                except (ExtractionTimeout, ExtractionError) as e:
+                    task.log_error('Cannot extract tables from file: {0}\n{1}'
+                                   .format(file_name, e))
+
         # detect if document is contract
         if kwargs.get('detect_contract'):
             try:
@@ -573,19 +730,9 @@ class LoadDocuments(BaseTask):
             except ImportError:
                 task.log_warn('Cannot import lexnlp.extract.en.contracts.detector.is_contract')
 
-        # detect tables
-        # if kwargs.get('detect_tables') and ext == '.pdf':
-        if ext == '.pdf':
-            document_tables = tabula.read_pdf(
-                file_path,
-                multiple_tables=True,
-                pages='all')
-            metadata['tables'] = [
-                [list(j) for j in list(i.fillna('').to_records(index=False)) if not i.empty]
-                for i in document_tables if not i.empty]
-
         # Language identification
-        language, lang_detector = get_language(text, get_parser=True)
+        with timer.stage('language'):
+            language, lang_detector = get_language(text, get_parser=True)
         if language:
             task.log_info('Detected language: %s' % language.upper())
             task.log_info('Language detector: %s' % lang_detector.upper())
@@ -607,35 +754,37 @@ class LoadDocuments(BaseTask):
             pass
 
         with transaction.atomic():
-            # Create document object
-            document = Document.objects.create(
-                document_type=document_type,
-                name=document_name,
-                description=file_name,
-                source=document_source,
-                source_type=kwargs.get('source_type'),
-                source_path=file_name,
-                metadata=metadata,
-                language=language,
-                title=title,
-                file_size=file_size,
-                full_text=text)
-
-            task.log_extra['log_document_id'] = document.pk
-
-            try:
-                session = UploadSession.objects.get(pk=kwargs['metadata']['session_id'])
-                task.log_extra['log_upload_session'] = session.pk
-                document.upload_session = session
-                document.project = session.project
-                document.document_type = session.project.type
-                document.save()
-                task.log_info(message='Document Upload Session id={}'.format(session.pk))
-            except:
-                task.log_warn(message='Document Upload Session Undefined!')
-
-            if not document.project and kwargs.get('project_id'):
-                document.project = Project.objects.get(pk=kwargs['project_id'])
+            with timer.stage('db_write'):
+                # Create document object
+                document = Document.objects.create(
+                    document_type=document_type,
+                    name=document_name,
+                    description=file_name,
+                    source=document_source,
+                    source_type=kwargs.get('source_type'),
+                    source_path=file_name,
+                    metadata=metadata,
+                    language=language,
+                    title=title,
+                    file_size=file_size,
+                    full_text=text)
+
+                task.log_extra['log_document_id'] = document.pk
+
+                session = None
+                try:
+                    session = UploadSession.objects.get(pk=kwargs['metadata']['session_id'])
+                    task.log_extra['log_upload_session'] = session.pk
+                    document.upload_session = session
+                    document.project = session.project
+                    document.document_type = session.project.type
+                    document.save()
+                    task.log_info(message='Document Upload Session id={}'.format(session.pk))
+                except:
+                    task.log_warn(message='Document Upload Session Undefined!')
+
+                if not document.project and kwargs.get('project_id'):
+                    document.project = Project.objects.get(pk=kwargs['project_id'])
 
             # create Document Properties
             document_properties = [
@@ -646,21 +795,29 @@ class LoadDocuments(BaseTask):
                     key=k,
                     value=v) for k, v in metadata.items() if v]
 
-            polarity, subjectivity = TextBlob(text).sentiment
-            document_properties += [
-                DocumentProperty(
-                    created_by_id=kwargs['user_id'],
-                    modified_by_id=kwargs['user_id'],
-                    document_id=document.pk,
-                    key='polarity',
-                    value=str(round(polarity, 3))),
-                DocumentProperty(
-                    created_by_id=kwargs['user_id'],
-                    modified_by_id=kwargs['user_id'],
-                    document_id=document.pk,
-                    key='subjectivity',
-                    value=str(round(subjectivity, 3)))]
-            DocumentProperty.objects.bulk_create(document_properties)
+            # sentiment is either skipped, scored by a separate task or scored inline
+            skip_sentiment = kwargs.get('skip_sentiment') or (session and session.skip_sentiment)
+            score_sentiment_inline = not skip_sentiment and not settings.SENTIMENT_DEFERRED
+
+            if score_sentiment_inline:
+                with timer.stage('sentiment'):
+                    document_properties += ScoreSentiment.get_document_properties(
+                        document.pk, text, kwargs['user_id'])
+            with timer.stage('db_write'):
+                DocumentProperty.objects.bulk_create(document_properties)
+
+            with timer.stage('segmentation'):
+                paragraphs = list(segment_paragraphs(text))
+                sentence_spans = list(get_sentence_span_list(text))
+
+            # detect language of text units: re-detect only units which differ from document
+            with timer.stage('language'):
+                language_detector = DocumentLanguageDetector(text, language)
+                sentences = [text[span[0]:span[1]] for span in sentence_spans]
+                paragraph_languages = language_detector.get_languages(paragraphs)
+                sentence_languages = language_detector.get_languages(sentences)
+            task.log_info('Language re-detected for {0} of {1} text units'.format(
+                language_detector.redetected_count, len(paragraphs) + len(sentences)))
 
             # create text units
             paragraph_list = [TextUnit(
@@ -668,11 +825,12 @@ class LoadDocuments(BaseTask):
                 text=paragraph,
                 text_hash=hashlib.sha1(paragraph.encode("utf-8")).hexdigest(),
                 unit_type="paragraph",
-                language=get_language(paragraph)) for paragraph in segment_paragraphs(text)]
+                language=paragraph_language)
+                for paragraph, paragraph_language in zip(paragraphs, paragraph_languages)]
 
             sentence_list = []
-            for span in get_sentence_span_list(text):
-                sentence = text[span[0]:span[1]]
+            for span, sentence, sentence_language in zip(sentence_spans, sentences,
+                                                         sentence_languages):
                 text_unit = TextUnit(
                     document=document,
                     text=sentence,
@@ -680,33 +838,25 @@ class LoadDocuments(BaseTask):
                     location_end=span[1],
                     text_hash=hashlib.sha1(sentence.encode("utf-8")).hexdigest(),
                     unit_type="sentence",
-                    language=get_language(sentence))
+                    language=sentence_language)
                 sentence_list.append(text_unit)
 
-            document.paragraphs = len(paragraph_list)
-            document.sentences = len(sentence_list)
-            document.save()
-
-            TextUnit.objects.bulk_create(paragraph_list + sentence_list)
-
-            # store document language
-            if not document.language:
-                document.set_language_from_text_units()
-
-            # create Text Unit Properties
-            text_unit_properties = []
-            for pk, text in document.textunit_set.values_list('pk', 'text'):
-                polarity, subjectivity = TextBlob(text).sentiment
-                text_unit_properties += [
-                    TextUnitProperty(
-                        text_unit_id=pk,
-                        key='polarity',
-                        value=str(round(polarity))),
-                    TextUnitProperty(
-                        text_unit_id=pk,
-                        key='subjectivity',
-                        value=str(round(subjectivity)))]
-            TextUnitProperty.objects.bulk_create(text_unit_properties)
+            with timer.stage('db_write'):
+                document.paragraphs = len(paragraph_list)
+                document.sentences = len(sentence_list)
+                # store document language: the most common language of paragraphs
+                if not document.language and paragraph_languages:
+                    document.language = Counter(paragraph_languages).most_common(1)[0][0]
+                if skip_sentiment:
+                    # not scored by the periodic Score Sentiment run either
+                    document.metadata['skip_sentiment'] = True
+                document.save()
+
+            # create Text Units and their Properties
+            get_properties = ScoreSentiment.get_text_unit_properties \
+                if score_sentiment_inline else None
+            with timer.stage('db_write'):
+                LoadDocuments.save_text_units(paragraph_list + sentence_list, get_properties)
 
             # save extra document info
             kwargs['document'] = document
@@ -714,6 +864,7 @@ class LoadDocuments(BaseTask):
 
         task.log_info(message='LOADED (%s): %s' % (parser_name.upper(), file_name))
         task.log_info(message='Document pk: %d' % document.pk)
+        task.log_info(message='Stage timings: %s' % timer)
 
         # call post processing task
         linked_tasks = kwargs.get('linked_tasks', [])
@@ -728,29 +879,184 @@ class LoadDocuments(BaseTask):
         return json.dumps(ret) if ret else None
 
 
+class ScoreSentiment(BaseTask):
+    """
+    Score sentiment (TextBlob polarity and subjectivity) of Documents and their Text Units
+    which are not scored yet. Started periodically for all documents loaded meanwhile
+    unless skipped for their upload session or on loading, see SENTIMENT_DEFERRED
+    and score_sentiment_of_loaded_documents().
+    :param kwargs: document_id - (int) score this document only, otherwise all
+                                 unscored documents except skipped upload sessions
+                   user_id - (int) user creating document properties
+    :return:
+    """
+    name = 'Score Sentiment'
+
+    @staticmethod
+    def get_document_properties(document_id, text, user_id) -> List[DocumentProperty]:
+        polarity, subjectivity = TextBlob(text).sentiment
+        return [
+            DocumentProperty(
+                created_by_id=user_id,
+                modified_by_id=user_id,
+                document_id=document_id,
+                key='polarity',
+                value=str(round(polarity, 3))),
+            DocumentProperty(
+                created_by_id=user_id,
+                modified_by_id=user_id,
+                document_id=document_id,
+                key='subjectivity',
+                value=str(round(subjectivity, 3)))]
+
+    @staticmethod
+    def get_text_unit_properties(text_units) -> List[TextUnitProperty]:
+        """
+        :param text_units: iterable of (text unit id, text)
+        """
+        text_unit_properties = []
+        for pk, text in text_units:
+            polarity, subjectivity = TextBlob(text).sentiment
+            text_unit_properties += [
+                TextUnitProperty(
+                    text_unit_id=pk,
+                    key='polarity',
+                    value=str(round(polarity))),
+                TextUnitProperty(
+                    text_unit_id=pk,
+                    key='subjectivity',
+                    value=str(round(subjectivity)))]
+        return text_unit_properties
+
+    @staticmethod
+    def score_documents(document_ids, user_id=None):
+        """
+        Score given documents and their text units if they are not scored yet.
+        :return: number of scored text units
+        """
+        document_properties = []
+        for document_id, text in Document.objects \
+                .filter(pk__in=document_ids) \
+                .exclude(documentproperty__key='polarity') \
+                .values_list('pk', 'full_text'):
+            document_properties += ScoreSentiment.get_document_properties(
+                document_id, text or '', user_id)
+        text_unit_properties = ScoreSentiment.get_text_unit_properties(
+            TextUnit.objects
+                .filter(document_id__in=document_ids)
+                .exclude(textunitproperty__key='polarity')
+                .values_list('pk', 'text')
+                .iterator())
+        with transaction.atomic():
+            DocumentProperty.objects.bulk_create(document_properties)
+            TextUnitProperty.objects.bulk_create(text_unit_properties, batch_size=5000)
+        return len(text_unit_properties) // 2
+
+    @staticmethod
+    @shared_task(base=ExtendedTask,
+                 bind=True,
+                 soft_time_limit=3600,
+                 default_retry_delay=10,
+                 retry_backoff=True,
+                 autoretry_for=(SoftTimeLimitExceeded, InterfaceError, OperationalError,),
+                 max_retries=3)
+    def score_documents_task(task: ExtendedTask, document_ids, user_id):
+        count = ScoreSentiment.score_documents(document_ids, user_id)
+        task.log_info('Scored {0} text units of {1} documents'.format(count, len(document_ids)))
+
+    @staticmethod
+    def get_unscored_documents():
+        return Document.objects \
+            .exclude(documentproperty__key='polarity') \
+            .exclude(upload_session__skip_sentiment=True) \
+            .exclude(metadata__contains={'skip_sentiment': True})
+
+    def process(self, **kwargs):
+        if kwargs.get('document_id'):
+            documents = Document.objects.exclude(documentproperty__key='polarity') \
+                .filter(pk=kwargs['document_id'])
+        else:
+            documents = self.get_unscored_documents()
+
+        # group documents into batches of about SENTIMENT_BATCH_SIZE text units
+        batches = []
+        batch = []
+        batch_size = 0
+        for pk, paragraphs, sentences in documents.order_by('pk') \
+                .values_list('pk', 'paragraphs', 'sentences'):
+            batch.append(pk)
+            batch_size += paragraphs + sentences
+            if batch_size >= settings.SENTIMENT_BATCH_SIZE:
+                batches.append(batch)
+                batch = []
+                batch_size = 0
+        if batch:
+            batches.append(batch)
+
+        if len(batches) > 1:
+            self.log_info('Scoring {0} batches of documents'.format(len(batches)))
+            self.run_sub_tasks('Score Sentiment Of Documents',
+                               ScoreSentiment.score_documents_task,
+                               [(batch, kwargs.get('user_id')) for batch in batches])
+            return
+
+        self.set_push_steps(1)
+        if batches:
+            count = self.score_documents(batches[0], kwargs.get('user_id'))
+            self.log_info('Scored {0} text units of {1} documents'.format(count,
+                                                                         len(batches[0])))
+        self.push()
+
+
+@app.task(name='advanced_celery.score_sentiment_of_loaded_documents', bind=True)
+def score_sentiment_of_loaded_documents(self):
+    """
+    Start one batched Score Sentiment task for all documents loaded and not scored yet
+    instead of a task per loaded document, unless the previous one is not completed.
+    """
+    TaskUtils.prepare_task_execution()
+    if not settings.SENTIMENT_DEFERRED:
+        return
+    running_since = now() - datetime.timedelta(seconds=settings.SENTIMENT_TASK_EXPIRE_SECONDS)
+    if Task.objects.filter(name=ScoreSentiment.name, completed=False,
+                           date_start__gt=running_since).exists():
+        return
+    if ScoreSentiment.get_unscored_documents().exists():
+        call_task(ScoreSentiment.name)
+
+
 class UpdateElasticsearchIndex(BaseTask):
     """
     Update Elasticsearch Index: each time after new documents are added
     """
     name = 'Update Elasticsearch Index'
 
-    def elastic_index(self, es: Elasticsearch, tu: TextUnit):
-        es_doc = {
-            'pk': tu.pk,
-            'text': tu.text,
-            'document': tu.document.pk,
-            'unit_type': tu.unit_type,
-            'language': tu.language,
-            'text_hash': tu.text_hash
-        }
-        es.index(index=settings.ELASTICSEARCH_CONFIG['index'], doc_type='text_unit', id=tu.pk,
-                 body=es_doc)
+    # AppVar storing the max id of indexed text units - used by incremental updates
+    LAST_INDEXED_TEXT_UNIT_APP_VAR = 'elasticsearch_last_indexed_text_unit_id'
+
+    @staticmethod
+    def elastic_index_actions(es_index: str, text_units):
+        for pk, text, document_id, unit_type, language, text_hash in text_units:
+            yield {
+                '_index': es_index,
+                '_type': 'text_unit',
+                '_id': pk,
+                '_source': {
+                    'pk': pk,
+                    'text': text,
+                    'document': document_id,
+                    'unit_type': unit_type,
+                    'language': language,
+                    'text_hash': text_hash
+                }
+            }
 
     def process(self, **kwargs):
         self.set_push_steps(1)
         es = Elasticsearch(hosts=settings.ELASTICSEARCH_CONFIG['hosts'])
 
         es_index = settings.ELASTICSEARCH_CONFIG['index']
+        chunk_size = kwargs.get('chunk_size') or settings.ELASTICSEARCH_INDEX_CHUNK_SIZE
 
         try:
             es.indices.create(index=es_index)
@@ -758,14 +1064,34 @@ class UpdateElasticsearchIndex(BaseTask):
         except RequestError:
             self.log_info('Index already exists: {0}'.format(es_index))
 
+        text_units = TextUnit.objects.all()
+        if kwargs.get('incremental'):
+            last_indexed = AppVar.get(self.LAST_INDEXED_TEXT_UNIT_APP_VAR)
+            if last_indexed and last_indexed.value:
+                text_units = text_units.filter(pk__gt=last_indexed.value)
+                self.log_info('Indexing text units with id > {0}'.format(last_indexed.value))
+
+        # fix upper bound to not miss text units created while indexing
+        max_text_unit_id = text_units.aggregate(max_id=Max('pk'))['max_id']
+        if max_text_unit_id is None:
+            self.log_info('No text units to index.')
+            self.push()
+            return
+
+        text_units = text_units.filter(pk__lte=max_text_unit_id).order_by('pk').values_list(
+            'pk', 'text', 'document_id', 'unit_type', 'language', 'text_hash')
+
         count = 0
-        for tu in TextUnit.objects.iterator():
-            self.elastic_index(es, tu)
+        for _ok, _result in streaming_bulk(es,
+                                           self.elastic_index_actions(es_index,
+                                                                      text_units.iterator()),
+                                           chunk_size=chunk_size):
             count += 1
-            if count % 100 == 0:
+            if count % (chunk_size * 10) == 0:
                 self.log_info('Indexing text units: {0} done'.format(count))
-        self.log_info('Finished indexing text units. Refreshing ES index.')
+        self.log_info('Finished indexing {0} text units. Refreshing ES index.'.format(count))
         es.indices.refresh(index=es_index)
+        AppVar.set(self.LAST_INDEXED_TEXT_UNIT_APP_VAR, max_text_unit_id)
         self.log_info('Done')
         self.push()
 
@@ -930,27 +1256,35 @@ class Locate(BaseTask):
         geoentity=['GeoEntityUsage', 'GeoAliasUsage']
     )
 
-    def delete_existing_usages(self, locator_names, document_id):
-        # delete ThingUsage and TextUnitTag(tag=thing)
-        for locator_name in locator_names:
-            usage_model_names = self.usage_model_map.get(
-                locator_name,
-                [locator_name.title() + 'Usage'])
-            for usage_model_name in usage_model_names:
-                usage_model = getattr(extract_models, usage_model_name)
-                usage_model_objects = usage_model.objects.all()
-                if document_id:
-                    usage_model_objects = usage_model_objects.filter(
-                        text_unit__document_id=document_id)
-                deleted = usage_model_objects.delete()
-                self.log_info('Deleted {} {} objects'.format(
-                    deleted[0], usage_model_name))
-            tag_objects = TextUnitTag.objects.filter(tag=locator_name)
-            if document_id:
-                tag_objects = tag_objects.filter(text_unit__document_id=document_id)
-            tags_deleted = tag_objects.delete()
-            self.log_info('Deleted {} TextUnitTag(tag={})'.format(
-                tags_deleted[0], locator_name))
+    @classmethod
+    def get_usage_models(cls, locator_name) -> List:
+        usage_model_names = cls.usage_model_map.get(
+            locator_name,
+            [locator_name.title() + 'Usage'])
+        return [getattr(extract_models, usage_model_name)
+                for usage_model_name in usage_model_names]
+
+    def delete_existing_usages(self, locator_names, document_id, truncate=False):
+        """
+        Delete ThingUsage and TextUnitTag(tag=thing) with set-based SQL.
+        :param truncate: TRUNCATE usage tables if locating in all documents
+        """
+        document_ids = [document_id] if document_id else None
+        usage_models = [usage_model for locator_name in locator_names
+                        for usage_model in self.get_usage_models(locator_name)]
+        with transaction.atomic():
+            if truncate and document_ids is None and usage_models:
+                truncate_usages(usage_models)
+                self.log_info('Truncated {} tables'.format(
+                    ', '.join(usage_model.__name__ for usage_model in usage_models)))
+            else:
+                for usage_model in usage_models:
+                    deleted = delete_usages(usage_model, document_ids)
+                    self.log_info('Deleted {} {} objects'.format(deleted, usage_model.__name__))
+            for locator_name in locator_names:
+                tags_deleted = delete_usages(TextUnitTag, document_ids, tag=locator_name)
+                self.log_info('Deleted {} TextUnitTag(tag={})'.format(
+                    tags_deleted, locator_name))
 
     def process(self, **kwargs):
 
@@ -980,7 +1314,7 @@ class Locate(BaseTask):
         do_delete = [i for i in do_delete if i in available_locators]
 
         # delete ThingUsage and TextUnitTag(tag=thing)
-        self.delete_existing_usages(do_delete, document_id)
+        self.delete_existing_usages(do_delete, document_id, kwargs.get('truncate', False))
 
         # interrupt if no items to locate
         if not locate:
@@ -1002,21 +1336,14 @@ class Locate(BaseTask):
         self.log_info('Locate in [{}].'.format(locate_in))
         self.log_info('Found {0} Text Units.'.format(text_units.count()))
 
-        locate_args = []
-        text_unit_package = []
-        text_unit_packages = []
-
-        for text_unit_id in text_units.values_list('pk', flat=True):
-            if not text_unit_id:
-                continue
-            if settings.TEXT_UNITS_TO_PARSE_PACKAGE_SIZE <= len(text_unit_package):
-                text_unit_packages.append(text_unit_package)
-                text_unit_package = []
-            text_unit_package.append(text_unit_id)
-
-        if len(text_unit_package) > 0:
-            text_unit_packages.append(text_unit_package)
+        packer = LocatePacker(Locate.parse_text_units.name, locate)
+        text_unit_packages = packer.pack(
+            text_units.annotate(text_length=Length('text')).values_list('pk', 'text_length'))
+        self.log_info('Split Text Units into {0} packages of ~{1} characters '
+                      '({2:.0f} characters per second).'.format(
+                          len(text_unit_packages), packer.target_chars, packer.chars_per_second))
 
+        locate_args = []
         for text_unit_package in text_unit_packages:
             locate_args.append((text_unit_package, kwargs['user_id'], locate))
 
@@ -1051,10 +1378,14 @@ class Locate(BaseTask):
                  max_retries=3
                  )
     def parse_text_units(self: ExtendedTask, text_unit_ids, user_id, locate):
-        tags = []
-        self.set_push_steps(len(locate) + 1)
+        start = time.time()
+        self.set_push_steps(len(locate) + 2)
         text_units = TextUnit.objects.filter(pk__in=text_unit_ids).values_list('pk', 'text', 'language')
         text_units = list(text_units)
+        # tokens, stems etc. are computed once per text unit for all locators
+        analyses = [TextUnitAnalysis(text, text_unit_lang)
+                    for _, text, text_unit_lang in text_units]
+        usage_writer = UsageWriter(user_id=user_id)
         for task_name, task_kwargs in locate.items():
             self.push()
             func_name = 'parse_%s' % task_name
@@ -1063,349 +1394,247 @@ class Locate(BaseTask):
             except AttributeError:
                 self.log_error('Warning: "%s" method not found' % func_name)
                 continue
+            usage_models = Locate.get_usage_models(task_name)
 
-            for text_unit_id, text, text_unit_lang in text_units:
+            for (text_unit_id, text, text_unit_lang), analysis in zip(text_units, analyses):
                 found = None
                 try:
-                    found = task_func(text, text_unit_id, text_unit_lang, **task_kwargs)
+                    found = task_func(text, text_unit_id, text_unit_lang, analysis, **task_kwargs)
                 except IntegrityError as e:
                     # just skip if duplicated values BUT keep log to investigate issue
                     if 'duplicate key value violates unique constraint' in str(e):
                         self.log_error('Function "%s" caused error:' % func_name)
                         self.log_error(str(e))
                         continue
+                # locators returning unsaved usages are written by the usage writer,
+                # the others (returning bool) store their usages themselves
+                if isinstance(found, list):
+                    usage_writer.add(usage_models, text_unit_id, found)
                 if found:
-                    tag_name = found if not isinstance(found, bool) else task_name
-                    tags.append((text_unit_id, tag_name))
-        if tags:
-            for text_unit_id, tag in tags:
-                TextUnitTag.objects.get_or_create(
-                    text_unit_id=text_unit_id,
-                    tag=tag,
-                    defaults=dict(user_id=user_id))
-
-
-def parse_amount(text, text_unit_id, _text_unit_lang):
-    found = list(amounts.get_amounts(text, return_sources=True, extended_sources=False))
-    AmountUsage.objects.filter(text_unit_id=text_unit_id).delete()
-    if found:
-        unique = set(found)
-        AmountUsage.objects.bulk_create(
-            [AmountUsage(
-                text_unit_id=text_unit_id,
-                amount=item[0],
-                amount_str=item[1][:300] if item[1] else None,
-                count=found.count(item)
-            ) for item in unique])
-    return bool(found)
-
-
-def parse_citation(text, text_unit_id, _text_unit_lang):
-    found = list(citations.get_citations(text, return_source=True))
-    CitationUsage.objects.filter(text_unit_id=text_unit_id).delete()
-    if found:
-        unique = set(found)
-        unique_len = len(unique)
-        for item in unique:
-            try:
-                CitationUsage.objects.create(
-                    text_unit_id=text_unit_id,
-                    volume=item[0],
-                    reporter=item[1],
-                    reporter_full_name=item[2],
-                    page=item[3],
-                    page2=item[4],
-                    court=item[5],
-                    year=item[6],
-                    citation_str=item[7],
-                    count=found.count(item))
-            except DataError:
-                unique_len -= 1
-        return bool(unique_len)
-    return False
-
-
-def parse_court(text, text_unit_id, text_unit_lang, **kwargs):
-    court_config = DbCache.get_court_config()
-    found = [dict_entities.get_entity_id(i[0])
-             for i in courts.get_courts(text,
-                                        court_config_list=court_config,
-                                        text_languages=[text_unit_lang])]
-    CourtUsage.objects.filter(text_unit_id=text_unit_id).delete()
-    if found:
-        unique = set(found)
-        CourtUsage.objects.bulk_create(
-            [CourtUsage(
-                text_unit_id=text_unit_id,
-                court_id=court_id,
-                count=found.count(court_id)
-            ) for court_id in unique])
-    return bool(found)
-
-
-def parse_distance(text, text_unit_id, _text_unit_lang):
-    found = list(distances.get_distances(text, return_sources=True))
-    DistanceUsage.objects.filter(text_unit_id=text_unit_id).delete()
-    if found:
-        unique = set(found)
-        DistanceUsage.objects.bulk_create(
-            [DistanceUsage(
-                text_unit_id=text_unit_id,
-                amount=item[0],
-                amount_str=item[2],
-                distance_type=item[1],
-                count=found.count(item)
-            ) for item in unique])
-    return bool(found)
-
-
-def parse_date(text, text_unit_id, _text_unit_lang, **kwargs):
+                    tag_name = found if isinstance(found, str) else task_name
+                    usage_writer.add_tag(text_unit_id, tag_name)
+        party_usages = usage_writer.usages.get(PartyUsage)
+        if party_usages:
+            get_party_resolver().resolve_usages(party_usages)
+        usage_writer.save()
+        LocatePacker.record_timing(self.request.id, locate,
+                                   sum(len(text) for _, text, _ in text_units),
+                                   time.time() - start)
+        self.push()
+
+
+def parse_amount(text, text_unit_id, _text_unit_lang, _analysis):
+    found = Counter(amounts.get_amounts(text, return_sources=True, extended_sources=False))
+    return [AmountUsage(
+        text_unit_id=text_unit_id,
+        amount=item[0],
+        amount_str=item[1][:300] if item[1] else None,
+        count=count
+    ) for item, count in found.items()]
+
+
+def parse_citation(text, text_unit_id, _text_unit_lang, _analysis):
+    found = Counter(citations.get_citations(text, return_source=True))
+    usages = [CitationUsage(
+        text_unit_id=text_unit_id,
+        volume=item[0],
+        reporter=item[1],
+        reporter_full_name=item[2],
+        page=item[3],
+        page2=item[4],
+        court=item[5],
+        year=item[6],
+        citation_str=item[7],
+        count=count) for item, count in found.items()]
+    # skip citations not fitting the columns instead of failing the bulk insert
+    return [usage for usage in usages if fits_fields(usage)]
+
+
+def parse_court(text, text_unit_id, text_unit_lang, analysis: TextUnitAnalysis, **kwargs):
+    court_config = DbCache.get_court_matcher().get_candidates(text, analysis.entity_tokens)
+    if not court_config:
+        return []
+    found = Counter(dict_entities.get_entity_id(i[0])
+                    for i in courts.get_courts(text,
+                                               court_config_list=court_config,
+                                               text_languages=[text_unit_lang]))
+    return [CourtUsage(
+        text_unit_id=text_unit_id,
+        court_id=court_id,
+        count=count
+    ) for court_id, count in found.items()]
+
+
+def parse_distance(text, text_unit_id, _text_unit_lang, _analysis):
+    found = Counter(distances.get_distances(text, return_sources=True))
+    return [DistanceUsage(
+        text_unit_id=text_unit_id,
+        amount=item[0],
+        amount_str=item[2],
+        distance_type=item[1],
+        count=count
+    ) for item, count in found.items()]
+
+
+def parse_date(text, text_unit_id, _text_unit_lang, _analysis, **kwargs):
     found = dates.get_dates_list(
         text,
         strict=kwargs.get('strict', False),
         return_source=False)
-    DateUsage.objects.filter(text_unit_id=text_unit_id).delete()
-    if found:
-        unique = set([i.date() if isinstance(i, datetime.datetime) else i for i in found])
-        DateUsage.objects.bulk_create(
-            [DateUsage(
-                text_unit_id=text_unit_id,
-                date=item,
-                count=found.count(item)
-            ) for item in unique])
-    return bool(found)
-
-
-def parse_definition(text, text_unit_id, _text_unit_lang):
-    found = list(definitions.get_definitions(text))
-    DefinitionUsage.objects.filter(text_unit_id=text_unit_id).delete()
-    if found:
-        unique = set(found)
-        DefinitionUsage.objects.bulk_create(
-            [DefinitionUsage(
-                text_unit_id=text_unit_id,
-                definition=item,
-                count=found.count(item)
-            ) for item in unique])
-    return bool(found)
-
-
-def parse_duration(text, text_unit_id, _text_unit_lang):
-    found = list(durations.get_durations(text, return_sources=True))
-    DateDurationUsage.objects.filter(text_unit_id=text_unit_id).delete()
-    if found:
-        unique = set(found)
-        DateDurationUsage.objects.bulk_create(
-            [DateDurationUsage(
-                text_unit_id=text_unit_id,
-                amount=item[1],
-                amount_str=item[3],
-                duration_type=item[0],
-                duration_days=item[2],
-                count=found.count(item)
-            ) for item in unique])
-    return bool(found)
-
-
-def parse_currency(text, text_unit_id, _text_unit_lang):
-    found = list(money.get_money(text, return_sources=True))
-    CurrencyUsage.objects.filter(text_unit_id=text_unit_id).delete()
-    if found:
-        unique = set(found)
-        CurrencyUsage.objects.bulk_create(
-            [CurrencyUsage(
-                text_unit_id=text_unit_id,
-                amount=item[0],
-                amount_str=item[2],
-                currency=item[1],
-                count=found.count(item)
-            ) for item in unique])
-    return bool(found)
-
-
-def parse_party(text, text_unit_id, _text_unit_lang):
+    found = Counter(i.date() if isinstance(i, datetime.datetime) else i for i in found)
+    return [DateUsage(
+        text_unit_id=text_unit_id,
+        date=item,
+        count=count
+    ) for item, count in found.items()]
+
+
+def parse_definition(text, text_unit_id, _text_unit_lang, _analysis):
+    found = Counter(definitions.get_definitions(text))
+    return [DefinitionUsage(
+        text_unit_id=text_unit_id,
+        definition=item,
+        count=count
+    ) for item, count in found.items()]
+
+
+def parse_duration(text, text_unit_id, _text_unit_lang, _analysis):
+    found = Counter(durations.get_durations(text, return_sources=True))
+    return [DateDurationUsage(
+        text_unit_id=text_unit_id,
+        amount=item[1],
+        amount_str=item[3],
+        duration_type=item[0],
+        duration_days=item[2],
+        count=count
+    ) for item, count in found.items()]
+
+
+def parse_currency(text, text_unit_id, _text_unit_lang, _analysis):
+    found = Counter(money.get_money(text, return_sources=True))
+    return [CurrencyUsage(
+        text_unit_id=text_unit_id,
+        amount=item[0],
+        amount_str=item[2],
+        currency=item[1],
+        count=count
+    ) for item, count in found.items()]
+
+
+def parse_party(text, text_unit_id, _text_unit_lang, _analysis):
+    """
+    Party ids are resolved for the whole package of text units
+    by PartyResolver.resolve_usages() before the usages are saved.
+    """
     found = list(get_companies(text, count_unique=True, detail_type=True, name_upper=True))
-    PartyUsage.objects.filter(text_unit_id=text_unit_id).delete()
-    if found:
-        pu_list = []
-        for _party in found:
-            name, _type, type_abbr, type_label, type_desc, count = _party
-            defaults = dict(
-                type=_type,
-                type_label=type_label,
-                type_description=type_desc
-            )
-            party, _ = Party.objects.get_or_create(
-                name=name,
-                type_abbr=type_abbr or '',
-                defaults=defaults
-            )
-            pu_list.append(
-                PartyUsage(text_unit_id=text_unit_id,
-                           party=party,
-                           count=count))
-        PartyUsage.objects.bulk_create(pu_list)
-    return bool(found)
-
-
-def parse_percent(text, text_unit_id, _text_unit_lang):
-    found = list(percents.get_percents(text, return_sources=True))
-    PercentUsage.objects.filter(text_unit_id=text_unit_id).delete()
-    if found:
-        unique = set(found)
-        PercentUsage.objects.bulk_create(
-            [PercentUsage(
-                text_unit_id=text_unit_id,
-                amount=item[1],
-                amount_str=item[3],
-                unit_type=item[0],
-                total=item[2],
-                count=found.count(item)
-            ) for item in unique])
-    return bool(found)
-
-
-def parse_ratio(text, text_unit_id, _text_unit_lang):
-    found = list(ratios.get_ratios(text, return_sources=True))
-    RatioUsage.objects.filter(text_unit_id=text_unit_id).delete()
-    if found:
-        unique = set(found)
-        RatioUsage.objects.bulk_create(
-            [RatioUsage(
-                text_unit_id=text_unit_id,
-                amount=item[0],
-                amount2=item[1],
-                amount_str=item[3],
-                total=item[2],
-                count=found.count(item)
-            ) for item in unique])
-    return bool(found)
-
-
-def parse_regulation(text, text_unit_id, _text_unit_lang):
-    found = list(regulations.get_regulations(text))
-    RegulationUsage.objects.filter(text_unit_id=text_unit_id).delete()
-    if found:
-        unique = set(found)
-        RegulationUsage.objects.bulk_create(
-            [RegulationUsage(
-                text_unit_id=text_unit_id,
-                regulation_type=item[0],
-                regulation_name=item[1],
-                count=found.count(item)
-            ) for item in unique])
-    return bool(found)
-
-
-def parse_copyright(text, text_unit_id, _text_unit_lang):
-    found = list(copyright.get_copyright(text, return_sources=True))
-    CopyrightUsage.objects.filter(text_unit_id=text_unit_id).delete()
-    if found:
-        unique = set(found)
-        CopyrightUsage.objects.bulk_create(
-            [CopyrightUsage(
-                text_unit_id=text_unit_id,
-                year=item[1],
-                name=item[2][:200],
-                copyright_str=item[3][:200],
-                count=found.count(item)
-            ) for item in unique if len(item[2]) < 100])
-    return bool(found)
-
-
-def parse_trademark(text, text_unit_id, _text_unit_lang):
-    found = list(trademarks.get_trademarks(text))
-    TrademarkUsage.objects.filter(text_unit_id=text_unit_id).delete()
-    if found:
-        unique = set(found)
-        TrademarkUsage.objects.bulk_create(
-            [TrademarkUsage(
-                text_unit_id=text_unit_id,
-                trademark=item,
-                count=found.count(item)
-            ) for item in unique])
-    return bool(found)
-
-
-def parse_url(text, text_unit_id, _text_unit_lang):
-    found = list(urls.get_urls(text))
-    UrlUsage.objects.filter(text_unit_id=text_unit_id).delete()
-    if found:
-        unique = set(found)
-        UrlUsage.objects.bulk_create(
-            [UrlUsage(
-                text_unit_id=text_unit_id,
-                source_url=item,
-                count=found.count(item)
-            ) for item in unique])
-    return bool(found)
-
-
-def parse_geoentity(text, text_unit_id, text_unit_lang, **kwargs):
-    geo_config = DbCache.get_geo_config()
+    pu_list = []
+    for _party in found:
+        name, _type, type_abbr, type_label, type_desc, count = _party
+        usage = PartyUsage(text_unit_id=text_unit_id, count=count)
+        usage.party_key = (name, type_abbr or '')
+        usage.party_defaults = dict(
+            type=_type,
+            type_label=type_label,
+            type_description=type_desc
+        )
+        pu_list.append(usage)
+    return pu_list
+
+
+def parse_percent(text, text_unit_id, _text_unit_lang, _analysis):
+    found = Counter(percents.get_percents(text, return_sources=True))
+    return [PercentUsage(
+        text_unit_id=text_unit_id,
+        amount=item[1],
+        amount_str=item[3],
+        unit_type=item[0],
+        total=item[2],
+        count=count
+    ) for item, count in found.items()]
+
+
+def parse_ratio(text, text_unit_id, _text_unit_lang, _analysis):
+    found = Counter(ratios.get_ratios(text, return_sources=True))
+    return [RatioUsage(
+        text_unit_id=text_unit_id,
+        amount=item[0],
+        amount2=item[1],
+        amount_str=item[3],
+        total=item[2],
+        count=count
+    ) for item, count in found.items()]
+
+
+def parse_regulation(text, text_unit_id, _text_unit_lang, _analysis):
+    found = Counter(regulations.get_regulations(text))
+    return [RegulationUsage(
+        text_unit_id=text_unit_id,
+        regulation_type=item[0],
+        regulation_name=item[1],
+        count=count
+    ) for item, count in found.items()]
+
+
+def parse_copyright(text, text_unit_id, _text_unit_lang, _analysis):
+    found = Counter(copyright.get_copyright(text, return_sources=True))
+    return [CopyrightUsage(
+        text_unit_id=text_unit_id,
+        year=item[1],
+        name=item[2][:200],
+        copyright_str=item[3][:200],
+        count=count
+    ) for item, count in found.items() if len(item[2]) < 100]
+
+
+def parse_trademark(text, text_unit_id, _text_unit_lang, _analysis):
+    found = Counter(trademarks.get_trademarks(text))
+    return [TrademarkUsage(
+        text_unit_id=text_unit_id,
+        trademark=item,
+        count=count
+    ) for item, count in found.items()]
+
+
+def parse_url(text, text_unit_id, _text_unit_lang, _analysis):
+    found = Counter(urls.get_urls(text))
+    return [UrlUsage(
+        text_unit_id=text_unit_id,
+        source_url=item,
+        count=count
+    ) for item, count in found.items()]
+
+
+def parse_geoentity(text, text_unit_id, text_unit_lang, analysis: TextUnitAnalysis, **kwargs):
+    geo_config = DbCache.get_geo_matcher().get_candidates(text, analysis.entity_tokens)
+    if not geo_config:
+        return []
     priority = kwargs.get('priority', True)
     entity_alias_pairs = list(geoentities.get_geoentities(text,
                                                           geo_config,
                                                           text_languages=[text_unit_lang],
                                                           priority=priority))
 
-    GeoEntityUsage.objects.filter(text_unit_id=text_unit_id).delete()
-    GeoAliasUsage.objects.filter(text_unit_id=text_unit_id).delete()
-    entity_ids = [dict_entities.get_entity_id(entity) for entity, _alias in entity_alias_pairs]
-    if entity_ids:
-        unique = set(entity_ids)
-        GeoEntityUsage.objects.bulk_create([
-            GeoEntityUsage(
-                text_unit_id=text_unit_id,
-                entity_id=idd,
-                count=entity_ids.count(idd)) for idd in unique])
-
-    alias_ids = [dict_entities.get_alias_id(alias) for _entity, alias in entity_alias_pairs]
-    if alias_ids:
-        unique = set(alias_ids)
-        GeoAliasUsage.objects.bulk_create([
-            GeoAliasUsage(
-                text_unit_id=text_unit_id,
-                alias_id=idd,
-                count=alias_ids.count(idd)) for idd in unique if idd])
-
-    return bool(entity_ids)
-
-
-def parse_term(text, text_unit_id, _text_unit_lang, **kwargs):
-    term_stems = DbCache.get_term_config()
-    text_stems = ' %s ' % ' '.join(get_stems(text, lowercase=True))
-    text_tokens = get_token_list(text, lowercase=True)
-    term_usages = []
-    for stemmed_term, data in term_stems.items():
-        # stem not found in text
-        if stemmed_term not in text_stems:
-            continue
-        # if stem has 1 variant only
-        if data['length'] == 1:
-            count = text_stems.count(stemmed_term)
-            if count:
-                term_data = list(data['values'][0])
-                term_data.append(count)
-                term_usages.append(term_data)
-        # case when f.e. stem "respons" is equal to multiple terms
-        # ["response", "responsive", "responsibility"]
-        else:
-            for term_data in data['values']:
-                term_data = list(term_data)
-                count = text_tokens.count(term_data[0])
-                if count:
-                    term_data.append(count)
-                    term_usages.append(term_data)
-                    # TODO: "responsibilities"
-
-    TermUsage.objects.filter(text_unit_id=text_unit_id).delete()
-    TermUsage.objects.bulk_create([
-        TermUsage(
+    entity_ids = Counter(dict_entities.get_entity_id(entity)
+                         for entity, _alias in entity_alias_pairs)
+    alias_ids = Counter(dict_entities.get_alias_id(alias)
+                        for _entity, alias in entity_alias_pairs)
+    return [GeoEntityUsage(
+        text_unit_id=text_unit_id,
+        entity_id=idd,
+        count=count) for idd, count in entity_ids.items()] + \
+        [GeoAliasUsage(
             text_unit_id=text_unit_id,
-            term_id=pk,
-            count=count) for _, pk, count in term_usages])
-    return bool(term_usages)
+            alias_id=idd,
+            count=count) for idd, count in alias_ids.items() if idd]
+
+
+def parse_term(text, text_unit_id, _text_unit_lang, analysis: TextUnitAnalysis, **kwargs):
+    term_matcher = DbCache.get_term_matcher()
+    term_usages = term_matcher.get_term_usages(analysis.stems, analysis.tokens)
+    return [TermUsage(
+        text_unit_id=text_unit_id,
+        term_id=pk,
+        count=count) for _, pk, count in term_usages]
 
 
 # sample of custom task
@@ -2043,6 +2272,40 @@ class Similarity(BaseTask):
     n_features = 100
     self_name_len = 3
     step = 2000
+    bulk_create_batch_size = 5000
+
+    ENGINE_EXACT = 'exact'
+    ENGINE_LSH = 'lsh'
+
+    def get_similar_pairs(self, X, similarity_threshold, engine):
+        """
+        Find pairs of rows of X with cosine similarity >= similarity_threshold (0-100).
+        "exact" compares all pairs block by block,
+        "lsh" compares only candidate pairs sharing a random-hyperplane LSH band.
+        """
+        threshold = similarity_threshold / 100
+        if engine == self.ENGINE_LSH:
+            return CosineLSH(max_block_size=self.step).similar_pairs(X, threshold)
+        return exact_similar_pairs(X, threshold, step=self.step)
+
+    def save_similar_pairs(self, model, field_a, field_b, pks, pairs):
+        """
+        Store found pairs in both directions with bulk_create.
+        """
+        created = 0
+        batch = []
+        for i, j, similarity in pairs:
+            similarity = round(min(similarity, 1) * 100, 2)
+            for pk_a, pk_b in ((pks[i], pks[j]), (pks[j], pks[i])):
+                batch.append(model(**{field_a: pk_a, field_b: pk_b, 'similarity': similarity}))
+            if len(batch) >= self.bulk_create_batch_size:
+                model.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch)
+            created += len(batch)
+        return created
 
     def process(self, **kwargs):
         """
@@ -2054,18 +2317,19 @@ class Similarity(BaseTask):
         search_similar_documents = kwargs['search_similar_documents']
         search_similar_text_units = kwargs['search_similar_text_units']
         similarity_threshold = kwargs['similarity_threshold']
+        engine = kwargs.get('engine') or self.ENGINE_EXACT
         self.log_info('Min similarity: %d' % similarity_threshold)
+        self.log_info('Engine: %s' % engine)
 
         # get text units with min length 100 signs
         text_units = TextUnit.objects.filter(unit_type='paragraph',
                                              text__regex=r'.{100}.*')
-        len_tu_set = text_units.count()
 
         push_steps = 0
         if search_similar_documents:
             push_steps += 4
         if search_similar_text_units:
-            push_steps += math.ceil(len_tu_set / self.step) ** 2 + 3
+            push_steps += 4
         self.set_push_steps(push_steps)
 
         # similar Documents
@@ -2077,8 +2341,10 @@ class Similarity(BaseTask):
             self.push()
 
             # step #2 - prepare data
-            texts_set = ['\n'.join(d.textunit_set.values_list('text', flat=True))
-                         for d in Document.objects.all()]
+            pks, texts_set = [], []
+            for document in Document.objects.all():
+                pks.append(document.pk)
+                texts_set.append('\n'.join(document.textunit_set.values_list('text', flat=True)))
             self.push()
 
             # step #3
@@ -2089,21 +2355,10 @@ class Similarity(BaseTask):
             self.push()
 
             # step #4
-            similarity_matrix = cosine_similarity(X) * 100
-            pks = Document.objects.values_list('pk', flat=True)
-            for x, document_a in enumerate(pks):
-                # use it to search for unique a<>b relations
-                # for y, document_b in enumerate(Document.objects.all()[x + 1:], start=x + 1):
-                for y, document_b in enumerate(pks):
-                    if document_a == document_b:
-                        continue
-                    similarity = similarity_matrix[x, y]
-                    if similarity < similarity_threshold:
-                        continue
-                    DocumentSimilarity.objects.create(
-                        document_a_id=document_a,
-                        document_b_id=document_b,
-                        similarity=similarity)
+            created = self.save_similar_pairs(
+                DocumentSimilarity, 'document_a_id', 'document_b_id', pks,
+                self.get_similar_pairs(X, similarity_threshold, engine))
+            self.log_info('Created %d DocumentSimilarity objects' % created)
             self.push()
 
         # similar Text Units
@@ -2127,22 +2382,11 @@ class Similarity(BaseTask):
             self.push()
 
             # step #4
-            for i in range(0, len_tu_set, self.step):
-                for j in range(0, len_tu_set, self.step):
-                    similarity_matrix = cosine_similarity(
-                        X[i:min([i + self.step, len_tu_set])],
-                        X[j:min([j + self.step, len_tu_set])]) * 100
-                    for g in range(similarity_matrix.shape[0]):
-                        tu_sim = [
-                            TextUnitSimilarity(
-                                text_unit_a_id=pks[i + g],
-                                text_unit_b_id=pks[j + h],
-                                similarity=similarity_matrix[g, h])
-                            for h in range(similarity_matrix.shape[1]) if i + g != j + h and
-                                                                          similarity_matrix[
-                                                                              g, h] >= similarity_threshold]
-                        TextUnitSimilarity.objects.bulk_create(tu_sim)
-                    self.push()
+            created = self.save_similar_pairs(
+                TextUnitSimilarity, 'text_unit_a_id', 'text_unit_b_id', pks,
+                self.get_similar_pairs(X, similarity_threshold, engine))
+            self.log_info('Created %d TextUnitSimilarity objects' % created)
+            self.push()
 
 
 @shared_task(name='advanced_celery.clean_tasks')
@@ -2286,6 +2530,7 @@ class TotalCleanup(BaseTask):
 
 # Register all load tasks
 app.register_task(LoadDocuments())
+app.register_task(ScoreSentiment())
 app.register_task(LoadTerms())
 app.register_task(LoadGeoEntities())
 app.register_task(LoadCourts())
@@ -23,6 +23,36 @@
     or shipping ContraxSuite within a closed source product.
 """
 # -*- coding: utf-8 -*-
+
+# Standard imports
+import json
+import os
+from unittest.mock import patch
+
+# Third-party imports
+import nltk.data
+from lexnlp.nlp.en.tokens import get_stems, get_token_list
+
+# Django imports
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+# Project imports
+from apps.document.models import Document, TextUnit, TextUnitProperty, TextUnitTag
+from apps.extract.models import CitationUsage, Party
+from apps.task.models import Task
+from apps.task.tasks import ExtendedTask, LoadDocuments
+from apps.task.utils.locate_packer import LocatePacker
+from apps.task.utils.nlp.text_analysis import TextUnitAnalysis
+from apps.task.utils.party_resolver import PartyResolver
+from apps.task.utils.text.segment import SENTENCE_TOKENIZER_PRETRAINED, \
+    reset_sentence_tokenizer, segment_paragraphs, segment_paragraphs_by_lines, \
+    segment_sentences, store_sentence_tokenizer, train_sentence_tokenizer
+from apps.task.utils.usage_writer import UsageWriter, delete_usages
+from apps.task.views import SimilarityView
+from apps.users.models import Role, User
+
 __author__ = "ContraxSuite, LLC; LexPredict, LLC"
 __copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
 __license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
@@ -30,5 +60,228 @@ __version__ = "1.1.4"
 __maintainer__ = "LexPredict, LLC"
 __email__ = "support@contraxsuite.com"
 
-# from django.test import TestCase
-# TODO: English unit tests.
+TESTS_DATA_DIR = os.path.join(os.path.dirname(__file__), 'tests_data')
+
+
+class LoggingTask(ExtendedTask):
+    name = 'test.logging_task'
+
+    def run(self, lines: int):
+        self.set_push_steps(10)
+        for i in range(lines):
+            self.log_info('Line {0}'.format(i))
+            if i % (lines // 10) == 0:
+                self.push()
+
+
+class ExtendedTaskBufferTest(TestCase):
+    MAX_DB_STATEMENTS = 10
+
+    def test_logging_task_db_statements(self):
+        task = Task.objects.create(name=LoggingTask.name)
+
+        with CaptureQueriesContext(connection) as queries:
+            LoggingTask().apply(args=(1000,), task_id=task.id)
+
+        self.assertLessEqual(len(queries), self.MAX_DB_STATEMENTS)
+        task.refresh_from_db()
+        self.assertEqual(task.own_progress, 100)
+
+
+class SaveTextUnitsTest(TestCase):
+    SENTENCES = 5000
+
+    @staticmethod
+    def get_properties(text_units):
+        return [TextUnitProperty(text_unit_id=pk, key='length', value=str(len(text)))
+                for pk, text in text_units]
+
+    def test_save_text_units_single_pass(self):
+        document = Document.objects.create(name='sentences.txt')
+        text_units = [TextUnit(document=document,
+                               text='Sentence number {0}.'.format(i),
+                               unit_type='sentence')
+                      for i in range(self.SENTENCES)]
+
+        with CaptureQueriesContext(connection) as queries:
+            count = LoadDocuments.save_text_units(text_units, self.get_properties)
+
+        # one INSERT ... RETURNING for text units and one INSERT for properties
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(count, self.SENTENCES)
+        self.assertEqual(TextUnitProperty.objects
+                         .filter(text_unit__document=document).count(), self.SENTENCES)
+
+
+class SegmentParagraphsTest(TestCase):
+    def test_golden_file(self):
+        # keep line breaks as is: \r\n and whitespace-only lines are a part of the sample
+        with open(os.path.join(TESTS_DATA_DIR, 'paragraphs_sample.txt'),
+                  encoding='utf-8', newline='') as f:
+            text = f.read()
+        with open(os.path.join(TESTS_DATA_DIR, 'paragraphs_sample.json'),
+                  encoding='utf-8') as f:
+            paragraphs = json.load(f)
+
+        self.assertEqual(segment_paragraphs(text), paragraphs)
+        self.assertEqual(segment_paragraphs_by_lines(text), paragraphs)
+
+    def test_edge_cases(self):
+        for text in ('', '\n', 'a', 'a\n\n', 'a:\n\nb', 'a:\n\n\nb',
+                     ' \n:\n \n\r\n', 'a\rb\x0cc'):
+            self.assertEqual(segment_paragraphs(text), segment_paragraphs_by_lines(text))
+
+
+class SegmentSentencesTest(TestCase):
+    def setUp(self):
+        with open(os.path.join(TESTS_DATA_DIR, 'legal_sample.txt'), encoding='utf-8') as f:
+            self.text = f.read()
+
+    def tearDown(self):
+        reset_sentence_tokenizer()
+
+    def test_pretrained_tokenizer_golden_file(self):
+        # default path: no stored tokenizer, the process-cached NLTK pretrained one is used;
+        # the golden file is output of the former per-call trained tokenizer (adaptive=True)
+        try:
+            nltk.data.load(SENTENCE_TOKENIZER_PRETRAINED)
+        except LookupError:
+            self.skipTest('NLTK punkt data is not installed')
+        with open(os.path.join(TESTS_DATA_DIR, 'legal_sample_sentences.json'),
+                  encoding='utf-8') as f:
+            sentences = json.load(f)
+        reset_sentence_tokenizer()
+
+        self.assertEqual(segment_sentences(self.text, adaptive=True), sentences)
+        self.assertEqual(segment_sentences(self.text), sentences)
+
+    def test_stored_tokenizer_boundaries(self):
+        store_sentence_tokenizer(train_sentence_tokenizer([self.text]))
+
+        self.assertEqual(segment_sentences(self.text),
+                         segment_sentences(self.text, adaptive=True))
+        for paragraph in segment_paragraphs(self.text):
+            self.assertEqual(segment_sentences(paragraph),
+                             segment_sentences(paragraph, adaptive=True))
+
+
+class UsageWriterTest(TestCase):
+    PACKAGE_SIZE = 100
+    # DELETE and INSERT of citations, INSERT of tags, savepoint statements
+    MAX_DB_STATEMENTS = 5
+
+    def citation(self, text_unit_id, volume=1):
+        return CitationUsage(text_unit_id=text_unit_id, volume=volume, reporter='U.S.',
+                             page=1, citation_str='{0} U.S. 1'.format(volume), count=1)
+
+    def test_package_db_statements(self):
+        document = Document.objects.create(name='citations.txt')
+        TextUnit.objects.bulk_create(
+            [TextUnit(document=document, text='Text unit', unit_type='sentence')
+             for _ in range(self.PACKAGE_SIZE)])
+        text_unit_ids = list(document.textunit_set.values_list('pk', flat=True))
+        # tagged by a previous run
+        TextUnitTag.objects.create(text_unit_id=text_unit_ids[0], tag='citation')
+
+        usage_writer = UsageWriter()
+        for text_unit_id in text_unit_ids:
+            usage_writer.add([CitationUsage], text_unit_id,
+                             [self.citation(text_unit_id), self.citation(text_unit_id, 2)])
+            usage_writer.add_tag(text_unit_id, 'citation')
+            usage_writer.add_tag(text_unit_id, 'citation')
+
+        with CaptureQueriesContext(connection) as queries:
+            created = usage_writer.save()
+
+        self.assertLessEqual(len(queries), self.MAX_DB_STATEMENTS)
+        tag_table = TextUnitTag._meta.db_table
+        self.assertEqual(sum(1 for query in queries
+                             if query['sql'].startswith('INSERT INTO "{0}"'.format(tag_table))), 1)
+        self.assertEqual(created['CitationUsage'], 2 * self.PACKAGE_SIZE)
+        self.assertEqual(created['TextUnitTag'], self.PACKAGE_SIZE - 1)
+        self.assertEqual(TextUnitTag.objects.filter(tag='citation').count(), self.PACKAGE_SIZE)
+
+    def test_delete_usages(self):
+        text_unit_ids = []
+        for name in ('deleted.txt', 'kept.txt'):
+            document = Document.objects.create(name=name)
+            text_unit = TextUnit.objects.create(document=document, text='Text unit',
+                                                unit_type='paragraph')
+            self.citation(text_unit.pk).save()
+            TextUnitTag.objects.create(text_unit=text_unit, tag='citation')
+            TextUnitTag.objects.create(text_unit=text_unit, tag='date')
+            text_unit_ids.append(text_unit.pk)
+        deleted_document_id = TextUnit.objects.get(pk=text_unit_ids[0]).document_id
+
+        self.assertEqual(delete_usages(CitationUsage, [deleted_document_id]), 1)
+        self.assertEqual(delete_usages(TextUnitTag, [deleted_document_id], tag='citation'), 1)
+        self.assertEqual(list(CitationUsage.objects.values_list('text_unit_id', flat=True)),
+                         text_unit_ids[1:])
+        self.assertEqual(TextUnitTag.objects.count(), 3)
+        self.assertEqual(delete_usages(CitationUsage), 1)
+
+
+class LocatePackerTest(TestCase):
+    TASK_NAME = 'Locate.parse_text_units'
+
+    def test_pack_by_chars(self):
+        packer = LocatePacker(self.TASK_NAME, ['date'], target_seconds=10, max_text_units=4,
+                              chars_per_second=100)
+        text_units = [(1, 600), (2, 500), (3, 1000), (4, 10), (5, 10), (6, 10), (7, 10),
+                      (8, 10), (9, 300)]
+        self.assertEqual(packer.pack(text_units), [[1, 2], [3], [4, 5, 6, 7], [8, 9]])
+
+    def test_learn_chars_per_second(self):
+        for chars, seconds in ((1000, 1), (3000, 1)):
+            task = Task.objects.create(name=self.TASK_NAME)
+            LocatePacker.record_timing(task.pk, ['party', 'date'], chars, seconds)
+        other_task = Task.objects.create(name=self.TASK_NAME,
+                                         metadata={'args': [1], 'options': {'a': 1}})
+        LocatePacker.record_timing(other_task.pk, ['term'], 100, 1)
+
+        self.assertEqual(LocatePacker(self.TASK_NAME, ['date', 'party']).chars_per_second, 2000)
+        # metadata of the task itself is kept
+        other_task.refresh_from_db()
+        self.assertEqual(other_task.metadata['args'], [1])
+        self.assertEqual(other_task.metadata['options'], {'a': 1})
+
+
+class PartyResolverTest(TestCase):
+    def test_resolve_several_insert_batches(self):
+        existing = Party.objects.create(name='Existing 100% Corp', type_abbr='corp')
+        parties = {('Party {0}'.format(n), 'llc'): dict(type='LLC') for n in range(25)}
+        parties[('Existing 100% Corp', 'corp')] = dict(type='Corporation')
+        resolver = PartyResolver()
+        resolver.INSERT_BATCH_SIZE = 10
+
+        ids = resolver.resolve(parties)
+
+        self.assertEqual(Party.objects.count(), 26)
+        self.assertEqual(ids[('Existing 100% Corp', 'corp')], existing.pk)
+        self.assertEqual(ids, {(name, type_abbr): pk for name, type_abbr, pk in
+                               Party.objects.values_list('name', 'type_abbr', 'pk')})
+
+
+class TextUnitAnalysisTest(TestCase):
+
+    def test_same_as_lexnlp(self):
+        with open(os.path.join(TESTS_DATA_DIR, 'legal_sample.txt')) as f:
+            text = f.read()
+        analysis = TextUnitAnalysis(text)
+        self.assertEqual(analysis.tokens, get_token_list(text, lowercase=True))
+        self.assertEqual(analysis.stems, list(get_stems(text, lowercase=True)))
+        self.assertIs(analysis.stems, analysis.stems)
+
+
+class SimilarityViewTest(TestCase):
+    def test_post_without_engine(self):
+        role = Role.objects.create(name='Manager', code='manager', order=1, is_manager=True)
+        request = RequestFactory().post('/', {'search_similar_documents': 'on',
+                                              'similarity_threshold': 75})
+        request.user = User.objects.create(username='similarity_manager', role=role)
+
+        with patch('apps.task.views.call_task') as call_task:
+            response = SimilarityView.as_view()(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(call_task.call_args[1]['engine'])
@@ -0,0 +1,230 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# -*- coding: utf-8 -*-
+
+"""
+Run text / table extractors (tika, textract, tabula) in separate processes
+with per-extractor timeouts.
+
+Each extractor call runs in its own forked process, so a hanging or leaking
+extractor can be terminated on timeout without affecting the Celery worker.
+The number of simultaneously running extractor processes is bounded per
+worker process by DOCUMENT_EXTRACTION_MAX_PROCESSES.
+"""
+
+# Standard imports
+import multiprocessing
+import threading
+import time
+from multiprocessing.connection import wait
+from traceback import format_exc
+from typing import Callable, List, Tuple
+
+# Project imports
+import settings
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+class ExtractionError(Exception):
+    pass
+
+
+def _run_job(conn, func, args):
+    try:
+        conn.send((True, func(*args)))
+    except BaseException:
+        conn.send((False, format_exc()))
+    finally:
+        conn.close()
+
+
+class ExtractionJob:
+    """
+    Extractor call running in a child process.
+    """
+
+    def __init__(self, pool: 'ExtractionPool', name: str, func: Callable, args, timeout: float):
+        self.pool = pool
+        self.name = name
+        self.timeout = timeout
+        self.start_time = time.time()
+        self.conn, child_conn = pool.context.Pipe(duplex=False)
+        self.process = pool.context.Process(target=_run_job, args=(child_conn, func, args),
+                                            daemon=True)
+        self.process.start()
+        child_conn.close()
+        self._closed = False
+
+    @property
+    def time_left(self):
+        return max(0, self.timeout - (time.time() - self.start_time))
+
+    def result(self):
+        """
+        Wait for the extractor result.
+        Raise ExtractionTimeout if the extractor did not finish in time
+        and ExtractionError if it failed.
+        """
+        try:
+            if not self.conn.poll(self.time_left):
+                raise ExtractionTimeout('{0} did not finish in {1}s'.format(self.name,
+                                                                            self.timeout))
+            try:
+                ok, value = self.conn.recv()
+            except EOFError:
+                raise ExtractionError('{0} process exited unexpectedly'.format(self.name))
+            if not ok:
+                raise ExtractionError(value)
+            return value
+        finally:
+            self.close()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.conn.close()
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+        self.pool.semaphore.release()
+
+
+class ExtractionPool:
+    """
+    Bounded pool of extractor processes.
+    """
+
+    def __init__(self, max_processes: int) -> None:
+        self.semaphore = threading.BoundedSemaphore(max_processes)
+        # extractors and their args are inherited by forked processes - no pickling needed
+        self.context = multiprocessing.get_context('fork')
+
+    def start(self, name: str, func: Callable, args=(), timeout: float = None,
+              block: bool = True) -> ExtractionJob:
+        """
+        Start extractor in a new process.
+        If the pool is full wait for a free slot or, if block is False, return None.
+        Do not wait for a slot while holding a not closed job of the pool:
+        slots are released by their owners only, so it may wait forever.
+        """
+        timeout = timeout or settings.DOCUMENT_EXTRACTION_TIMEOUTS.get(name) \
+            or settings.DOCUMENT_EXTRACTION_DEFAULT_TIMEOUT
+        if not self.semaphore.acquire(blocking=block):
+            return None
+        try:
+            return ExtractionJob(self, name, func, args, timeout)
+        except BaseException:
+            self.semaphore.release()
+            raise
+
+    def first_result(self, extractors: List[Tuple[str, Callable, tuple]],
+                     is_valid: Callable = None, race: bool = False, log_error: Callable = None):
+        """
+        Return (result, extractor name) of the first extractor which returned a valid result.
+        If race is False extractors are tried one by one in the given order (fallback),
+        otherwise they are started at once (as many as there are free slots in the pool,
+        the rest are tried afterwards as fallback) and the first finished valid result wins.
+        Return (None, None) if no extractor succeeded.
+        :param extractors: list of (name, func, args)
+        :param is_valid: result check, by default - result is not empty
+        :param log_error: callable taking error message
+        """
+        is_valid = is_valid or bool
+        if race and len(extractors) > 1:
+            result, name, extractors = self._race(extractors, is_valid, log_error)
+            if name:
+                return result, name
+
+        for name, func, args in extractors:
+            try:
+                result = self.start(name, func, args).result()
+            except (ExtractionTimeout, ExtractionError) as e:
+                if log_error:
+                    log_error('{0} failed: {1}'.format(name, e))
+                continue
+            if is_valid(result):
+                return result, name
+        return None, None
+
+    def _race(self, extractors, is_valid, log_error):
+        """
+        Return (result, name, extractors which were not started).
+        """
+        jobs = []
+        not_started = []
+        for name, func, args in extractors:
+            # the first job waits for a free slot, the rest are started only if there is one
+            job = self.start(name, func, args, block=not jobs)
+            if job:
+                jobs.append(job)
+            else:
+                not_started.append((name, func, args))
+        try:
+            pending = {job.conn: job for job in jobs}
+            while pending:
+                timeout = max(job.time_left for job in pending.values())
+                ready = wait(list(pending.keys()), timeout)
+                if not ready:
+                    if log_error:
+                        log_error('{0} did not finish in time'.format(
+                            ', '.join(job.name for job in pending.values())))
+                    break
+                for conn in ready:
+                    job = pending.pop(conn)
+                    try:
+                        result = job.result()
+                    except (ExtractionTimeout, ExtractionError) as e:
+                        if log_error:
+                            log_error('{0} failed: {1}'.format(job.name, e))
+                        continue
+                    if is_valid(result):
+                        return result, job.name, []
+            return None, None, not_started
+        finally:
+            for job in jobs:
+                job.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_extraction_pool() -> ExtractionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ExtractionPool(settings.DOCUMENT_EXTRACTION_MAX_PROCESSES)
+        return _pool
@@ -0,0 +1,161 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# -*- coding: utf-8 -*-
+
+# Standard imports
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Django imports
+from django.conf import settings
+from django.db import connection
+
+# Project imports
+from apps.task.models import Task
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+class LocatePacker:
+    """
+    Splits text units to locate into packages (Locate sub-tasks) which take about
+    LOCATE_PACKAGE_TARGET_SECONDS each instead of a fixed number of text units.
+    Package size is measured in characters; the number of characters per second
+    is learned from the timings which previous sub-tasks locating the same items
+    recorded in their Task.metadata, see record_timing().
+    """
+    # Task.metadata key of the timing; the rest of metadata is used by the task itself
+    METADATA_KEY = 'locate_timing'
+
+    def __init__(self,
+                 task_name: str,
+                 locate: Iterable[str],
+                 target_seconds: float = None,
+                 max_text_units: int = None,
+                 chars_per_second: float = None):
+        """
+        :param task_name: name of the sub-task recording timings
+        :param locate: names of the locators run by the sub-tasks
+        :param target_seconds: desired duration of a sub-task, 0 - fixed size packages
+        of TEXT_UNITS_TO_PARSE_PACKAGE_SIZE text units
+        :param max_text_units: max number of text units in a package
+        :param chars_per_second: locating speed, learned from previous runs if not set
+        """
+        self.task_name = task_name
+        self.locate_key = self.get_locate_key(locate)
+        self.target_seconds = settings.LOCATE_PACKAGE_TARGET_SECONDS \
+            if target_seconds is None else target_seconds
+        self.max_text_units = max_text_units or settings.LOCATE_PACKAGE_MAX_TEXT_UNITS
+        self.chars_per_second = chars_per_second or self.learn_chars_per_second() \
+            or settings.LOCATE_DEFAULT_CHARS_PER_SECOND
+
+    @staticmethod
+    def get_locate_key(locate: Iterable[str]) -> str:
+        return ','.join(sorted(locate))
+
+    @property
+    def target_chars(self) -> int:
+        return max(1, int(self.chars_per_second * self.target_seconds))
+
+    @staticmethod
+    def record_timing(task_id: str, locate: Iterable[str], chars: int, seconds: float):
+        """
+        Store the processing time of a package in the sub-task metadata.
+        The timing is merged into the metadata in one UPDATE: other keys
+        (e.g. args / options of run_after_sub_tasks) are kept.
+        """
+        timing = {LocatePacker.METADATA_KEY: {
+            'locate': LocatePacker.get_locate_key(locate),
+            'chars': chars,
+            'seconds': seconds}}
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE \"{0}\" SET metadata = CASE WHEN jsonb_typeof(metadata) = 'object' "
+                "THEN metadata ELSE '{{}}'::jsonb END || %s::jsonb "
+                "WHERE id = %s".format(Task._meta.db_table),
+                [json.dumps(timing), task_id])
+
+    def get_timings(self) -> List[Dict]:
+        """
+        Get timings recorded by the latest sub-tasks locating the same items.
+        """
+        return [metadata[self.METADATA_KEY] for metadata in Task.objects
+                .filter(name=self.task_name,
+                        metadata__contains={self.METADATA_KEY: {'locate': self.locate_key}})
+                .order_by('-date_start')
+                .values_list('metadata', flat=True)[:settings.LOCATE_TIMINGS_HISTORY_SIZE]]
+
+    def learn_chars_per_second(self) -> Optional[float]:
+        chars = seconds = 0
+        for timing in self.get_timings():
+            if timing.get('chars') and timing.get('seconds'):
+                chars += timing['chars']
+                seconds += timing['seconds']
+        return chars / seconds if seconds else None
+
+    def pack(self, text_units: Iterable[Tuple[int, int]]) -> List[List[int]]:
+        """
+        Split text units into packages.
+        :param text_units: (text unit id, text length) pairs
+        :return: lists of text unit ids
+        """
+        if not self.target_seconds:
+            return self.pack_by_count(text_units, settings.TEXT_UNITS_TO_PARSE_PACKAGE_SIZE)
+        target_chars = self.target_chars
+        packages = []
+        package = []
+        package_chars = 0
+        for text_unit_id, text_length in text_units:
+            if not text_unit_id:
+                continue
+            package.append(text_unit_id)
+            package_chars += text_length or 0
+            if package_chars >= target_chars or len(package) >= self.max_text_units:
+                packages.append(package)
+                package = []
+                package_chars = 0
+        if package:
+            packages.append(package)
+        return packages
+
+    @staticmethod
+    def pack_by_count(text_units: Iterable[Tuple[int, int]], package_size: int) -> List[List[int]]:
+        packages = []
+        package = []
+        for text_unit_id, _ in text_units:
+            if not text_unit_id:
+                continue
+            if package_size <= len(package):
+                packages.append(package)
+                package = []
+            package.append(text_unit_id)
+        if package:
+            packages.append(package)
+        return packages
@@ -0,0 +1,153 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# -*- coding: utf-8 -*-
+
+# Standard imports
+import copy
+from typing import List
+
+# Third-party imports
+from lexnlp.extract.en import dict_entities
+
+# Project imports
+from apps.task.utils.nlp.term_matcher import get_writable_node
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+# trie node key holding entity indexes; tokens are strings so None never collides
+TERMINAL = None
+
+
+class EntityAliasMatcher:
+    """
+    Token trie built over normalized aliases of lexnlp dict_entities configs
+    (geo entities, courts). Finds entities which may be mentioned in a text
+    in one pass over its tokens instead of scanning the text once per each alias.
+    Matching is case- and language-insensitive, so candidates are a superset
+    of what lexnlp finds; lexnlp does the final matching over candidates only.
+    """
+
+    def __init__(self, entity_config: List):
+        """
+        :param entity_config: list of dict_entities.entity_config() tuples
+        """
+        self.entities = []
+        # entity id -> index in entities
+        self.entity_indexes = {}
+        self.trie = {}
+        self.aliases_count = 0
+        for entity in entity_config:
+            self.add_entity(entity)
+
+    @staticmethod
+    def get_tokens(text: str) -> List[str]:
+        return dict_entities.normalize_text(text).lower().split()
+
+    def patched(self, added: List, removed: List) -> 'EntityAliasMatcher':
+        """
+        Get a new matcher with entities removed / added; this matcher is not changed
+        and can be used by other threads meanwhile. Only trie nodes on the paths
+        of added aliases are copied, other nodes are shared.
+        :param added: list of entity configs
+        :param removed: list of entity ids
+        """
+        matcher = copy.copy(self)
+        matcher.entities = list(self.entities)
+        matcher.entity_indexes = dict(self.entity_indexes)
+        matcher.trie = dict(self.trie)
+        own_nodes = {id(matcher.trie)}
+        for entity_id in removed:
+            matcher.remove_entity(entity_id)
+        for entity in added:
+            matcher.add_entity(entity, own_nodes)
+        return matcher
+
+    def add_entity(self, entity, own_nodes: set = None):
+        """
+        Add an entity config and index its aliases; an entity with the same id
+        should be removed first, otherwise the entity is not added.
+        :param own_nodes: ids of trie nodes which may be changed in place, see patched();
+        None - all nodes
+        """
+        entity_id = dict_entities.get_entity_id(entity)
+        if entity_id in self.entity_indexes:
+            return
+        index = len(self.entities)
+        self.entities.append(entity)
+        self.entity_indexes[entity_id] = index
+        for alias in dict_entities.get_entity_aliases(entity):
+            tokens = self.get_tokens(dict_entities.get_alias_text(alias))
+            if not tokens:
+                continue
+            if own_nodes is None:
+                node = self.trie
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                node.setdefault(TERMINAL, set()).add(index)
+            else:
+                node = get_writable_node(self.trie, tokens, own_nodes)
+                # replaced, not changed: the set may be shared with another matcher
+                node[TERMINAL] = node.get(TERMINAL, set()) | {index}
+            self.aliases_count += 1
+
+    def remove_entity(self, entity_id):
+        """
+        Remove an entity config by entity id; its trie entries are left
+        in place and skipped by get_candidates().
+        Changes entities list in place, see patched().
+        """
+        index = self.entity_indexes.pop(entity_id, None)
+        if index is None:
+            return
+        entity = self.entities[index]
+        self.entities[index] = None
+        self.aliases_count -= len(dict_entities.get_entity_aliases(entity))
+
+    def get_candidates(self, text: str, tokens: List[str] = None) -> List:
+        """
+        Get entities having an alias which token sequence occurs in the text.
+        :param text: text unit text
+        :param tokens: get_tokens(text) if already computed
+        :return: list of entity configs, in the order of the source config
+        """
+        if tokens is None:
+            tokens = self.get_tokens(text)
+        indexes = set()
+        for start in range(len(tokens)):
+            node = self.trie
+            for pos in range(start, len(tokens)):
+                node = node.get(tokens[pos])
+                if node is None:
+                    break
+                terminal = node.get(TERMINAL)
+                if terminal:
+                    indexes.update(terminal)
+        return [self.entities[index] for index in sorted(indexes)
+                if self.entities[index] is not None]
@@ -23,6 +23,11 @@
     or shipping ContraxSuite within a closed source product.
 """
 # -*- coding: utf-8 -*-
+# Standard imports
+import re
+from collections import Counter
+from typing import List
+
 # Tika and langid imports
 import langid.langid
 import tika.language
@@ -95,3 +100,65 @@ def get_language(input_buffer, get_parser=False, encoding="utf-8"):
         return lang, parser
 
     return lang
+
+
+class DocumentLanguageDetector:
+    """
+    Detect language of text units of one document without running
+    the language identifier on every unit.
+
+    The document language is detected once. Each unit is then scored by
+    the share of its character trigrams found among the most frequent trigrams
+    of the document (its "profile"). Units written in the document language
+    have roughly the same share as the document itself, units scoring below
+    OUTLIER_RATIO of the document share are re-detected with langid
+    (each distinct text once), the rest get the document language.
+    """
+    NGRAM_SIZE = 3
+    PROFILE_SIZE = 300
+    OUTLIER_RATIO = 0.6
+    # shorter units are not scored - langid is unreliable on them anyway
+    MIN_UNIT_LENGTH = 40
+
+    re_non_letters = re.compile(r'[\W\d_]+')
+
+    def __init__(self, text: str, language: str = None) -> None:
+        self.language = language or get_language(text)
+        document_ngrams = self.get_ngrams(text)
+        self.profile = {ngram for ngram, _ in document_ngrams.most_common(self.PROFILE_SIZE)}
+        self.document_score = self.get_score(document_ngrams)
+        self.redetected_count = 0
+
+    def get_ngrams(self, text: str) -> Counter:
+        text = self.re_non_letters.sub(' ', text.lower())
+        n = self.NGRAM_SIZE
+        return Counter(text[i:i + n] for i in range(len(text) - n + 1))
+
+    def get_score(self, ngrams: Counter) -> float:
+        total = sum(ngrams.values())
+        if not total:
+            return 0
+        return sum(count for ngram, count in ngrams.items() if ngram in self.profile) / total
+
+    def is_outlier(self, text: str) -> bool:
+        if not self.language:
+            return True
+        if len(text) < self.MIN_UNIT_LENGTH:
+            return False
+        return self.get_score(self.get_ngrams(text)) < self.document_score * self.OUTLIER_RATIO
+
+    def get_languages(self, texts: List[str]) -> List[str]:
+        """
+        Get language of each text in texts.
+        """
+        languages = [self.language] * len(texts)
+        outliers = {}
+        for i, text in enumerate(texts):
+            if self.is_outlier(text):
+                outliers.setdefault(text, []).append(i)
+        for text, indexes in outliers.items():
+            language = get_language_langid(text) or self.language
+            for i in indexes:
+                languages[i] = language
+            self.redetected_count += len(indexes)
+        return languages
@@ -0,0 +1,159 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# -*- coding: utf-8 -*-
+# Standard imports
+from typing import Generator, Tuple
+
+# Third-party imports
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize as normalize_rows
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+SimilarPair = Tuple[int, int, float]
+
+
+def _block_similar_pairs(X, rows_a: np.ndarray, rows_b: np.ndarray,
+                         threshold: float) -> Generator[SimilarPair, None, None]:
+    """
+    Yield (i, j, similarity) for i < j from one block of cosine similarities.
+    :param X: l2-normalized vectors
+    :param rows_a: sorted row indexes of the block's rows
+    :param rows_b: sorted row indexes of the block's columns
+    :param threshold: min similarity, 0-1
+    """
+    block = X[rows_a].dot(X[rows_b].T)
+    if sparse.issparse(block):
+        block = block.toarray()
+    block = np.asarray(block)
+    for g, h in zip(*np.nonzero(block >= threshold)):
+        i, j = rows_a[g], rows_b[h]
+        if i < j:
+            yield int(i), int(j), float(block[g, h])
+
+
+def exact_similar_pairs(X, threshold: float,
+                        step: int = 2000) -> Generator[SimilarPair, None, None]:
+    """
+    Compare all rows of X block by block and yield every pair (i, j), i < j,
+    with cosine similarity >= threshold.
+    Memory is bounded by step * step, time is O(n^2).
+    :param X: matrix (sparse or dense) of document vectors
+    :param threshold: min similarity, 0-1
+    :param step: block size
+    """
+    X = normalize_rows(X)
+    rows = np.arange(X.shape[0])
+    for a in range(0, len(rows), step):
+        for b in range(a, len(rows), step):
+            yield from _block_similar_pairs(X, rows[a:a + step], rows[b:b + step], threshold)
+
+
+class CosineLSH:
+    """
+    Candidate generation for cosine similarity with random-hyperplane
+    locality-sensitive hashing (SimHash).
+
+    Each vector gets n_bands * rows_per_band sign bits - one per random
+    hyperplane. Two vectors with angle theta agree on a bit with probability
+    1 - theta / pi, so they share at least one band (all rows_per_band bits
+    equal) with probability 1 - (1 - (1 - theta / pi) ** rows_per_band) ** n_bands.
+    Only vectors sharing a band are compared, and their exact cosine similarity
+    is checked against the threshold - so there are no false positives, and
+    recall is controlled by n_bands / rows_per_band.
+
+    With the defaults (20 bands x 8 rows) pairs with similarity 0.75 are found
+    with probability ~0.93, pairs with similarity 0.9 - with ~0.999.
+    """
+
+    def __init__(self, n_bands: int = 20, rows_per_band: int = 8,
+                 random_state: int = None, max_block_size: int = 2000) -> None:
+        if not 0 < rows_per_band < 63:
+            raise ValueError('rows_per_band should be in 1..62')
+        self.n_bands = n_bands
+        self.rows_per_band = rows_per_band
+        self.random_state = random_state
+        self.max_block_size = max_block_size
+
+    def get_hyperplanes(self, n_features: int) -> np.ndarray:
+        random_state = np.random.RandomState(self.random_state)
+        return random_state.randn(n_features, self.n_bands * self.rows_per_band)
+
+    def get_band_keys(self, X) -> np.ndarray:
+        """
+        Hash every row of X into n_bands integer keys.
+        :param X: matrix (sparse or dense) of document vectors
+        :return: int64 array of shape (n_rows, n_bands)
+        """
+        bits = np.asarray(X.dot(self.get_hyperplanes(X.shape[1]))) > 0
+        weights = 1 << np.arange(self.rows_per_band, dtype=np.int64)
+        return np.stack([bits[:, band * self.rows_per_band:(band + 1) * self.rows_per_band]
+                         .dot(weights) for band in range(self.n_bands)], axis=1)
+
+    def get_candidate_buckets(self, X) -> Generator[np.ndarray, None, None]:
+        """
+        Yield sorted arrays of row indexes which share a band key.
+        Zero rows (empty texts) are skipped - their similarity is 0.
+        """
+        non_zero = np.flatnonzero(X.getnnz(axis=1) if sparse.issparse(X)
+                                  else np.any(X != 0, axis=1))
+        if len(non_zero) < 2:
+            return
+        band_keys = self.get_band_keys(X[non_zero])
+        for band in range(self.n_bands):
+            keys = band_keys[:, band]
+            order = np.argsort(keys, kind='mergesort')
+            boundaries = np.flatnonzero(np.diff(keys[order])) + 1
+            for bucket in np.split(order, boundaries):
+                if len(bucket) > 1:
+                    yield np.sort(non_zero[bucket])
+
+    def similar_pairs(self, X, threshold: float) -> Generator[SimilarPair, None, None]:
+        """
+        Yield every found pair (i, j), i < j, with cosine similarity >= threshold.
+        Each pair is yielded once even if it shares several bands.
+        :param X: matrix (sparse or dense) of document vectors
+        :param threshold: min similarity, 0-1
+        """
+        X = normalize_rows(X)
+        n_rows = X.shape[0]
+        step = self.max_block_size
+        found = set()
+        for bucket in self.get_candidate_buckets(X):
+            for a in range(0, len(bucket), step):
+                for b in range(a, len(bucket), step):
+                    for i, j, similarity in _block_similar_pairs(
+                            X, bucket[a:a + step], bucket[b:b + step], threshold):
+                        key = i * n_rows + j
+                        if key not in found:
+                            found.add(key)
+                            yield i, j, similarity
@@ -0,0 +1,216 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# -*- coding: utf-8 -*-
+
+# Standard imports
+import copy
+from collections import Counter
+from typing import Dict, List, Tuple
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+# trie node key holding term data; stems are strings so None never collides
+TERMINAL = None
+
+
+def get_writable_node(trie: Dict, tokens: List[str], own_nodes: set, create: bool = True):
+    """
+    Get trie node of a token path for changing it: nodes on the path which are
+    not in own_nodes (i.e. shared with another trie) are replaced with their copies.
+    The trie root itself should be owned.
+    :param own_nodes: ids of nodes which may be changed in place; updated
+    :param create: create missing nodes
+    :return: node or None if the path does not exist and create is False
+    """
+    node = trie
+    for token in tokens:
+        child = node.get(token)
+        if child is None:
+            if not create:
+                return None
+            child = {}
+        elif id(child) in own_nodes:
+            node = child
+            continue
+        else:
+            child = dict(child)
+        own_nodes.add(id(child))
+        node[token] = child
+        node = child
+    return node
+
+
+class TermStemMatcher:
+    """
+    Token trie built over stemmed terms from DbCache term config.
+    Finds all term hits in a text unit in one pass over its stems
+    instead of scanning the text once per each known term.
+    """
+
+    def __init__(self, term_stems: Dict[str, Dict]):
+        """
+        :param term_stems: dict, {' stemmed term ': {'values': [[term, pk], ...], 'length': int}}
+        """
+        self.trie = {}
+        self.terms_count = 0
+        for stemmed_term, data in term_stems.items():
+            stems = stemmed_term.split()
+            if not stems:
+                continue
+            node = self.trie
+            for stem in stems:
+                node = node.setdefault(stem, {})
+            node[TERMINAL] = (len(stems), data)
+            self.terms_count += 1
+
+    def patched(self, added: List, removed: List) -> 'TermStemMatcher':
+        """
+        Get a new matcher with terms added / removed; this matcher is not changed
+        and can be used by other threads meanwhile. Only trie nodes on the paths
+        of changed terms are copied, other nodes are shared.
+        :param added: list of (stemmed term, term, pk)
+        :param removed: list of (stemmed term, term, pk)
+        """
+        matcher = copy.copy(self)
+        matcher.trie = dict(self.trie)
+        own_nodes = {id(matcher.trie)}
+        for stemmed_term, term, pk in removed:
+            matcher.remove_term(stemmed_term, term, pk, own_nodes)
+        for stemmed_term, term, pk in added:
+            matcher.add_term(stemmed_term, term, pk, own_nodes)
+        return matcher
+
+    def add_term(self, stemmed_term: str, term: str, pk: int, own_nodes: set = None):
+        """
+        Add a term if it is not added yet; term data of its stems is replaced,
+        not modified in place.
+        :param own_nodes: ids of trie nodes which may be changed in place, see patched();
+        None - all nodes
+        """
+        stems = stemmed_term.split()
+        if not stems:
+            return
+        if own_nodes is None:
+            node = self.trie
+            for stem in stems:
+                node = node.setdefault(stem, {})
+        else:
+            node = get_writable_node(self.trie, stems, own_nodes)
+        terminal = node.get(TERMINAL)
+        if terminal is None:
+            self.terms_count += 1
+            values = []
+        else:
+            values = terminal[1]['values']
+            if [term, pk] in [list(i) for i in values]:
+                return
+        values = values + [[term, pk]]
+        node[TERMINAL] = (len(stems), dict(values=values, length=len(values)))
+
+    def remove_term(self, stemmed_term: str, term: str, pk: int, own_nodes: set = None):
+        """
+        Remove a term; term data of its stems is replaced, not modified in place.
+        :param own_nodes: see add_term()
+        """
+        stems = stemmed_term.split()
+        if own_nodes is None:
+            node = self.trie
+            for stem in stems:
+                node = node.get(stem)
+                if node is None:
+                    return
+        else:
+            node = get_writable_node(self.trie, stems, own_nodes, create=False)
+            if node is None:
+                return
+        terminal = node.get(TERMINAL)
+        if terminal is None:
+            return
+        values = [i for i in terminal[1]['values'] if list(i) != [term, pk]]
+        if values:
+            node[TERMINAL] = (terminal[0], dict(values=values, length=len(values)))
+        else:
+            del node[TERMINAL]
+            self.terms_count -= 1
+
+    def find_stem_counts(self, text_stems: List[str]) -> Dict[int, Tuple[Dict, int]]:
+        """
+        Walk the trie from each stem position and count non-overlapping hits of each term.
+        :param text_stems: list of stems of a text
+        :return: dict, {id(term data): (term data, count)}
+        """
+        hits = {}
+        next_start = {}
+        for start in range(len(text_stems)):
+            node = self.trie
+            for pos in range(start, len(text_stems)):
+                node = node.get(text_stems[pos])
+                if node is None:
+                    break
+                terminal = node.get(TERMINAL)
+                if terminal is None:
+                    continue
+                length, data = terminal
+                key = id(data)
+                if next_start.get(key, 0) > start:
+                    continue
+                next_start[key] = start + length
+                hit = hits.get(key)
+                hits[key] = (data, hit[1] + 1 if hit else 1)
+        return hits
+
+    def get_term_usages(self, text_stems: List[str], text_tokens: List[str]) -> List[List]:
+        """
+        Get term usages found in a text.
+        :param text_stems: list of lowercase stems of a text
+        :param text_tokens: list of lowercase tokens of a text
+        :return: list of [term, term_pk, count]
+        """
+        term_usages = []
+        token_counts = None
+        for data, count in self.find_stem_counts(text_stems).values():
+            # if stem has 1 variant only
+            if data['length'] == 1:
+                term_data = list(data['values'][0])
+                term_data.append(count)
+                term_usages.append(term_data)
+            # case when f.e. stem "respons" is equal to multiple terms
+            # ["response", "responsive", "responsibility"]
+            else:
+                if token_counts is None:
+                    token_counts = Counter(text_tokens)
+                for term_data in data['values']:
+                    count = token_counts.get(term_data[0])
+                    if count:
+                        term_data = list(term_data)
+                        term_data.append(count)
+                        term_usages.append(term_data)
+                        # TODO: "responsibilities"
+        return term_usages
@@ -0,0 +1,98 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# -*- coding: utf-8 -*-
+
+# Standard imports
+from functools import lru_cache
+from typing import List, Tuple
+
+# Third-party imports
+from lexnlp.nlp.en.segments.sentences import get_sentence_span_list
+from lexnlp.nlp.en.tokens import DEFAULT_STEMMER, get_token_list
+
+# Django imports
+from django.utils.functional import cached_property
+
+# Project imports
+from apps.task.utils.nlp.entity_matcher import EntityAliasMatcher
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+# number of distinct tokens which stems are kept in process memory
+STEM_CACHE_SIZE = 100000
+
+
+@lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem_token(token: str) -> str:
+    return DEFAULT_STEMMER.stem(token)
+
+
+class TextUnitAnalysis:
+    """
+    Text analysis shared by all locators run over a text unit.
+    Each result is computed on first access, at most once per text unit,
+    so a locator which does not need it does not pay for it.
+    Results match what lexnlp computes for a raw text:
+    stems equal to get_stems(text, lowercase=True), entity tokens equal
+    to the tokens of the normalized text dict_entities matches aliases in.
+    """
+
+    def __init__(self, text: str, language: str = None):
+        self.text = text
+        self.language = language
+
+    @cached_property
+    def lowercase(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        """
+        Lowercase tokens.
+        """
+        return get_token_list(self.text, lowercase=True)
+
+    @cached_property
+    def stems(self) -> List[str]:
+        """
+        Lowercase stems of the tokens.
+        """
+        return [stem_token(token) for token in self.tokens]
+
+    @cached_property
+    def entity_tokens(self) -> List[str]:
+        """
+        Tokens of the text normalized for geo entity and court alias matching.
+        """
+        return EntityAliasMatcher.get_tokens(self.text)
+
+    @cached_property
+    def sentence_spans(self) -> List[Tuple[int, int]]:
+        return list(get_sentence_span_list(self.text))
@@ -0,0 +1,164 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# -*- coding: utf-8 -*-
+
+# Standard imports
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+# Django imports
+from django.conf import settings
+from django.db import connection
+
+# Project imports
+from apps.extract.models import Party, PartyUsage
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+class PartyResolver:
+    """
+    Resolves (name, type_abbr) of parties found in a package of text units to Party ids
+    with one SELECT and one INSERT ... ON CONFLICT DO NOTHING instead of
+    a get_or_create() per party per text unit. The insert does not fail if a concurrent
+    Locate worker has created the same party meanwhile.
+    Resolved ids are kept in a per-process LRU; parties are never deleted by Locate,
+    call clear() if they are deleted otherwise.
+    """
+
+    # parties inserted with one INSERT statement
+    INSERT_BATCH_SIZE = 1000
+
+    def __init__(self, max_size: int = None):
+        self.max_size = settings.PARTY_RESOLVER_CACHE_SIZE if max_size is None else max_size
+        self.ids = OrderedDict()  # type: Dict[Tuple[str, str], int]
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        with self.lock:
+            self.ids.clear()
+
+    def _get_cached(self, keys) -> Dict[Tuple[str, str], int]:
+        found = {}
+        with self.lock:
+            for key in keys:
+                pk = self.ids.get(key)
+                if pk is not None:
+                    self.ids.move_to_end(key)
+                    found[key] = pk
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def _cache(self, ids: Dict[Tuple[str, str], int]):
+        with self.lock:
+            self.ids.update(ids)
+            while len(self.ids) > self.max_size:
+                self.ids.popitem(last=False)
+
+    @staticmethod
+    def _select(keys) -> Dict[Tuple[str, str], int]:
+        keys = set(keys)
+        return {(name, type_abbr): pk for name, type_abbr, pk in Party.objects
+                .filter(name__in={name for name, _ in keys})
+                .values_list('name', 'type_abbr', 'pk')
+                if (name, type_abbr) in keys}
+
+    @classmethod
+    def _insert(cls, parties: Dict[Tuple[str, str], Dict]) -> Dict[Tuple[str, str], int]:
+        """
+        Insert parties skipping existing ones, by INSERT_BATCH_SIZE rows per statement.
+        :return: ids of inserted parties; RETURNING gives no rows for the skipped ones
+        """
+        rows = [(name, type_abbr, defaults.get('type'), defaults.get('type_label'),
+                 defaults.get('type_description'))
+                for (name, type_abbr), defaults in parties.items()]
+        sql = 'INSERT INTO "{0}" (name, type_abbr, type, type_label, type_description) ' \
+              'VALUES {1} ON CONFLICT (name, type_abbr) DO NOTHING ' \
+              'RETURNING name, type_abbr, id'
+        inserted = {}
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), cls.INSERT_BATCH_SIZE):
+                # Django connections use UTF8 client encoding
+                values = ', '.join(cursor.cursor.mogrify('(%s, %s, %s, %s, %s)', row)
+                                   .decode('utf-8')
+                                   for row in rows[start:start + cls.INSERT_BATCH_SIZE])
+                # no params - values are already quoted, "%" in them is not interpolated
+                cursor.execute(sql.format(Party._meta.db_table, values))
+                inserted.update(((name, type_abbr), pk)
+                                for name, type_abbr, pk in cursor.fetchall())
+        return inserted
+
+    def resolve(self, parties: Dict[Tuple[str, str], Dict]) -> Dict[Tuple[str, str], int]:
+        """
+        Get ids of parties creating missing ones.
+        :param parties: {(name, type_abbr): dict of type, type_label, type_description}
+        :return: {(name, type_abbr): party id}
+        """
+        ids = self._get_cached(parties)
+        missing = [key for key in parties if key not in ids]
+        if missing:
+            selected = self._select(missing)
+            missing = {key: parties[key] for key in missing if key not in selected}
+            if missing:
+                selected.update(self._insert(missing))
+                # created by a concurrent worker after the select
+                conflicted = [key for key in missing if key not in selected]
+                if conflicted:
+                    selected.update(self._select(conflicted))
+            self._cache(selected)
+            ids.update(selected)
+        return ids
+
+    def resolve_usages(self, usages: List[PartyUsage]):
+        """
+        Set party_id of usages having party_key = (name, type_abbr) and party_defaults set.
+        """
+        parties = {}
+        for usage in usages:
+            parties.setdefault(usage.party_key, usage.party_defaults)
+        if not parties:
+            return
+        ids = self.resolve(parties)
+        for usage in usages:
+            usage.party_id = ids[usage.party_key]
+
+
+_resolver = None
+
+
+def get_party_resolver() -> PartyResolver:
+    global _resolver
+    if _resolver is None:
+        _resolver = PartyResolver()
+    return _resolver
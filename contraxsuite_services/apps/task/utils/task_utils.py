@@ -26,6 +26,9 @@
 
 import json
 import sys
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 
 from django.db import close_old_connections, connections, models
 from django.db.models.query import QuerySet
@@ -76,6 +79,30 @@ class TaskUtils:
             pass
 
 
+class StageTimer:
+    """
+    Accumulates wall time of named processing stages, f.e.:
+        with timer.stage('parse'):
+            ...
+        task.log_info('Stage timings: %s' % timer)
+    """
+
+    def __init__(self):
+        self.timings = OrderedDict()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0) + time.time() - start
+
+    def __str__(self):
+        return ', '.join('{0}={1:.3f}s'.format(name, seconds)
+                         for name, seconds in self.timings.items())
+
+
 class SimpleObjectSerializer(Serializer):
 
     def get_dump_object(self, obj):
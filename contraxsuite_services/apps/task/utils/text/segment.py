@@ -25,9 +25,13 @@
 # -*- coding: utf-8 -*-
 
 # Standard imports
+import logging
+import re
 import string
+import threading
 
 # NLTK imports
+import nltk.data
 import nltk.tokenize
 import nltk.tokenize.punkt
 
@@ -39,9 +43,34 @@ __maintainer__ = "LexPredict, LLC"
 __email__ = "support@contraxsuite.com"
 
 
+logger = logging.getLogger(__name__)
+
+# Paragraph break: an empty line unless the previous line ends with a colon.
+# Applied to stripped lines joined with "\n" and wrapped in "\n".
+PARAGRAPH_BREAK_RE = re.compile(r'(?<!:)\n(?=\n)')
+
+
 def segment_paragraphs(input_buffer):
     """
     Segment a text buffer into paragraphs.
+    Output is the same as of segment_paragraphs_by_lines(): lines are stripped and
+    joined with spaces, paragraphs are split on empty lines not following a line
+    ending with a colon, the last paragraph is returned even if empty.
+    :param input_buffer:
+    :return:
+    """
+    text = '\n' + '\n'.join(map(str.strip, input_buffer.splitlines())) + '\n'
+    chunks = PARAGRAPH_BREAK_RE.split(text)
+    paragraphs = [paragraph for paragraph in
+                  (chunk.replace('\n', ' ').strip() for chunk in chunks[:-1]) if paragraph]
+    paragraphs.append(chunks[-1].replace('\n', ' ').strip())
+    return paragraphs
+
+
+def segment_paragraphs_by_lines(input_buffer):
+    """
+    Segment a text buffer into paragraphs processing it line by line.
+    Reference implementation of segment_paragraphs().
     :param input_buffer:
     :return:
     """
@@ -120,15 +149,98 @@ def segment_paragraphs(input_buffer):
     return paragraphs
 
 
-def segment_sentences(input_buffer):
+# ObjectStorage key of the sentence tokenizer trained on the document corpus
+SENTENCE_TOKENIZER_STORAGE_KEY = 'sentence_tokenizer'
+
+# NLTK pretrained model, used if no corpus-trained tokenizer is stored
+SENTENCE_TOKENIZER_PRETRAINED = 'tokenizers/punkt/english.pickle'
+
+_sentence_tokenizer = None
+_sentence_tokenizer_lock = threading.Lock()
+
+
+def train_sentence_tokenizer(texts):
+    """
+    Train a Punkt sentence tokenizer on given texts.
+    :param texts: iterable of strings
+    :return: PunktSentenceTokenizer
+    """
+    trainer = nltk.tokenize.punkt.PunktTrainer()
+    for text in texts:
+        trainer.train(text, finalize=False)
+    trainer.finalize_training()
+    return nltk.tokenize.punkt.PunktSentenceTokenizer(trainer.get_params())
+
+
+def store_sentence_tokenizer(sent_tokenizer):
+    """
+    Store the corpus-trained tokenizer for all processes.
+    Each process loads it once, so workers should be restarted to pick it up.
+    """
+    from apps.common.models import ObjectStorage
+    ObjectStorage.update_or_create(SENTENCE_TOKENIZER_STORAGE_KEY, sent_tokenizer)
+    reset_sentence_tokenizer()
+
+
+def load_sentence_tokenizer():
+    """
+    Load sentence tokenizer: corpus-trained one from ObjectStorage,
+    NLTK pretrained one or default Punkt parameters otherwise.
+    :return: PunktSentenceTokenizer
+    """
+    from apps.common.models import ObjectStorage
+    try:
+        sent_tokenizer = ObjectStorage.objects.get(key=SENTENCE_TOKENIZER_STORAGE_KEY).get_obj()
+        if sent_tokenizer is not None:
+            return sent_tokenizer
+    except ObjectStorage.DoesNotExist:
+        pass
+    try:
+        return nltk.data.load(SENTENCE_TOKENIZER_PRETRAINED)
+    except LookupError:
+        # untrained Punkt splits after every abbreviation / initial
+        logger.warning('NLTK data "{0}" is not found and no corpus-trained sentence tokenizer '
+                       'is stored, using untrained PunktSentenceTokenizer: sentences will be '
+                       'segmented poorly. Install NLTK punkt data or run the '
+                       'train_sentence_tokenizer management command.'.format(SENTENCE_TOKENIZER_PRETRAINED))
+        return nltk.tokenize.punkt.PunktSentenceTokenizer()
+
+
+def get_sentence_tokenizer():
+    """
+    Get sentence tokenizer cached in the current process.
+    :return: PunktSentenceTokenizer
+    """
+    global _sentence_tokenizer
+    if _sentence_tokenizer is None:
+        with _sentence_tokenizer_lock:
+            if _sentence_tokenizer is None:
+                _sentence_tokenizer = load_sentence_tokenizer()
+    return _sentence_tokenizer
+
+
+def reset_sentence_tokenizer():
+    """
+    Drop the sentence tokenizer cached in the current process.
+    """
+    global _sentence_tokenizer
+    with _sentence_tokenizer_lock:
+        _sentence_tokenizer = None
+
+
+def segment_sentences(input_buffer, adaptive=False):
     """
     Segment a buffer into sentences.
     :param input_buffer: input buffer
+    :param adaptive: train a new tokenizer on the input buffer (slow)
+    instead of using the pretrained process-cached one
     :return:
     """
-    # Setup unsupervised sentence tokenizer
-    # TODO: Allow configurable sentence tokenizer.
-    sent_tokenizer = nltk.tokenize.punkt.PunktSentenceTokenizer(input_buffer)
+    if adaptive:
+        # Setup unsupervised sentence tokenizer
+        sent_tokenizer = nltk.tokenize.punkt.PunktSentenceTokenizer(input_buffer)
+    else:
+        sent_tokenizer = get_sentence_tokenizer()
     sentences = []
 
     # Iterate over paragraphs
@@ -0,0 +1,195 @@
+"""
+    Copyright (C) 2017, ContraxSuite, LLC
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of the
+    License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+    You can also be released from the requirements of the license by purchasing
+    a commercial license from ContraxSuite, LLC. Buying such a license is
+    mandatory as soon as you develop commercial activities involving ContraxSuite
+    software without disclosing the source code of your own applications.  These
+    activities include: offering paid services to customers as an ASP or "cloud"
+    provider, processing documents on the fly in a web application,
+    or shipping ContraxSuite within a closed source product.
+"""
+# -*- coding: utf-8 -*-
+
+# Standard imports
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+# Django imports
+from django.db import connection, models, transaction
+from django.db.models import Model
+from django.utils.timezone import now
+
+# Project imports
+from apps.document.models import TextUnit, TextUnitTag
+
+__author__ = "ContraxSuite, LLC; LexPredict, LLC"
+__copyright__ = "Copyright 2015-2018, ContraxSuite, LLC"
+__license__ = "https://github.com/LexPredict/lexpredict-contraxsuite/blob/1.1.4/LICENSE"
+__version__ = "1.1.4"
+__maintainer__ = "LexPredict, LLC"
+__email__ = "support@contraxsuite.com"
+
+
+# value ranges of integer fields, values out of range raise DataError on insert
+INTEGER_FIELD_RANGES = (
+    (models.PositiveSmallIntegerField, 0, 32767),
+    (models.SmallIntegerField, -32768, 32767),
+    (models.PositiveIntegerField, 0, 2147483647),
+    (models.BigIntegerField, -9223372036854775808, 9223372036854775807),
+    (models.IntegerField, -2147483648, 2147483647),
+)
+
+
+def fits_fields(obj: Model) -> bool:
+    """
+    Check that field values of an unsaved object fit the database columns
+    (string lengths and integer ranges), so a bulk insert does not fail on it.
+    """
+    for field in obj._meta.concrete_fields:
+        value = getattr(obj, field.attname)
+        if value is None:
+            continue
+        if isinstance(field, models.CharField) and field.max_length \
+                and len(str(value)) > field.max_length:
+            return False
+        for field_class, min_value, max_value in INTEGER_FIELD_RANGES:
+            if isinstance(field, field_class) and not field.primary_key \
+                    and not isinstance(field, models.ForeignKey):
+                if not min_value <= value <= max_value:
+                    return False
+                break
+    return True
+
+
+def delete_usages(usage_model, document_ids: List[int] = None, tag: str = None) -> int:
+    """
+    Delete usages (or text unit tags) of text units of the documents with one set-based
+    DELETE ... USING instead of QuerySet.delete() which collects the rows
+    to send delete signals for each of them.
+    Signals are not sent; nothing references usage rows.
+    :param usage_model: usage model or TextUnitTag
+    :param document_ids: delete in all documents if not set
+    :param tag: delete only rows having this tag (TextUnitTag)
+    :return: number of deleted rows
+    """
+    quote_name = connection.ops.quote_name
+    sql = 'DELETE FROM {0} u'.format(quote_name(usage_model._meta.db_table))
+    conditions = []
+    params = []
+    if document_ids is not None:
+        sql += ' USING {0} tu'.format(quote_name(TextUnit._meta.db_table))
+        conditions.append('u.text_unit_id = tu.id AND tu.document_id = ANY(%s)')
+        params.append(list(document_ids))
+    if tag is not None:
+        conditions.append('u.tag = %s')
+        params.append(tag)
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def truncate_usages(usage_models: Iterable[type]):
+    """
+    Remove all rows of usage tables at once, for re-locating in all documents.
+    TRUNCATE locks the tables until the end of the transaction.
+    """
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute('TRUNCATE {0}'.format(', '.join(
+            quote_name(usage_model._meta.db_table) for usage_model in usage_models)))
+
+
+class UsageWriter:
+    """
+    Collects usages and tags found by locators in a package of text units
+    and writes them with one DELETE and one bulk INSERT per usage model
+    and one INSERT of new tags instead of a DELETE + INSERT pair
+    per each locator and text unit and a get_or_create() per tag.
+    """
+
+    BULK_CREATE_BATCH_SIZE = 5000
+
+    def __init__(self, user_id=None):
+        # usage model -> ids of processed text units which old usages should be removed
+        self.processed_text_unit_ids = OrderedDict()  # type: Dict[type, set]
+        # usage model -> new usage objects
+        self.usages = OrderedDict()  # type: Dict[type, List[Model]]
+        # (text unit id, tag) -> None, ordered set of tags to create if missing
+        self.tags = OrderedDict()
+        self.user_id = user_id
+
+    def add(self, usage_models: Iterable[type], text_unit_id, usages: List[Model]):
+        """
+        Register locator results for a text unit.
+        :param usage_models: usage models the locator writes to
+        :param text_unit_id: processed text unit id
+        :param usages: unsaved usage objects found in the text unit, may be empty
+        """
+        for usage_model in usage_models:
+            self.processed_text_unit_ids.setdefault(usage_model, set()).add(text_unit_id)
+        for usage in usages:
+            self.usages.setdefault(type(usage), []).append(usage)
+
+    def add_tag(self, text_unit_id, tag: str):
+        """
+        Register a tag to create for a text unit unless it is tagged so already.
+        """
+        self.tags[(text_unit_id, tag)] = None
+
+    def save_tags(self) -> int:
+        """
+        Create registered tags which do not exist yet with INSERT ... ON CONFLICT DO NOTHING
+        on (text_unit, tag) unique key, so tags created meanwhile by a concurrent Locate
+        or by a user do not fail the package.
+        :return: number of created tags
+        """
+        if not self.tags:
+            return 0
+        timestamp = now()
+        rows = [(text_unit_id, tag, timestamp, self.user_id) for text_unit_id, tag in self.tags]
+        sql = 'INSERT INTO "{0}" (text_unit_id, tag, timestamp, user_id) VALUES {1} ' \
+              'ON CONFLICT (text_unit_id, tag) DO NOTHING'
+        created = 0
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), self.BULK_CREATE_BATCH_SIZE):
+                batch = rows[start:start + self.BULK_CREATE_BATCH_SIZE]
+                cursor.execute(sql.format(TextUnitTag._meta.db_table,
+                                          ', '.join(['(%s, %s, %s, %s)'] * len(batch))),
+                               [value for row in batch for value in row])
+                created += cursor.rowcount
+        return created
+
+    def save(self) -> Dict[str, int]:
+        """
+        Replace usages of all processed text units with the collected ones
+        and create the collected tags.
+        :return: dict, {usage model name: number of created usages}
+        """
+        created = {}
+        with transaction.atomic():
+            for usage_model, text_unit_ids in self.processed_text_unit_ids.items():
+                usage_model.objects.filter(text_unit_id__in=text_unit_ids).delete()
+            for usage_model, usages in self.usages.items():
+                usage_model.objects.bulk_create(usages, batch_size=self.BULK_CREATE_BATCH_SIZE)
+                created[usage_model.__name__] = len(usages)
+            created[TextUnitTag.__name__] = self.save_tags()
+        self.processed_text_unit_ids.clear()
+        self.usages.clear()
+        self.tags.clear()
+        return created
@@ -393,6 +393,11 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': 60.0,
         'options': {'queue': 'serial', 'expires': 60},
     },
+    'advanced_celery.score_sentiment_of_loaded_documents': {
+        'task': 'advanced_celery.score_sentiment_of_loaded_documents',
+        'schedule': 60.0,
+        'options': {'queue': 'serial', 'expires': 60},
+    },
     'advanced_celery.track_session_completed': {
         'task': 'advanced_celery.track_session_completed',
         'schedule': 120.0,
@@ -429,6 +434,12 @@ CELERY_TASK_DEFAULT_QUEUE = 'default'
 # Redis for Celery args caching
 CELERY_CACHE_REDIS_URL = 'redis://127.0.0.1:6379/0'
 CELERY_CACHE_REDIS_KEY_PREFIX = 'celery_task'
+# process-local tier of the Redis cache: LRU bounded by pickled size and entry TTL
+CELERY_CACHE_LOCAL_MAX_BYTES = 256 * 1024 * 1024
+CELERY_CACHE_LOCAL_TTL_SECONDS = 600
+# task arguments pickled to more bytes are passed through the Redis cache, not the broker
+CELERY_PAYLOAD_OFFLOAD_BYTES = 64 * 1024
+CELERY_PAYLOAD_TTL_SECONDS = 7 * 24 * 60 * 60
 
 # django-excel
 # http://django-excel.readthedocs.io/en/latest/
@@ -443,6 +454,8 @@ ELASTICSEARCH_CONFIG = {
     'hosts': [{'host': '127.0.0.1', 'port': 9200}],
     'index': 'contraxsuite'
 }
+# number of text units sent in one bulk request by "Update Elasticsearch Index" task
+ELASTICSEARCH_INDEX_CHUNK_SIZE = 500
 
 # django-ckeditor
 CKEDITOR_CONFIGS = {
@@ -563,10 +576,24 @@ TIKA_DISABLE = False
 TIKA_SERVER_ENDPOINT = None
 TEXTRACT_FIRST_FOR_EXTENSIONS = []
 
+# document text / table extraction, see apps/task/utils/extraction.py
+# max number of extractor processes started by one worker process
+DOCUMENT_EXTRACTION_MAX_PROCESSES = 2
+# per-extractor timeouts in seconds; an extractor exceeding its timeout is terminated
+DOCUMENT_EXTRACTION_TIMEOUTS = {'tika': 900, 'textract': 900, 'tables': 600}
+DOCUMENT_EXTRACTION_DEFAULT_TIMEOUT = 900
+# start TIKA and Textract at once and take the first result instead of trying them in turn
+DOCUMENT_EXTRACTION_RACE = False
+# extract tables from PDF documents with tabula if "detect_tables" option is not specified
+DOCUMENT_DETECT_TABLES = False
+
 # use jqWidgets' export, e.g. send data to jq OR handle it on client side
 # FYI: http://www.jqwidgets.com/community/topic/jqxgrid-export-data/#}
 JQ_EXPORT = False
 
+# streaming export (csv/xlsx): number of rows written per response chunk
+EXPORT_STREAM_CHUNK_ROWS = 1000
+
 # place dictionaries for GeoEntities, Terms, US Courts, etc.
 DATA_ROOT = PROJECT_DIR('data/')
 GIT_DATA_REPO_ROOT = 'https://raw.githubusercontent.com/' \
@@ -788,6 +815,31 @@ RETRAINING_TASK_EXECUTION_DELAY_IN_SEC = 1 * 60 * 60
 TRAINED_AFTER_DOCUMENTS_NUMBER = 100
 
 TEXT_UNITS_TO_PARSE_PACKAGE_SIZE = 10
+# Locate sub-tasks are sized by characters to take about this time, see LocatePacker;
+# 0 - fixed packages of TEXT_UNITS_TO_PARSE_PACKAGE_SIZE text units
+LOCATE_PACKAGE_TARGET_SECONDS = 60
+LOCATE_PACKAGE_MAX_TEXT_UNITS = 5000
+# locating speed used until timings of previous Locate sub-tasks are recorded
+LOCATE_DEFAULT_CHARS_PER_SECOND = 20000
+# number of latest Locate sub-task timings the speed is learned from
+LOCATE_TIMINGS_HISTORY_SIZE = 200
+# per-process LRU size of party (name, type_abbr) -> id resolved by Locate
+PARTY_RESOLVER_CACHE_SIZE = 100000
+
+# min interval between DB writes of a task progress, see TaskExecutionBuffer
+TASK_PROGRESS_FLUSH_INTERVAL_MS = 1000
+
+# TextBlob sentiment of loaded documents and text units:
+# True - scored by a separate "Score Sentiment" task, False - scored while loading a document
+SENTIMENT_DEFERRED = True
+# approx. number of text units scored by one "Score Sentiment" sub-task
+SENTIMENT_BATCH_SIZE = 5000
+# loaded documents are scored by one "Score Sentiment" task started every minute
+# unless the previous one is not completed or started earlier than this
+SENTIMENT_TASK_EXPIRE_SECONDS = 6 * 60 * 60
+
+# how long StatsAPIView counters are cached in process memory, see StatsEngine
+STATS_CACHE_TTL_SECONDS = 60
 
 ML_TRAIN_DATA_SET_GROUP_LEN = 10000
 